@@ -1,21 +1,43 @@
+import json
+import asyncio
+import weakref
 import httpx
-from ..core.interfaces import AbstractLLMClient, AbstractEmbeddingClient
+from typing import AsyncIterator
+from ..core.http import pooled_http_client
+from ..core.interfaces import AbstractStreamingLLMClient, AbstractEmbeddingClient
+from ..services.embedding_scheduler import count_embedding_request
 
-class OllamaAdapter(AbstractLLMClient, AbstractEmbeddingClient):
+class OllamaAdapter(AbstractStreamingLLMClient, AbstractEmbeddingClient):
     """
     Adapter for interacting with the Ollama LLM and embedding API.
     Implements both LLM and embedding client interfaces.
     """
-    def __init__(self, host: str, port: int) -> None:
+    def __init__(self, host: str, port: int, client: httpx.AsyncClient | None = None,
+                 embedding_model: str = "nomic-embed-text", embed_batch_size: int = 64,
+                 embed_max_concurrency: int = 4, cache=None) -> None:
         """
         Args:
             host (str): Hostname or IP address of the Ollama server.
             port (int): Port number of the Ollama server.
+            client (httpx.AsyncClient | None): Pooled HTTP client to reuse. If omitted, the adapter
+                creates its own with the HTTP_MAX_* limits and HTTP_TIMEOUT.
+            embedding_model (str): Ollama embedding model (e.g. "nomic-embed-text").
+            embed_batch_size (int): Texts per /embed request.
+            embed_max_concurrency (int): /embed requests in flight at once per adapter.
+            cache: Optional EmbeddingCache consulted before any embeddings request.
         """
         # Ollama API does not use a /api prefix; endpoints are at root (e.g., /chat)
         self.base_url: str = f"http://{host}:{port}"
-        self.client: httpx.AsyncClient = httpx.AsyncClient()
+        self.client: httpx.AsyncClient = client or pooled_http_client()
+        # A pooled client belongs to the ClientRegistry, which closes it
+        self._owns_client = client is None
         self.model: str = "llama3.2:latest" 
+        self.embedding_model = embedding_model
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.cache = cache
+        self.embed_max_concurrency = max(1, embed_max_concurrency)
+        # One semaphore per event loop: ingestion also embeds from a background loop
+        self._embed_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
 
     async def generate_response(self, prompt: str, context: str | None = None) -> str:
         """
@@ -43,28 +65,83 @@ class OllamaAdapter(AbstractLLMClient, AbstractEmbeddingClient):
             return data["response"]
         return ""
 
-    # async def create_embedding(self, text: str) -> list[float]:
-    #     """
-    #     Create an embedding for the given text using the Ollama API.
-
-    #     Args:
-    #         text (str): The input text to embed.
-
-    #     Returns:
-    #         list[float]: The embedding vector.
-    #     """
-    #     response = await self.client.post(
-    #         f"{self.base_url}/embeddings",
-    #         json={
-    #     # Use Llama 3.2 for embeddings
-    #             "prompt": text
-    #         }
-    #     )
-    #     response.raise_for_status()
-    #     return response.json().get("embedding", [])
+    async def stream_response(self, prompt: str, context: str | None = None) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM. With "stream": True Ollama answers with one JSON
+        object per line, each carrying the next fragment of the message.
+        """
+        full_prompt: str = f"Context: {context}\n\nQuestion: {prompt}" if context else prompt
+        async with self.client.stream(
+            "POST",
+            f"{self.base_url}/chat",
+            json={
+                "model": self.model,
+                "messages": [
+                    {"role": "user", "content": full_prompt}
+                ],
+                "stream": True
+            }
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if "message" in data and isinstance(data["message"], dict):
+                    token = data["message"].get("content", "")
+                else:
+                    token = data.get("response", "")
+                if token:
+                    yield token
+                if data.get("done"):
+                    break
 
     async def create_embedding(self, text: str) -> list[float]:
         """
-        Ollama does not support embeddings via API.
+        Create an embedding for the given text with the Ollama embedding model.
+        """
+        return (await self.embed_documents([text]))[0]
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed texts with the batched /embed endpoint: embed_batch_size texts per request and at
+        most embed_max_concurrency requests at once. Cached texts are not sent.
         """
-        raise NotImplementedError("Ollama does not provide an /api/embeddings endpoint. Use OpenAI or another provider for embeddings.")
\ No newline at end of file
+        if not texts:
+            return []
+        cached = await asyncio.to_thread(self.cache.get_many, self.embedding_model, texts) if self.cache else [None] * len(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if not missing:
+            return cached
+        batches = [[texts[i] for i in missing[start:start + self.embed_batch_size]]
+                   for start in range(0, len(missing), self.embed_batch_size)]
+        vectors = [vector for batch in await asyncio.gather(*(self._embed_batch(batch) for batch in batches))
+                   for vector in batch]
+        if self.cache:
+            await asyncio.to_thread(self.cache.put_many, self.embedding_model, [texts[i] for i in missing], vectors)
+        for i, vector in zip(missing, vectors):
+            cached[i] = vector
+        return cached
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        loop = asyncio.get_running_loop()
+        slots = self._embed_slots.get(loop)
+        if slots is None:
+            slots = self._embed_slots[loop] = asyncio.Semaphore(self.embed_max_concurrency)
+        async with slots:
+            count_embedding_request(texts)
+            # Like /chat, the embedding endpoint is served without the /api prefix
+            response = await self.client.post(
+                f"{self.base_url}/embed",
+                json={"model": self.embedding_model, "input": texts, "truncate": True}
+            )
+        response.raise_for_status()
+        embeddings = response.json().get("embeddings") or []
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs")
+        return embeddings
+
+    async def aclose(self) -> None:
+        """Close the HTTP connection pool if this adapter created it."""
+        if self._owns_client:
+            await self.client.aclose()
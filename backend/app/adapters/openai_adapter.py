@@ -1,27 +1,75 @@
+import asyncio
+from typing import AsyncIterator
 from openai import AsyncOpenAI
-from ..core.interfaces import AbstractLLMClient, AbstractEmbeddingClient
+from ..core.interfaces import AbstractStreamingLLMClient, AbstractEmbeddingClient
+from ..services.embedding_scheduler import count_embedding_request
 
-class OpenAIAdapter(AbstractLLMClient, AbstractEmbeddingClient):
-    def __init__(self, api_key: str):
+class OpenAIAdapter(AbstractStreamingLLMClient, AbstractEmbeddingClient):
+    def __init__(self, api_key: str, cache=None):
+        """
+        Args:
+            api_key (str): OpenAI API key.
+            cache: Optional EmbeddingCache consulted before any embeddings request.
+        """
         self.client = AsyncOpenAI(api_key=api_key)
+        self.model = "gpt-3.5-turbo"
+        self.embedding_model = "text-embedding-ada-002"
+        self.cache = cache
 
-    async def generate_response(self, prompt: str, context: str | None = None) -> str:
+    @staticmethod
+    def _messages(prompt: str, context: str | None = None) -> list:
         from openai.types.chat import ChatCompletionMessageParam
         messages: list[ChatCompletionMessageParam] = [
             {"role": "user", "content": f"Context: {context}\n\nQuestion: {prompt}"} if context else {"role": "user", "content": prompt}
         ]
+        return messages
+
+    async def generate_response(self, prompt: str, context: str | None = None) -> str:
         response = await self.client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
+            model=self.model,
+            messages=self._messages(prompt, context),
             max_tokens=500
         )
         content = response.choices[0].message.content
         return content if content is not None else ""
 
+    async def stream_response(self, prompt: str, context: str | None = None) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, context),
+            max_tokens=500,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     async def create_embedding(self, text: str) -> list[float]:
+        return (await self.embed_documents([text]))[0]
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        # SQLite lookups block; keep them off the event loop
+        cached = await asyncio.to_thread(self.cache.get_many, self.embedding_model, texts) if self.cache else [None] * len(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if not missing:
+            return cached
+        inputs = [texts[i] for i in missing]
+        count_embedding_request(inputs)
         response = await self.client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=[text]
+            model=self.embedding_model,
+            input=inputs
         )
-        embedding = response.data[0].embedding
-        return embedding if embedding is not None else []
\ No newline at end of file
+        # The API may return items out of order; each carries its input index
+        ordered = sorted(response.data, key=lambda item: item.index)
+        vectors = [item.embedding if item.embedding is not None else [] for item in ordered]
+        if self.cache:
+            await asyncio.to_thread(self.cache.put_many, self.embedding_model, inputs, vectors)
+        for i, vector in zip(missing, vectors):
+            cached[i] = vector
+        return cached
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self.client.close()
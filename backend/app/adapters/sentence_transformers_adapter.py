@@ -0,0 +1,108 @@
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+from ..core.interfaces import AbstractEmbeddingClient
+from ..services.embedding_scheduler import count_embedding_request
+
+logger = logging.getLogger(__name__)
+
+# Loaded models, shared by every adapter in the process (ingestion, chat, ...)
+_models: Dict[Tuple[str, str, str, bool], Any] = {}
+_models_lock = threading.Lock()
+
+
+def _load_model(model_name: str, backend: str, onnx_file: str, int8: bool) -> Any:
+    key = (model_name, backend, onnx_file, int8)
+    with _models_lock:
+        if key not in _models:
+            from sentence_transformers import SentenceTransformer
+            start = time.perf_counter()
+            if backend == "onnx":
+                model_kwargs = {"file_name": onnx_file} if onnx_file else None
+                model = SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+            else:
+                model = SentenceTransformer(model_name, device="cpu")
+                if int8:
+                    import torch
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            _models[key] = model
+            logger.info(f"Loaded local embedding model {model_name} ({backend}{', int8' if int8 and backend != 'onnx' else ''})"
+                        f" in {time.perf_counter() - start:.1f}s")
+        return _models[key]
+
+
+class SentenceTransformerAdapter(AbstractEmbeddingClient):
+    """
+    Local CPU embeddings with sentence-transformers, so no embedding request leaves the host.
+
+    Inference runs on a small thread pool (PyTorch and ONNX Runtime release the GIL while they
+    compute), so the event loop stays responsive. embed_documents() encodes its texts in
+    batches of batch_size; concurrent create_embedding() calls are combined by the
+    EmbeddingBatcher that ClientRegistry puts in front of every embedding client.
+
+    For more CPU throughput the model can run on ONNX Runtime, optionally from a quantized
+    export (onnx_file, e.g. "onnx/model_qint8_avx512_vnni.onnx"), or be quantized to int8 with
+    PyTorch dynamic quantization (int8=True).
+    """
+    def __init__(self, model_name: str, backend: str = "torch", onnx_file: str = "", int8: bool = False,
+                 batch_size: int = 32, workers: int = 1, cache=None, model: Any = None) -> None:
+        """
+        Args:
+            model_name (str): sentence-transformers model name or local path.
+            backend (str): "torch" or "onnx".
+            onnx_file (str): ONNX file inside the model repository, for the onnx backend.
+            int8 (bool): Quantize the Linear layers of a torch model to int8 after loading.
+            batch_size (int): Texts per forward pass.
+            workers (int): Concurrent forward passes.
+            cache: Optional EmbeddingCache consulted before the model.
+            model: Already loaded model with an encode() method (e.g. for tests).
+        """
+        self.embedding_model = model_name
+        self.backend = backend.lower()
+        self.onnx_file = onnx_file
+        self.int8 = int8
+        self.batch_size = max(1, batch_size)
+        self.cache = cache
+        self._model = model
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="local-embed")
+
+    def _load(self) -> Any:
+        if self._model is None:
+            self._model = _load_model(self.embedding_model, self.backend, self.onnx_file, self.int8)
+        return self._model
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._load().encode(texts, batch_size=self.batch_size, normalize_embeddings=True,
+                                      convert_to_numpy=True, show_progress_bar=False)
+        return [vector.tolist() for vector in vectors]
+
+    def warm_up(self) -> None:
+        """Load the model now (blocking) instead of on the first request."""
+        self._load()
+
+    async def create_embedding(self, text: str) -> list[float]:
+        return (await self.embed_documents([text]))[0]
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        cached = await asyncio.to_thread(self.cache.get_many, self.embedding_model, texts) if self.cache else [None] * len(texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if not missing:
+            return cached
+        inputs = [texts[i] for i in missing]
+        count_embedding_request(inputs)
+        loop = asyncio.get_running_loop()
+        vectors = await loop.run_in_executor(self._executor, self._encode, inputs)
+        if self.cache:
+            await asyncio.to_thread(self.cache.put_many, self.embedding_model, inputs, vectors)
+        for i, vector in zip(missing, vectors):
+            cached[i] = vector
+        return cached
+
+    async def aclose(self) -> None:
+        """Stop the inference threads once queued work is done. The loaded model stays shared."""
+        self._executor.shutdown(wait=False)
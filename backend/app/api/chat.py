@@ -1,12 +1,21 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import os
-from typing import Any
-if "PYTEST_CURRENT_TEST" not in os.environ:
-    from ..services.rag_service import RAGService
+import json
+import logging
+from typing import Any, AsyncIterator
+from ..services.client_registry import ClientRegistry, get_client_registry
+from ..services.answer_cache import get_answer_cache
+from ..services.embedding_cache import get_embedding_cache
+from ..core.config import settings
 
 router = APIRouter()
-rag_service = RAGService() 
+logger = logging.getLogger(__name__)
+
+
+def get_registry(request: Request) -> ClientRegistry:
+    """Registry created by the app lifespan, or the process-wide one when lifespan did not run."""
+    return getattr(request.app.state, "clients", None) or get_client_registry()
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
@@ -14,24 +23,114 @@ class ChatRequest(BaseModel):
     provider: str | None = None  
     file_name: str | None = None  
 
+class BatchQuery(BaseModel):
+    """One question of a batch request."""
+    query: str
+    file_name: str | None = None
+
+class BatchChatRequest(BaseModel):
+    """Request model for the batch chat endpoint."""
+    queries: list[BatchQuery]
+    provider: str | None = None
+
 class ChatResponse(BaseModel):
     """Response model for chat endpoint."""
     answer: str
 
+def _server_timing(timings: dict[str, float]) -> str:
+    """Format stage timings (seconds) as a Server-Timing header value (milliseconds)."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
 @router.post("/", response_model=ChatResponse)
-async def chat_with_bot(request: ChatRequest) -> ChatResponse:
+async def chat_with_bot(request: ChatRequest, http_request: Request, http_response: Response) -> ChatResponse:
     """
     Endpoint to interact with the chatbot.
+    The time spent per stage (embed, cache, retrieve, generate) is reported in the
+    Server-Timing response header.
     """
-    import traceback
     try:
         provider = request.provider if request.provider is not None else "ollama"
-        rag_service = RAGService(provider=provider)
+        rag_service = get_registry(http_request).get_rag_service(provider)
         if not hasattr(rag_service, "answer_query") or not callable(getattr(rag_service, "answer_query", None)):
             raise HTTPException(status_code=500, detail="RAGService does not have an 'answer_query' method.")
-        response: str = await rag_service.answer_query(request.query, file_name=request.file_name)
+        timings: dict[str, float] = {}
+        response: str = await rag_service.answer_query(request.query, file_name=request.file_name, timings=timings)
+        http_response.headers["Server-Timing"] = _server_timing(timings)
         return ChatResponse(answer=response)
     except Exception as e:
-        print("Exception in chat_with_bot:", e)
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"{e}\n{traceback.format_exc()}")
\ No newline at end of file
+        logger.exception(f"Exception in chat_with_bot: {e}")
+        # The traceback stays in the server log; clients only learn that the request failed
+        raise HTTPException(status_code=500, detail="Failed to answer the query.")
+
+@router.get("/cache/stats")
+async def get_cache_stats() -> dict[str, Any]:
+    """
+    Hit/miss counters of the answer cache and the embedding cache.
+    """
+    answer_cache = get_answer_cache()
+    embedding_cache = get_embedding_cache()
+    return {
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "embedding_cache": embedding_cache.stats() if embedding_cache else None
+    }
+
+def _sse(data: dict, event: str | None = None) -> str:
+    """Format one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@router.post("/batch")
+async def chat_batch(request: BatchChatRequest, http_request: Request) -> StreamingResponse:
+    """
+    Answer many questions in one request, e.g. for evaluation or FAQ generation jobs.
+    Queries are embedded and retrieved together and answered concurrently (at most
+    CHAT_BATCH_CONCURRENCY generations at once). The response is NDJSON with one
+    `{"index", "query", "answer"}` line per question in completion order, or
+    `{"index", "query", "error"}` for a question that failed.
+    """
+    if len(request.queries) > settings.CHAT_BATCH_MAX_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {settings.CHAT_BATCH_MAX_QUERIES} queries per batch.")
+    provider = request.provider if request.provider is not None else "ollama"
+    rag_service = get_registry(http_request).get_rag_service(provider)
+    items = [(item.query, item.file_name) for item in request.queries]
+
+    async def lines() -> AsyncIterator[str]:
+        try:
+            async for index, answer in rag_service.answer_batch(items):
+                line = {"index": index, "query": items[index][0]}
+                if isinstance(answer, Exception):
+                    line["error"] = str(answer)
+                else:
+                    line["answer"] = answer
+                yield json.dumps(line) + "\n"
+        except Exception as e:
+            logger.exception(f"Exception in chat_batch: {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
+@router.post("/stream")
+async def chat_with_bot_stream(request: ChatRequest, http_request: Request) -> StreamingResponse:
+    """
+    Streaming variant of the chat endpoint (Server-Sent Events).
+    Emits one `data: {"token": ...}` event per generated fragment, then an `event: done`
+    event; failures after the stream has started are reported as an `event: error` event.
+    """
+    provider = request.provider if request.provider is not None else "ollama"
+    rag_service = get_registry(http_request).get_rag_service(provider)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            async for token in rag_service.stream_answer(request.query, file_name=request.file_name):
+                yield _sse({"token": token})
+            yield _sse({}, event="done")
+        except Exception as e:
+            logger.exception(f"Exception in chat_with_bot_stream: {e}")
+            yield _sse({"detail": str(e)}, event="error")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the client as they are generated
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
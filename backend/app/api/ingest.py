@@ -1,55 +1,155 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Body
-from typing import Dict, Any, Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from typing import Callable, Coroutine, Dict, Any, Optional, List, Tuple
 import os
+import uuid
+import hashlib
 import aiofiles
 from pathlib import Path
+from app.core.config import settings
 from app.services.ingestion_service import IngestionService
+from app.services.ingestion_jobs import IngestionJobQueue
 
-router = APIRouter()
+# Room for the multipart boundaries, part headers and form fields around an uploaded file
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+
+class UploadSizeLimitRoute(APIRoute):
+    """
+    Rejects a request whose Content-Length exceeds the upload limit with 413 before its body
+    is read. FastAPI receives and spools the whole multipart form before the endpoint runs, so
+    the endpoint's own checks would only see an oversized upload after it arrived.
+    """
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Any]]:
+        handler = super().get_route_handler()
+
+        async def limited_handler(request: Request) -> Any:
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > settings.UPLOAD_MAX_MB * 1024 * 1024 + UPLOAD_FORM_OVERHEAD:
+                raise HTTPException(status_code=413, detail=f"File exceeds the {settings.UPLOAD_MAX_MB} MB upload limit.")
+            return await handler(request)
+        return limited_handler
+
+
+router = APIRouter(route_class=UploadSizeLimitRoute)
 ingestion_service = IngestionService()
+# Uploads are processed in the background; main.py starts and stops the workers
+job_queue = IngestionJobQueue(ingestion_service)
+
 
+def _job_response(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/ingest/jobs/{job['job_id']}"
+    }
+
+
+class LinkBatchRequest(BaseModel):
+    """Request model for batch link ingestion."""
+    links: List[str]
+
+
+def _queue_links(links: List[str]) -> List[Dict[str, Any]]:
+    links = list(dict.fromkeys(link.strip() for link in links if link and link.strip()))
+    if not links:
+        raise HTTPException(status_code=400, detail="At least one link must be provided.")
+    if len(links) > settings.LINK_MAX_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"At most {settings.LINK_MAX_PER_REQUEST} links can be queued per request.")
+    invalid = [link for link in links if not link.lower().startswith(("http://", "https://"))]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Only http and https links are supported: {', '.join(invalid)}")
+    return [{"link": link, **_job_response(job_queue.enqueue("link", {"url": link}))} for link in links]
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+async def _save_upload(file: UploadFile, destination: Path) -> Tuple[int, str]:
+    """
+    Copy an upload to disk in UPLOAD_CHUNK_SIZE blocks, hashing it on the way.
+    Memory use stays constant regardless of the file size. The file is written to a
+    temporary ".part" path and moved into place only once it is complete.
 
-@router.post("/upload")
+    Returns:
+        Tuple[int, str]: Size in bytes and SHA-256 hex digest.
+
+    Raises:
+        UploadTooLarge: The upload exceeds UPLOAD_MAX_MB. Nothing is left on disk.
+    """
+    max_bytes = settings.UPLOAD_MAX_MB * 1024 * 1024
+    digest = hashlib.sha256()
+    size = 0
+    part_path = destination.with_name(destination.name + ".part")
+    try:
+        async with aiofiles.open(part_path, "wb") as file_object:
+            while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge()
+                digest.update(chunk)
+                await file_object.write(chunk)
+        os.replace(part_path, destination)
+    except BaseException:
+        part_path.unlink(missing_ok=True)
+        raise
+    return size, digest.hexdigest()
+
+
+@router.post("/upload", status_code=202)
 async def upload_document(
+    request: Request,
     file: Optional[UploadFile] = File(None),
-    link: Optional[str] = Body(None, embed=True)
+    link: Optional[str] = Form(None)
 ) -> Dict[str, Any]:
     """
-    Upload and ingest a document (file or link).
-    Supports PDF, DOCX, TXT, image files, or a link to a document.
+    Upload a document (file or link) and queue it for ingestion.
+    Supports PDF, DOCX, TXT, image files, or a link to a document or HTML page.
+    The link can be sent as a form field or as JSON ({"link": "..."}).
+    Returns a job ID; poll /jobs/{job_id} for progress and the result.
     """
+    if file is None and link is None and request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON body.")
+        link = body.get("link") if isinstance(body, dict) else None
     if file is not None:
         if not file.filename:
             raise HTTPException(status_code=400, detail="No filename provided.")
+        file_name = Path(file.filename).name
+        if not ingestion_service._is_supported_file(file_name):
+            raise HTTPException(status_code=400, detail=f"Unsupported file type: {Path(file_name).suffix}")
+        # The request size was checked before the form was read; this catches a file part whose
+        # size is known but that fits in the overhead allowance
+        if file.size is not None and file.size > settings.UPLOAD_MAX_MB * 1024 * 1024:
+            raise HTTPException(status_code=413, detail=f"File exceeds the {settings.UPLOAD_MAX_MB} MB upload limit.")
         # Create upload directory
-        upload_dir = Path("data/raw_docs")
+        upload_dir = Path(settings.UPLOAD_DIR)
         upload_dir.mkdir(parents=True, exist_ok=True)
-        file_location = upload_dir / file.filename
+        # Each upload gets its own file, so a second upload with the same name cannot replace
+        # the bytes a queued job is about to ingest (and record under the first upload's hash)
+        file_location = upload_dir / f"{uuid.uuid4().hex}_{file_name}"
         try:
-            # Save uploaded file
-            async with aiofiles.open(file_location, "wb") as file_object:
-                content = await file.read()
-                await file_object.write(content)
-            # Ingest the document
-            result = await ingestion_service.ingest_document(str(file_location), file.filename)
-            if result["status"] == "error":
-                raise HTTPException(status_code=500, detail=result["message"])
-            elif result["status"] == "warning":
-                return {
-                    "message": result["message"],
-                    "warning": True,
-                    "file_name": result["file_name"]
-                }
-            else:
-                return {
-                    "message": result["message"],
-                    "file_name": result["file_name"],
-                    "chunks_created": result.get("chunks_created", 0),
-                    "document_type": result.get("document_type", "unknown"),
-                    "embedding_provider": result.get("embedding_provider", "unknown")
-                }
-        except HTTPException:
-            raise
+            # Stream the upload to disk, hashing it for deduplication
+            size, content_hash = await _save_upload(file, file_location)
+            # Queue the document for ingestion
+            job = job_queue.enqueue("file", {
+                "file_path": str(file_location),
+                "file_name": file_name,
+                "content_hash": content_hash
+            })
+            return {
+                "message": f"Queued {file_name} for ingestion",
+                "file_name": file_name,
+                "size_bytes": size,
+                "content_hash": content_hash,
+                **_job_response(job)
+            }
+        except UploadTooLarge:
+            raise HTTPException(status_code=413, detail=f"File exceeds the {settings.UPLOAD_MAX_MB} MB upload limit.")
         except Exception as e:
             if file_location.exists():
                 try:
@@ -58,34 +158,55 @@ async def upload_document(
                     pass
             raise HTTPException(status_code=500, detail=f"Failed to process file: {str(e)}")
     elif link is not None:
-        # Here you would implement logic to download and ingest the document from the link
-        # For now, just return a placeholder response
-        # Example: download the file, save to data/raw_docs, then call ingest_document
-        # You may want to validate the link, check file type, etc.
-        return {"message": f"Link ingestion is not yet implemented. Received link: {link}", "link": link}
+        # Downloaded, converted and ingested in the background
+        job = _queue_links([link])[0]
+        return {"message": f"Queued {job['link']} for ingestion", **job}
     else:
         raise HTTPException(status_code=400, detail="Either a file or a link must be provided.")
 
-@router.post("/upload-directory")
-async def ingest_directory(directory_path: str) -> Dict[str, Any]:
+@router.post("/upload-links", status_code=202)
+async def upload_links(request: LinkBatchRequest) -> Dict[str, Any]:
+    """
+    Queue a batch of links for ingestion, one job per link.
+    Downloads share a pooled HTTP client and at most LINK_MAX_CONCURRENCY run at once.
+    """
+    jobs = _queue_links(request.links)
+    return {"message": f"Queued {len(jobs)} links for ingestion", "jobs": jobs}
+
+@router.post("/upload-directory", status_code=202)
+async def ingest_directory(directory_path: str, workers: Optional[int] = None) -> Dict[str, Any]:
     """
-    Ingest all supported documents from a specified directory.
+    Queue ingestion of all supported documents from a specified directory.
+    Text extraction runs in a pool of `workers` processes (defaults to INGEST_WORKERS).
     """
     if not directory_path:
         raise HTTPException(status_code=400, detail="Directory path is required.")
-    
+    if not os.path.isdir(directory_path):
+        raise HTTPException(status_code=400, detail=f"Directory {directory_path} does not exist.")
+
     try:
-        result = await ingestion_service.ingest_directory(directory_path)
-        
-        if result.get("status") == "error":
-            raise HTTPException(status_code=500, detail=result["message"])
-        
-        return result
-        
-    except HTTPException:
-        raise
+        job = job_queue.enqueue("directory", {"directory_path": directory_path, "workers": workers})
+        return {"message": f"Queued {directory_path} for ingestion", **_job_response(job)}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to process directory: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue directory: {str(e)}")
+
+@router.get("/jobs")
+async def list_jobs(status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    List the most recent ingestion jobs, optionally filtered by status
+    (queued, running, succeeded, failed).
+    """
+    return job_queue.list(status=status, limit=limit)
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """
+    Status, progress (chunks embedded / total) and result of an ingestion job.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return job
 
 @router.get("/supported-types")
 async def get_supported_types() -> Dict[str, Any]:
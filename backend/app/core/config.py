@@ -1,4 +1,5 @@
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -9,4 +10,123 @@ class Settings(BaseSettings):
     OLLAMA_HOST: str = "ollama-llm"
     OLLAMA_PORT: int = 11434
 
-settings = Settings()
\ No newline at end of file
+    # Pooled HTTP clients
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_TIMEOUT: float = 120.0
+
+    # Metrics (GET /metrics) and sampled debug logging of request payloads
+    METRICS_ENABLED: bool = True
+    DEBUG_LOG_SAMPLE_RATE: float = 0.01
+
+    # Chat answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+    ANSWER_CACHE_TTL_SECONDS: float = 3600.0
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.97
+
+    # Identical chat requests (same normalized query, provider and file) that arrive while one is
+    # being answered wait for that answer instead of running the pipeline again
+    CHAT_COALESCE_ENABLED: bool = True
+
+    # POST /api/chat/batch: queries per request and LLM generations running at once per request
+    CHAT_BATCH_MAX_QUERIES: int = 1000
+    CHAT_BATCH_CONCURRENCY: int = 8
+
+    # Retrieval: "vector" (Chroma only) or "hybrid" (BM25 and vector search fused with reciprocal rank fusion)
+    RETRIEVAL_MODE: str = "vector"
+    RETRIEVAL_TOP_K: int = 3
+    HYBRID_CANDIDATES: int = 20
+    RRF_K: int = 60
+
+    # Cross-encoder reranking: RERANK_CANDIDATES retrieved chunks are rescored on CPU and the
+    # best RETRIEVAL_TOP_K kept. Past RERANK_BUDGET_MS the retrieval order is used instead.
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20
+    RERANK_BUDGET_MS: float = 200.0
+    RERANK_MAX_LENGTH: int = 512
+    RERANK_WORKERS: int = 1
+
+    # Prompt context: merged, de-overlapped chunks packed up to a token budget per LLM model
+    # (keys are model names with or without their tag), CONTEXT_MAX_TOKENS for other models
+    CONTEXT_MAX_TOKENS: int = 1500
+    CONTEXT_MODEL_MAX_TOKENS: Dict[str, int] = {"gpt-3.5-turbo": 3000}
+
+    # BM25 index, kept in sync by ingestion so hybrid retrieval can be switched on at any time
+    BM25_ENABLED: bool = True
+    BM25_INDEX_PATH: str = "data/bm25_index.npz"
+    BM25_SAVE_INTERVAL: float = 30.0
+    BM25_RELOAD_CHECK_SECONDS: float = 10.0
+
+    # In-process, memory-mapped read replica of the Chroma collection, queried instead of Chroma
+    # once it holds the whole collection. float16 halves its size at a small cost in precision.
+    VECTOR_MIRROR_ENABLED: bool = False
+    VECTOR_MIRROR_DIR: str = "data/vector_mirror"
+    VECTOR_MIRROR_DTYPE: str = "float32"
+    VECTOR_MIRROR_IVF_MIN_ROWS: int = 200000
+    VECTOR_MIRROR_IVF_PROBES: int = 16
+    VECTOR_MIRROR_RELOAD_CHECK_SECONDS: float = 2.0
+
+    # Uploads
+    UPLOAD_DIR: str = "data/raw_docs"
+    UPLOAD_MAX_MB: int = 200
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+
+    # Link downloads
+    LINK_DOWNLOAD_DIR: str = "data/raw_docs/links"
+    LINK_STATE_PATH: str = "data/link_state.json"
+    LINK_MAX_MB: int = 50
+    LINK_TIMEOUT: float = 30.0
+    LINK_MAX_CONCURRENCY: int = 8
+    # Lets links reach private, loopback and link-local addresses (e.g. an intranet document host)
+    LINK_ALLOW_PRIVATE_HOSTS: bool = False
+    LINK_MAX_PER_REQUEST: int = 100
+
+    # Chunking: "recursive" (langchain, sized in characters) or "token" (TokenChunker, sized in tokens)
+    CHUNKER: str = "recursive"
+    CHUNK_TOKENS: int = 256
+    CHUNK_OVERLAP_TOKENS: int = 0
+
+    # Ingestion
+    INGEST_WORKERS: int = max(1, (os.cpu_count() or 2) - 1)
+    INGEST_MANIFEST_PATH: str = "data/ingest_manifest.json"
+    INGEST_MANIFEST_SAVE_INTERVAL: float = 5.0
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_QUEUE_SIZE: int = 4
+    INGEST_STREAM_THRESHOLD_MB: int = 20
+    INGEST_STREAM_BLOCK_CHARS: int = 65536
+    INGEST_JOB_WORKERS: int = 2
+    INGEST_JOBS_DB_PATH: str = "data/ingest_jobs.sqlite3"
+
+    # Embedding provider: "openai", "ollama" (the Ollama server's /embed endpoint) or "local"
+    # (sentence-transformers on CPU). Every embedding model gets its own Chroma collection, so
+    # switching models means re-ingesting.
+    EMBEDDING_PROVIDER: str = "openai"
+    OLLAMA_EMBEDDING_MODEL: str = "nomic-embed-text"
+    OLLAMA_EMBED_BATCH_SIZE: int = 64
+    OLLAMA_EMBED_MAX_CONCURRENCY: int = 4
+    LOCAL_EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # "torch" or "onnx"; LOCAL_EMBEDDING_ONNX_FILE picks an (e.g. int8 quantized) ONNX export,
+    # LOCAL_EMBEDDING_INT8 quantizes a torch model's Linear layers at load time
+    LOCAL_EMBEDDING_BACKEND: str = "torch"
+    LOCAL_EMBEDDING_ONNX_FILE: str = ""
+    LOCAL_EMBEDDING_INT8: bool = False
+    LOCAL_EMBEDDING_BATCH_SIZE: int = 32
+    LOCAL_EMBEDDING_WORKERS: int = 1
+
+    # Embedding requests
+    EMBED_BATCH_MAX_TOKENS: int = 32000
+    EMBED_BATCH_MAX_INPUTS: int = 256
+    EMBED_MAX_CONCURRENCY: int = 4
+    EMBED_MAX_RETRIES: int = 5
+    EMBED_RETRY_BASE_DELAY: float = 0.5
+    # Concurrent query embeddings are sent as one request after at most EMBED_MICROBATCH_WINDOW_MS
+    EMBED_MICROBATCH_ENABLED: bool = True
+    EMBED_MICROBATCH_WINDOW_MS: float = 2.0
+    EMBED_MICROBATCH_MAX_SIZE: int = 64
+    EMBED_CACHE_ENABLED: bool = True
+    EMBED_CACHE_PATH: str = "data/embedding_cache.sqlite3"
+    EMBED_CACHE_MAX_ENTRIES: int = 200000
+
+settings = Settings()
@@ -0,0 +1,37 @@
+import random
+import logging
+from .config import settings
+
+
+class SampledLogger:
+    """
+    Debug logger for per-request payloads (queries, retrieved chunks, prompts).
+
+    Nothing is formatted unless the logger is enabled for DEBUG, and even then only a
+    DEBUG_LOG_SAMPLE_RATE fraction of calls is logged, so payload logging can stay on in
+    production without writing every request to the log.
+    """
+    def __init__(self, name: str, sample_rate: float | None = None) -> None:
+        """
+        Args:
+            name (str): Logger name, usually __name__.
+            sample_rate (float | None): Fraction of calls to log. Defaults to settings.DEBUG_LOG_SAMPLE_RATE.
+        """
+        self.logger = logging.getLogger(name)
+        self._sample_rate = sample_rate
+
+    @property
+    def sample_rate(self) -> float:
+        return settings.DEBUG_LOG_SAMPLE_RATE if self._sample_rate is None else self._sample_rate
+
+    def sampled(self) -> bool:
+        """Whether this call should be logged. Use it to skip building expensive messages."""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return False
+        rate = self.sample_rate
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+    def debug(self, msg: str, *args) -> None:
+        """Log with %-style args, which are only formatted if the call is sampled."""
+        if self.sampled():
+            self.logger.debug(msg, *args)
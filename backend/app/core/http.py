@@ -0,0 +1,16 @@
+import httpx
+from .config import settings
+
+
+def pooled_http_client() -> httpx.AsyncClient:
+    """
+    AsyncClient with the HTTP_MAX_* connection limits and HTTP_TIMEOUT. Its connection pool
+    belongs to the event loop that first uses it, so never share one between event loops.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        ),
+        timeout=settings.HTTP_TIMEOUT
+    )
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import AsyncIterator
 
 class AbstractLLMClient(ABC):
     """
@@ -16,6 +17,23 @@ class AbstractLLMClient(ABC):
         """
         pass
 
+class AbstractStreamingLLMClient(AbstractLLMClient):
+    """
+    LLM client that can also stream its response token by token.
+    """
+    @abstractmethod
+    def stream_response(self, prompt: str, context: str | None = None) -> AsyncIterator[str]:
+        """
+        Stream a response from the LLM given a prompt and optional context.
+        Implemented as an async generator.
+        Args:
+            prompt (str): The user query or prompt.
+            context (str | None): Optional context to augment the prompt.
+        Returns:
+            AsyncIterator[str]: Text fragments of the response, in order, as they are generated.
+        """
+        pass
+
 class AbstractEmbeddingClient(ABC):
     """
     Abstract base class for embedding clients.
@@ -30,3 +48,44 @@ class AbstractEmbeddingClient(ABC):
             list[float]: The embedding vector.
         """
         pass
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Create embeddings for several texts.
+        Adapters with a batch endpoint should override this to send a single request.
+        Args:
+            texts (list[str]): The input texts to embed.
+        Returns:
+            list[list[float]]: One embedding vector per input text, in order.
+        """
+        return [await self.create_embedding(text) for text in texts]
+
+class ChunkListener(ABC):
+    """
+    Receives the chunks IngestionService stores in and removes from the vector database,
+    so secondary indexes (e.g. the BM25 index) stay in sync without re-reading ChromaDB.
+    """
+    @abstractmethod
+    def add_chunks(self, ids: list[str], documents: list[str], metadatas: list[dict], embeddings: list[list[float]]) -> None:
+        """
+        Called after a batch of chunks was added to ChromaDB and verified.
+        Args:
+            ids (list[str]): Chunk ids.
+            documents (list[str]): Chunk texts.
+            metadatas (list[dict]): Chunk metadata (including "source").
+            embeddings (list[list[float]]): Chunk embeddings.
+        """
+        pass
+
+    @abstractmethod
+    def remove_chunks(self, ids: list[str]) -> None:
+        """
+        Called after chunks were deleted from ChromaDB.
+        Args:
+            ids (list[str]): Chunk ids.
+        """
+        pass
+
+    def commit(self) -> None:
+        """Called once a document is fully ingested; listeners may persist their state here."""
+        pass
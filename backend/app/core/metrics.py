@@ -0,0 +1,229 @@
+"""
+In-process metrics exposed in the Prometheus text format on GET /metrics.
+
+Counters and histograms are plain thread-safe objects kept in a module-level registry, so
+recording a value costs a lock and a few additions. Values that already live elsewhere (for
+example cache hit counters) are exported through collectors, which are called at scrape time.
+"""
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+# A collector returns (name, type, help, [(labels, value), ...]) tuples
+Collector = Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, one series per label combination."""
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets, with their sum and count."""
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [count per bucket (last one is +Inf), sum]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def sum(self, **labels: str) -> float:
+        series = self._series.get(self._key(labels))
+        return series[1][0] if series else 0.0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        lines = []
+        for key, counts, total in series:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics and scrape-time collectors, rendered together by render()."""
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered with a different type or labels")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, metric_type, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+# Chat pipeline
+RAG_STAGE_SECONDS = metrics.histogram(
+    "rag_stage_seconds", "Time spent per chat pipeline stage (embed, cache, retrieve, rerank, context, generate; "
+    "batch_embed and batch_retrieve time a whole /api/chat/batch request).",
+    ("provider", "stage")
+)
+RAG_RETRIEVED_CHUNKS = metrics.histogram(
+    "rag_retrieved_chunks", "Chunks retrieved from the vector store per query.",
+    ("provider",), buckets=(0, 1, 2, 3, 5, 10, 20, 50)
+)
+RAG_RERANK_FALLBACKS = metrics.counter(
+    "rag_rerank_fallbacks_total", "Queries that kept the retrieval order because reranking ran out of time or failed.",
+    ("provider",)
+)
+RAG_COALESCED_REQUESTS = metrics.counter(
+    "rag_coalesced_requests_total", "Chat requests answered by an identical request already in flight.", ("provider",)
+)
+RAG_PROMPT_TOKENS = metrics.counter("rag_prompt_tokens_total", "Estimated tokens sent to the LLM.", ("provider",))
+RAG_COMPLETION_TOKENS = metrics.counter("rag_completion_tokens_total", "Estimated tokens generated by the LLM.", ("provider",))
+
+# Embedding requests
+EMBED_REQUESTS = metrics.counter("embedding_requests_total", "Embedding batches sent to the provider.")
+EMBED_INPUTS = metrics.counter("embedding_inputs_total", "Texts sent to the embedding provider.")
+EMBED_TOKENS = metrics.counter("embedding_tokens_total", "Estimated tokens sent to the embedding provider.")
+EMBED_MICROBATCH_SIZE = metrics.histogram(
+    "embedding_microbatch_size", "Query embeddings sent together by the micro-batcher.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+EMBED_MICROBATCH_WAIT_SECONDS = metrics.histogram(
+    "embedding_microbatch_wait_seconds", "Time a query embedding waited in the micro-batcher before its batch was sent.",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+EMBED_RETRIES = metrics.counter("embedding_retries_total", "Embedding batches retried after rate limits or server errors.")
+
+# Ingestion
+INGEST_STAGE_SECONDS = metrics.histogram(
+    "ingest_stage_seconds", "Time spent per ingested document and stage (extract, split, embed, upsert, verify).",
+    ("stage",)
+)
+INGEST_DOCUMENTS = metrics.counter("ingest_documents_total", "Documents ingested, by outcome.", ("status",))
+INGEST_CHUNKS = metrics.counter(
+    "ingest_chunks_total", "Chunks synced to the vector store (added, unchanged or deleted).", ("result",)
+)
+INGEST_JOBS = metrics.counter("ingest_jobs_total", "Finished ingestion jobs, by kind and status.", ("kind", "status"))
+
+
+def cache_collector(prefix: str, description: str, get_stats: Callable[[], dict | None]) -> Collector:
+    """Export a cache's stats() (hits, misses, entries) as <prefix>_hits_total, _misses_total and _entries."""
+    def collect():
+        stats = get_stats()
+        if not stats:
+            return []
+        return [
+            (f"{prefix}_hits_total", "counter", f"{description} hits.", [({}, stats["hits"])]),
+            (f"{prefix}_misses_total", "counter", f"{description} misses.", [({}, stats["misses"])]),
+            (f"{prefix}_entries", "gauge", f"Entries in the {description.lower()}.", [({}, stats["entries"])])
+        ]
+    return collect
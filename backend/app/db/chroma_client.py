@@ -1,28 +1,55 @@
+import re
 import chromadb
-import traceback
+import logging
 from typing import List, Optional, Any, Dict
 from ..core.config import settings
+from ..core.debug_log import SampledLogger
+
+logger = logging.getLogger(__name__)
+debug_log = SampledLogger(__name__)
+
+# Collection of the OpenAI embeddings, named before collections were kept per embedding model
+DEFAULT_COLLECTION = "rag_documents"
+DEFAULT_EMBEDDING_MODEL = "text-embedding-ada-002"
+
+
+def collection_name_for(embedding_model: Optional[str]) -> str:
+    """
+    Collection holding the vectors of one embedding model, so vectors from different models
+    (different spaces, often different dimensions) are never stored or searched together.
+    """
+    if not embedding_model or embedding_model == DEFAULT_EMBEDDING_MODEL:
+        return DEFAULT_COLLECTION
+    # Chroma names allow [a-zA-Z0-9._-] and must start and end with a letter or digit
+    suffix = re.sub(r"[^A-Za-z0-9._-]+", "-", embedding_model).strip("-._")
+    return f"{DEFAULT_COLLECTION}__{suffix}"[:512]
+
 
 class ChromaDBClient:
     """
     Client for interacting with ChromaDB vector database.
     Handles connection, collection management, and document operations.
     """
-    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, embedding_function=None) -> None:
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, embedding_function=None,
+                 client: Any = None, collection_name: str = DEFAULT_COLLECTION) -> None:
         """
         Args:
             host (Optional[str]): Hostname for ChromaDB. Defaults to settings.CHROMA_HOST.
             port (Optional[int]): Port for ChromaDB. Defaults to settings.CHROMA_PORT.
             embedding_function: Embedding function object for generating embeddings.
+            client: Preconfigured chromadb client (e.g. a local PersistentClient for benchmarks).
+                Defaults to an HttpClient for host and port.
+            collection_name (str): Collection to use; see collection_name_for().
         """
         self._host = host or settings.CHROMA_HOST
         self._port = port or settings.CHROMA_PORT
-        self._client = None
+        self._client = client
         self._collection = None
+        self.collection_name = collection_name
         if isinstance(embedding_function, str):
             raise ValueError("embedding_function must be an instance of EmbeddingFunction, not a string")
         self._embedding_function = embedding_function
-        print(f"[DEBUG] ChromaDBClient initialized with embedding_function type: {type(self._embedding_function)}")
+        logger.debug(f"ChromaDBClient initialized with embedding_function type: {type(self._embedding_function)}")
 
     @property
     def client(self) -> Any:
@@ -36,77 +63,129 @@ class ChromaDBClient:
         """Lazily initializes and returns the ChromaDB collection for RAG documents."""
         if self._collection is None:
             if self._embedding_function is not None and hasattr(self._embedding_function, "name"):
-                print(f"[DEBUG] Embedding function name: {self._embedding_function.name()}")
+                logger.debug(f"Embedding function name: {self._embedding_function.name()}")
             else:
-                print(f"[DEBUG] Embedding function is None or has no 'name' attribute.")
+                logger.debug("Embedding function is None or has no 'name' attribute.")
             self._collection = self.client.get_or_create_collection(
-                name="rag_documents",
+                name=self.collection_name,
                 embedding_function=self._embedding_function
             )
         return self._collection
 
-    def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str]) -> bool:
+    def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str],
+                      embeddings: Optional[List[List[float]]] = None) -> bool:
         """
         Add documents to the ChromaDB collection and verify insertion.
+        Precomputed embeddings are stored as-is; without them the collection's
+        embedding function embeds the documents.
         Returns True if documents are added and verified, False otherwise.
         """
-        print(f"[DEBUG] ChromaDBClient.add_documents called with {len(documents)} documents.")
-        print(f"[DEBUG] First document: {documents[0][:200] if documents else 'N/A'}")
-        print(f"[DEBUG] First metadata: {metadatas[0] if metadatas else 'N/A'}")
-        print(f"[DEBUG] First id: {ids[0] if ids else 'N/A'}")
+        debug_log.debug("add_documents: %d documents, first id %s, metadata %s, document %.200r",
+                        len(documents), ids[0] if ids else "N/A", metadatas[0] if metadatas else "N/A",
+                        documents[0] if documents else "N/A")
         # Validate input
         if not documents or not ids or len(documents) != len(ids):
-            print("[ERROR] Documents or IDs are missing or length mismatch.")
+            logger.error("Documents or IDs are missing or length mismatch.")
             return False
         # Check for duplicate IDs before adding
         try:
             existing = self.collection.get(ids=ids)
             existing_ids = set(existing.get("ids", []))
             if existing_ids:
-                print(f"[WARNING] Some IDs already exist in ChromaDB: {existing_ids}")
+                logger.warning(f"{len(existing_ids)} IDs already exist in ChromaDB")
                 # Optionally, skip or update existing documents here
         except Exception as e:
-            print(f"[WARNING] Could not check for existing IDs: {e}")
+            logger.warning(f"Could not check for existing IDs: {e}")
         # Add documents
         try:
-            self.collection.add(documents=documents, metadatas=metadatas, ids=ids)
+            self.collection.add(documents=documents, metadatas=metadatas, ids=ids, embeddings=embeddings)
         except Exception as e:
-            print(f"[ERROR] Exception in add_documents: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"Exception in add_documents: {e}", exc_info=True)
             return False
         # Post-insert verification: check if the IDs exist in the collection
         try:
             result = self.collection.get(ids=ids)
             found_ids = set(result.get("ids", []))
             if not all(doc_id in found_ids for doc_id in ids):
-                print(f"[ERROR] Not all documents were inserted into ChromaDB. Missing: {set(ids) - found_ids}")
+                logger.error(f"Not all documents were inserted into ChromaDB. Missing: {set(ids) - found_ids}")
                 return False
         except Exception as e:
-            print(f"[ERROR] Exception during post-insert verification: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"Exception during post-insert verification: {e}", exc_info=True)
+            return False
+        logger.debug(f"Successfully added and verified {len(ids)} documents in ChromaDB.")
+        return True
+
+    def delete_documents(self, ids: List[str]) -> bool:
+        """
+        Delete documents from the ChromaDB collection by id.
+        Returns True on success (or when there is nothing to delete), False otherwise.
+        """
+        if not ids:
+            return True
+        logger.debug(f"delete_documents called with {len(ids)} ids.")
+        try:
+            self.collection.delete(ids=ids)
+        except Exception as e:
+            logger.error(f"Exception in delete_documents: {e}", exc_info=True)
             return False
-        print(f"[DEBUG] Successfully added and verified {len(ids)} documents in ChromaDB.")
         return True
 
-    def query_documents(self, query_texts: List[str], n_results: int = 5, **kwargs) -> Any:
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]) -> bool:
+        """
+        Update the metadata of existing documents without re-embedding them.
+        Returns True on success (or when there is nothing to update), False otherwise.
+        """
+        if not ids:
+            return True
+        logger.debug(f"update_metadatas called with {len(ids)} ids.")
+        try:
+            self.collection.update(ids=ids, metadatas=metadatas)
+        except Exception as e:
+            logger.error(f"Exception in update_metadatas: {e}", exc_info=True)
+            return False
+        return True
+
+    def get_documents(self, ids: List[str]) -> Dict[str, Any]:
+        """
+        Fetch documents and metadata by id (e.g. chunks found by the BM25 index).
+        Returns a Chroma get result with flat "ids", "documents" and "metadatas" lists; empty on failure.
+        """
+        if not ids:
+            return {"ids": [], "documents": [], "metadatas": []}
+        try:
+            return self.collection.get(ids=ids, include=["documents", "metadatas"])
+        except Exception as e:
+            logger.error(f"Exception in get_documents: {e}", exc_info=True)
+            return {"ids": [], "documents": [], "metadatas": []}
+
+    def query_documents(self, query_texts: Optional[List[str]] = None, n_results: int = 5,
+                        query_embeddings: Optional[List[List[float]]] = None,
+                        where: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
         """
         Query the ChromaDB collection for relevant documents.
+        Pass query_embeddings when the query vectors are already computed; the collection's
+        embedding function is then not invoked.
         Args:
-            query_texts (List[str]): List of query strings.
+            query_texts (Optional[List[str]]): List of query strings.
             n_results (int): Number of results to return.
+            query_embeddings (Optional[List[List[float]]]): Precomputed query vectors.
+            where (Optional[Dict[str, Any]]): Metadata filter, e.g. {"source": file_name}.
         Returns:
             Any: Query result from ChromaDB.
         """
-        print(f"[DEBUG] ChromaDBClient.query_documents called with query_texts: {query_texts}, n_results: {n_results}, kwargs: {kwargs}")
+        if where:
+            kwargs["where"] = where
         try:
-            result = self.collection.query(query_texts=query_texts, n_results=n_results, **kwargs)
-            print(f"[DEBUG] ChromaDBClient.query_documents result: {result}")
+            if query_embeddings is not None:
+                result = self.collection.query(query_embeddings=query_embeddings, n_results=n_results, **kwargs)
+            else:
+                result = self.collection.query(query_texts=query_texts, n_results=n_results, **kwargs)
+            if debug_log.sampled():
+                debug_log.logger.debug("query_documents: %d queries, n_results %d, where %s -> ids %s",
+                                       len(query_embeddings or query_texts or []), n_results, where, result.get("ids"))
             return result
         except Exception as e:
-            print(f"[ERROR] Exception in query_documents: {e}")
-            traceback.print_exc()
+            logger.error(f"Exception in query_documents: {e}", exc_info=True)
             return None
 
 __all__ = ["ChromaDBClient"]
\ No newline at end of file
@@ -1,13 +1,21 @@
-from fastapi import FastAPI, BackgroundTasks, Request
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
+import logging
 from contextlib import asynccontextmanager
 from .core.config import settings
-from starlette.middleware.cors import ALL_METHODS
+from .core.metrics import metrics
 
 if "PYTEST_CURRENT_TEST" not in os.environ:
     from .api import chat, ingest
     from .services.file_cleanup import delete_old_files_task
+    from .services.client_registry import get_client_registry
+    from .services.bm25_index import get_bm25_index
+    from .services.vector_mirror import get_vector_mirror
+    from .services.reranker import get_reranker
+
+logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app):
@@ -19,7 +27,58 @@ async def lifespan(app):
                 delete_old_files_task("/app/data/raw_docs", max_age_hours=24)
                 time.sleep(3600)  
         Thread(target=run_cleanup, daemon=True).start()
+        # Pooled LLM, embedding and vector DB clients shared by all requests
+        # (a registry set up before startup, e.g. by the load test, is kept)
+        app.state.clients = getattr(app.state, "clients", None) or get_client_registry()
+        # Background ingestion workers; resumes jobs queued before a restart
+        await ingest.job_queue.start()
+        # Rebuild the BM25 index from ChromaDB unless it holds as many chunks: it is missing for
+        # chunks ingested before it existed, and behind after a crash between two saves
+        bm25_index = get_bm25_index()
+        if bm25_index is not None:
+            def sync_bm25_index():
+                try:
+                    collection = ingest.ingestion_service.vector_db_client.collection
+                    if os.path.exists(settings.BM25_INDEX_PATH) and len(bm25_index) == collection.count():
+                        return
+                    count = bm25_index.rebuild(collection)
+                    logger.info(f"Built BM25 index from {count} stored chunks")
+                except Exception as e:
+                    logger.error(f"Could not build BM25 index from ChromaDB: {e}")
+            Thread(target=sync_bm25_index, daemon=True).start()
+        # Copy the collection into the vector mirror unless it already matches ChromaDB
+        vector_mirror = get_vector_mirror()
+        if vector_mirror is not None:
+            def sync_vector_mirror():
+                try:
+                    collection = ingest.ingestion_service.vector_db_client.collection
+                    if vector_mirror.ready and vector_mirror.live_rows == collection.count():
+                        return
+                    count = vector_mirror.rebuild(collection)
+                    logger.info(f"Copied {count} chunks into the vector mirror")
+                except Exception as e:
+                    logger.error(f"Could not sync the vector mirror with ChromaDB: {e}")
+            Thread(target=sync_vector_mirror, daemon=True).start()
+        # Load the cross-encoder now rather than on the first chat request
+        reranker = get_reranker()
+        if reranker is not None:
+            Thread(target=reranker.load, daemon=True).start()
+        # Load a local embedding model before the first request needs it
+        warm_up = getattr(ingest.ingestion_service.embedding_client, "warm_up", None)
+        if warm_up is not None:
+            def load_embedding_model():
+                try:
+                    warm_up()
+                except Exception as e:
+                    logger.error(f"Could not load the local embedding model: {e}")
+            Thread(target=load_embedding_model, daemon=True).start()
     yield
+    if "PYTEST_CURRENT_TEST" not in os.environ:
+        await ingest.job_queue.stop()
+        ingest.ingestion_service.manifest.flush()
+        if bm25_index is not None:
+            bm25_index.flush(force=True)
+        await app.state.clients.aclose()
 
 app = FastAPI(
     title="RAG Chatbot API",
@@ -59,3 +118,10 @@ if "PYTEST_CURRENT_TEST" not in os.environ:
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the RAG Chatbot API!"}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def read_metrics() -> PlainTextResponse:
+        """Chat, embedding, cache and ingestion metrics in the Prometheus text format."""
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
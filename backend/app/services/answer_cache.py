@@ -0,0 +1,167 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from ..core.config import settings
+from ..core.metrics import metrics, cache_collector
+
+
+@dataclass
+class _Entry:
+    bucket: Tuple[str, str]
+    vector: np.ndarray
+    answer: str
+    sources: frozenset
+    created: float
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of chat answers in front of RAGService.
+
+    Entries are bucketed by (provider, file_name filter). A lookup returns the answer of the
+    most similar cached query in the same bucket when its cosine similarity to the new query
+    embedding reaches the threshold. Entries expire after ttl_seconds, the least recently used
+    ones are evicted beyond max_entries, and invalidate_document() drops every answer that a
+    newly ingested or re-ingested document could change.
+    """
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float) -> None:
+        """
+        Args:
+            max_entries (int): Maximum number of cached answers.
+            ttl_seconds (float): Lifetime of an answer.
+            similarity_threshold (float): Minimum cosine similarity for a hit (0..1).
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, str], List[int]] = {}
+        # Stacked vectors per bucket, rebuilt lazily after the bucket changes
+        self._matrices: Dict[Tuple[str, str], np.ndarray] = {}
+        self._next_id = 0
+
+    @staticmethod
+    def _bucket(provider: str, file_name: Optional[str]) -> Tuple[str, str]:
+        return (provider or "", file_name or "")
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        self._buckets[entry.bucket].remove(entry_id)
+        if not self._buckets[entry.bucket]:
+            del self._buckets[entry.bucket]
+        self._matrices.pop(entry.bucket, None)
+
+    def _expire(self, now: float) -> None:
+        # Entries are ordered by last use, not creation, so scan them all; the cache is small
+        expired = [entry_id for entry_id, entry in self._entries.items() if now - entry.created > self.ttl_seconds]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    def lookup(self, provider: str, file_name: Optional[str], embedding: List[float]) -> Optional[str]:
+        """Return a cached answer for a sufficiently similar query, or None."""
+        bucket = self._bucket(provider, file_name)
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._expire(time.time())
+            ids = self._buckets.get(bucket)
+            if ids:
+                matrix = self._matrices.get(bucket)
+                if matrix is None:
+                    matrix = self._matrices[bucket] = np.stack([self._entries[i].vector for i in ids])
+                if matrix.shape[1] == vector.shape[0]:
+                    scores = matrix @ vector
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity_threshold:
+                        entry_id = ids[best]
+                        self._entries.move_to_end(entry_id)
+                        self.hits += 1
+                        return self._entries[entry_id].answer
+            self.misses += 1
+            return None
+
+    def store(self, provider: str, file_name: Optional[str], embedding: List[float], answer: str, sources: Iterable[str]) -> None:
+        """Cache an answer together with the documents its context came from."""
+        bucket = self._bucket(provider, file_name)
+        entry = _Entry(bucket, self._normalize(embedding), answer, frozenset(sources), time.time())
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            self._buckets.setdefault(bucket, []).append(entry_id)
+            self._matrices.pop(bucket, None)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_sources(self, sources: Iterable[str]) -> int:
+        """Drop every answer that drew context from one of the given documents. Returns the count."""
+        sources = set(sources)
+        with self._lock:
+            stale = [entry_id for entry_id, entry in self._entries.items() if entry.sources & sources]
+            for entry_id in stale:
+                self._remove(entry_id)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def invalidate_document(self, file_name: str) -> int:
+        """
+        Drop the answers an ingested document could change: those with context from it, those
+        filtered to it, and unfiltered ones (the document may now hold the best context).
+        Returns the count.
+        """
+        with self._lock:
+            stale = [entry_id for entry_id, entry in self._entries.items()
+                     if file_name in entry.sources or entry.bucket[1] in ("", file_name)]
+            for entry_id in stale:
+                self._remove(entry_id)
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._matrices.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries
+        }
+
+
+_cache: Optional[SemanticAnswerCache] = None
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Process-wide answer cache, or None when ANSWER_CACHE_ENABLED is off."""
+    global _cache
+    if not settings.ANSWER_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = SemanticAnswerCache(
+            settings.ANSWER_CACHE_MAX_ENTRIES,
+            settings.ANSWER_CACHE_TTL_SECONDS,
+            settings.ANSWER_CACHE_SIMILARITY_THRESHOLD
+        )
+    return _cache
+
+
+metrics.add_collector(cache_collector("answer_cache", "Semantic answer cache", lambda: _cache.stats() if _cache is not None else None))
@@ -0,0 +1,357 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from ..core.config import settings
+from ..core.interfaces import ChunkListener
+from ..core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Words, plus compounds such as part numbers, error codes and versions ("AB-1042", "E_42", "v2.1")
+_TOKEN = re.compile(r"[^\W_]+(?:[-_./][^\W_]+)*")
+_SEPARATORS = re.compile(r"[-_./]")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how i in is it its of on or that the this "
+    "to was were what when where which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms without stopwords. Compounds are kept whole, so an exact part number
+    matches strongly, and are also indexed by their parts.
+    """
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(part for part in _SEPARATORS.split(token) if part and part not in STOPWORDS)
+    return tokens
+
+# Fields that hold the index contents (see BM25Index._clear)
+_INDEX_FIELDS = ("_terms", "_postings_docs", "_postings_tfs", "_doc_ids", "_doc_index", "_doc_lengths",
+                 "_doc_sources", "_sources", "_source_index", "_total_length", "_removed")
+
+
+class BM25Index(ChunkListener):
+    """
+    In-memory inverted index over chunk texts, scored with Okapi BM25.
+
+    Every term has a postings list of document numbers (uint32) and term frequencies
+    (uint16) in compact arrays, so the index costs about six bytes per distinct term in a
+    chunk plus the chunk ids. Chunks are added and removed incrementally as IngestionService
+    syncs ChromaDB; removed chunks are masked out and dropped from the postings when the index
+    is saved. The index is saved as a single .npz file with the postings concatenated.
+    """
+    def __init__(self, path: str | None = None, k1: float = 1.2, b: float = 0.75) -> None:
+        """
+        Args:
+            path (str | None): File the index is loaded from and saved to. None keeps it in memory only.
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 document length normalization.
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._clear()
+        # Changes made while rebuild() pages through ChromaDB, replayed before its swap
+        self._journal: List[Tuple[List[str], Optional[List[str]], Optional[List[Dict[str, Any]]]]] | None = None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._loaded_mtime = 0.0
+        self._checked_at = time.monotonic()
+        if path and os.path.exists(path):
+            try:
+                self.load(path)
+            except Exception as e:
+                logger.error(f"Could not load BM25 index from {path}: {e}. Starting empty.")
+                self._clear()
+
+    def _clear(self) -> None:
+        # Keep _INDEX_FIELDS in sync with the fields set here
+        self._terms: Dict[str, int] = {}
+        self._postings_docs: List[array] = []
+        self._postings_tfs: List[array] = []
+        self._doc_ids: List[Optional[str]] = []
+        self._doc_index: Dict[str, int] = {}
+        self._doc_lengths = array("I")
+        self._doc_sources = array("I")
+        self._sources: List[str] = []
+        self._source_index: Dict[str, int] = {}
+        self._total_length = 0
+        self._removed = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_index)
+
+    @property
+    def term_count(self) -> int:
+        return len(self._terms)
+
+    def add_chunks(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+                   embeddings: List[List[float]] | None = None) -> None:
+        """Index chunks; a chunk id that is already indexed is replaced."""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((list(ids), list(documents), list(metadatas)))
+            for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                self._remove(chunk_id)
+                doc = len(self._doc_ids)
+                frequencies = Counter(tokenize(document))
+                for term, frequency in frequencies.items():
+                    term_id = self._terms.get(term)
+                    if term_id is None:
+                        term_id = self._terms[term] = len(self._postings_docs)
+                        self._postings_docs.append(array("I"))
+                        self._postings_tfs.append(array("H"))
+                    self._postings_docs[term_id].append(doc)
+                    self._postings_tfs[term_id].append(min(frequency, 65535))
+                length = sum(frequencies.values())
+                source = (metadata or {}).get("source", "")
+                source_id = self._source_index.get(source)
+                if source_id is None:
+                    source_id = self._source_index[source] = len(self._sources)
+                    self._sources.append(source)
+                self._doc_ids.append(chunk_id)
+                self._doc_index[chunk_id] = doc
+                # Empty chunks get length 1 so that length 0 always means removed
+                self._doc_lengths.append(max(length, 1))
+                self._doc_sources.append(source_id)
+                self._total_length += max(length, 1)
+            self._dirty = True
+
+    def remove_chunks(self, ids: List[str]) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((list(ids), None, None))
+            for chunk_id in ids:
+                self._remove(chunk_id)
+            self._dirty = True
+
+    def _remove(self, chunk_id: str) -> None:
+        doc = self._doc_index.pop(chunk_id, None)
+        if doc is None:
+            return
+        self._doc_ids[doc] = None
+        self._total_length -= self._doc_lengths[doc]
+        self._doc_lengths[doc] = 0
+        self._removed += 1
+
+    def search(self, query: str, k: int = 10, source: str | None = None) -> List[Tuple[str, float]]:
+        """
+        Top-k chunk ids for a query with their BM25 scores, best first.
+
+        Args:
+            query (str): Query text.
+            k (int): Number of results.
+            source (str | None): Only return chunks of this source document.
+        """
+        self._refresh()
+        terms = set(tokenize(query))
+        with self._lock:
+            live = len(self._doc_index)
+            if not terms or not live:
+                return []
+            source_id = None
+            if source is not None:
+                source_id = self._source_index.get(source)
+                if source_id is None:
+                    return []
+            lengths = np.frombuffer(self._doc_lengths, dtype=np.uint32).astype(np.float32)
+            average_length = self._total_length / live
+            scores = np.zeros(len(self._doc_ids), dtype=np.float32)
+            for term in terms:
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    continue
+                docs = np.frombuffer(self._postings_docs[term_id], dtype=np.uint32).astype(np.intp)
+                tfs = np.frombuffer(self._postings_tfs[term_id], dtype=np.uint16).astype(np.float32)
+                frequency = len(docs)
+                idf = np.log(1.0 + (live - frequency + 0.5) / (frequency + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[docs] / average_length)
+                # A document appears once per postings list, so plain fancy-index addition is safe
+                scores[docs] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+            scores[lengths == 0] = 0.0
+            if source_id is not None:
+                scores[np.frombuffer(self._doc_sources, dtype=np.uint32) != source_id] = 0.0
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(self._doc_ids[doc], float(scores[doc])) for doc in candidates]
+
+    def _compact(self) -> None:
+        """Renumber the live chunks and drop removed ones from every postings list."""
+        alive = np.frombuffer(self._doc_lengths, dtype=np.uint32) > 0
+        renumber = np.cumsum(alive, dtype=np.int64) - 1
+        terms, docs_lists, tf_lists = {}, [], []
+        for term, term_id in self._terms.items():
+            docs = np.frombuffer(self._postings_docs[term_id], dtype=np.uint32)
+            keep = alive[docs]
+            if not keep.any():
+                continue
+            terms[term] = len(docs_lists)
+            docs_lists.append(array("I", renumber[docs[keep]].astype(np.uint32).tobytes()))
+            tf_lists.append(array("H", np.frombuffer(self._postings_tfs[term_id], dtype=np.uint16)[keep].tobytes()))
+        alive_docs = np.flatnonzero(alive)
+        self._terms, self._postings_docs, self._postings_tfs = terms, docs_lists, tf_lists
+        self._doc_ids = [self._doc_ids[doc] for doc in alive_docs]
+        self._doc_index = {chunk_id: doc for doc, chunk_id in enumerate(self._doc_ids)}
+        self._doc_lengths = array("I", np.frombuffer(self._doc_lengths, dtype=np.uint32)[alive].tobytes())
+        self._doc_sources = array("I", np.frombuffer(self._doc_sources, dtype=np.uint32)[alive].tobytes())
+        self._removed = 0
+
+    def save(self, path: str | None = None) -> None:
+        """Write the index atomically (to a temporary file, then renamed)."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            if self._removed:
+                self._compact()
+            terms = list(self._terms)
+            postings_docs = [self._postings_docs[self._terms[term]] for term in terms]
+            postings_tfs = [self._postings_tfs[self._terms[term]] for term in terms]
+            offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(docs) for docs in postings_docs])
+            data = {
+                "terms": np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+                "offsets": offsets,
+                "docs": np.frombuffer(b"".join(docs.tobytes() for docs in postings_docs), dtype=np.uint32),
+                "tfs": np.frombuffer(b"".join(tfs.tobytes() for tfs in postings_tfs), dtype=np.uint16),
+                "doc_ids": np.frombuffer(json.dumps(self._doc_ids).encode("utf-8"), dtype=np.uint8),
+                "doc_lengths": np.frombuffer(self._doc_lengths, dtype=np.uint32).copy(),
+                "doc_sources": np.frombuffer(self._doc_sources, dtype=np.uint32).copy(),
+                "sources": np.frombuffer(json.dumps(self._sources).encode("utf-8"), dtype=np.uint8)
+            }
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **data)
+            os.replace(tmp_path, path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+            self._loaded_mtime = os.path.getmtime(path)
+
+    def load(self, path: str | None = None) -> None:
+        path = path or self.path
+        with np.load(path) as data:
+            raw_terms = data["terms"].tobytes().decode("utf-8")
+            terms = raw_terms.split("\n") if raw_terms else []
+            offsets = data["offsets"]
+            docs, tfs = data["docs"], data["tfs"]
+            doc_ids = json.loads(data["doc_ids"].tobytes().decode("utf-8"))
+            doc_lengths = data["doc_lengths"]
+            doc_sources = data["doc_sources"]
+            sources = json.loads(data["sources"].tobytes().decode("utf-8"))
+        with self._lock:
+            self._clear()
+            self._terms = {term: i for i, term in enumerate(terms)}
+            self._postings_docs = [array("I", docs[offsets[i]:offsets[i + 1]].tobytes()) for i in range(len(terms))]
+            self._postings_tfs = [array("H", tfs[offsets[i]:offsets[i + 1]].tobytes()) for i in range(len(terms))]
+            self._doc_ids = doc_ids
+            self._doc_index = {chunk_id: doc for doc, chunk_id in enumerate(doc_ids) if chunk_id is not None}
+            self._doc_lengths = array("I", doc_lengths.astype(np.uint32).tobytes())
+            self._doc_sources = array("I", doc_sources.astype(np.uint32).tobytes())
+            self._sources = sources
+            self._source_index = {source: i for i, source in enumerate(sources)}
+            self._total_length = int(doc_lengths.sum())
+            self._dirty = False
+            self._loaded_mtime = os.path.getmtime(path)
+        logger.info(f"Loaded BM25 index with {len(self)} chunks and {self.term_count} terms from {path}")
+
+    def _refresh(self) -> None:
+        """Reload the file if another process (e.g. a different gunicorn worker) saved a newer index."""
+        if not self.path or self._dirty or time.monotonic() - self._checked_at < settings.BM25_RELOAD_CHECK_SECONDS:
+            return
+        self._checked_at = time.monotonic()
+        try:
+            if os.path.exists(self.path) and os.path.getmtime(self.path) > self._loaded_mtime:
+                self.load()
+        except Exception as e:
+            logger.warning(f"Could not reload BM25 index from {self.path}: {e}")
+
+    def commit(self) -> None:
+        self.flush()
+
+    def flush(self, force: bool = False) -> None:
+        """Save if there are unsaved changes and BM25_SAVE_INTERVAL has passed (or force)."""
+        if not self._dirty:
+            return
+        if force or time.monotonic() - self._saved_at >= settings.BM25_SAVE_INTERVAL:
+            try:
+                self.save()
+            except Exception as e:
+                logger.error(f"Could not save BM25 index to {self.path}: {e}")
+
+    def rebuild(self, collection: Any, batch_size: int = 1000) -> int:
+        """
+        Replace the index with every chunk stored in a ChromaDB collection, e.g. when it is
+        missing or fell behind ChromaDB because the process died between two saves. Searches
+        use the previous index until the new one is complete. Chunks added or removed by ingestion
+        while the collection is read are replayed onto the new index before it replaces the old
+        one, so they are not lost. Returns the number of chunks indexed.
+        """
+        fresh = BM25Index(k1=self.k1, b=self.b)
+        offset = 0
+        with self._lock:
+            self._journal = []
+        try:
+            while True:
+                page = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+                ids = page.get("ids") or []
+                if not ids:
+                    break
+                fresh.add_chunks(ids, page.get("documents") or [""] * len(ids), page.get("metadatas") or [{}] * len(ids))
+                offset += len(ids)
+            with self._lock:
+                for ids, documents, metadatas in self._journal:
+                    if documents is None:
+                        fresh.remove_chunks(ids)
+                    else:
+                        fresh.add_chunks(ids, documents, metadatas)
+                for name in _INDEX_FIELDS:
+                    setattr(self, name, getattr(fresh, name))
+                self._dirty = True
+        finally:
+            with self._lock:
+                self._journal = None
+        self.flush(force=True)
+        return offset
+
+
+_index: Optional[BM25Index] = None
+_index_lock = threading.Lock()
+
+
+def get_bm25_index() -> Optional[BM25Index]:
+    """Process-wide BM25 index loaded from BM25_INDEX_PATH, or None when BM25_ENABLED is off."""
+    global _index
+    if not settings.BM25_ENABLED:
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = BM25Index(settings.BM25_INDEX_PATH)
+        return _index
+
+
+def _collect() -> Iterable:
+    if _index is None:
+        return []
+    return [
+        ("bm25_chunks", "gauge", "Chunks in the BM25 index.", [({}, len(_index))]),
+        ("bm25_terms", "gauge", "Distinct terms in the BM25 index.", [({}, _index.term_count)])
+    ]
+
+
+metrics.add_collector(_collect)
@@ -0,0 +1,135 @@
+import os
+import logging
+import threading
+from typing import Any, Dict, Optional
+import httpx
+from ..core.config import settings
+from ..core.http import pooled_http_client
+from ..core.interfaces import AbstractLLMClient, AbstractEmbeddingClient
+from ..db.chroma_client import ChromaDBClient, collection_name_for
+from .llm_provider_factory import LLMFactory
+from .rag_service import RAGService
+from .ingestion_service import AsyncEmbeddingFunction
+from .embedding_batcher import EmbeddingBatcher
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_provider(provider: Optional[str]) -> str:
+    return (provider or os.getenv("LLM_PROVIDER", "ollama")).lower()
+
+
+class ClientRegistry:
+    """
+    App-scoped pool of long-lived clients, keyed by provider.
+
+    LLM, embedding and ChromaDB clients are created on first use and then reused by every
+    request, so connection pools, TLS sessions and the collection lookup are paid once.
+    Created in the FastAPI lifespan and closed on shutdown with aclose().
+    """
+    def __init__(self, chroma_client: Any = None) -> None:
+        """
+        Args:
+            chroma_client: Preconfigured chromadb client shared by the ChromaDBClients
+                (e.g. a local one for load tests). Defaults to an HttpClient per ChromaDBClient.
+        """
+        self._chroma_client = chroma_client
+        self._lock = threading.Lock()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._llm_clients: Dict[str, AbstractLLMClient] = {}
+        self._embedding_clients: Dict[str, AbstractEmbeddingClient] = {}
+        self._vector_db_clients: Dict[str, Optional[ChromaDBClient]] = {}
+        self._rag_services: Dict[str, RAGService] = {}
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client for adapters that talk plain HTTP (e.g. Ollama)."""
+        if self._http_client is None:
+            self._http_client = pooled_http_client()
+        return self._http_client
+
+    @staticmethod
+    def embedding_provider_for(provider: Optional[str]) -> str:
+        """Every LLM provider embeds with EMBEDDING_PROVIDER, so chunks and queries share one vector space."""
+        return LLMFactory.embedding_provider()
+
+    def get_llm_client(self, provider: Optional[str] = None) -> AbstractLLMClient:
+        provider = _normalize_provider(provider)
+        with self._lock:
+            if provider not in self._llm_clients:
+                self._llm_clients[provider] = LLMFactory.get_llm_client(provider, http_client=self.http_client)
+            return self._llm_clients[provider]
+
+    def get_embedding_client(self, provider: Optional[str] = None) -> AbstractEmbeddingClient:
+        embedding_provider = self.embedding_provider_for(provider)
+        with self._lock:
+            if embedding_provider not in self._embedding_clients:
+                client = LLMFactory.get_embedding_client(embedding_provider, http_client=self.http_client)
+                if settings.EMBED_MICROBATCH_ENABLED:
+                    # Shared by every chat request, so concurrent query embeddings can share a request
+                    client = EmbeddingBatcher(client, settings.EMBED_MICROBATCH_WINDOW_MS, settings.EMBED_MICROBATCH_MAX_SIZE)
+                self._embedding_clients[embedding_provider] = client
+            return self._embedding_clients[embedding_provider]
+
+    def get_vector_db_client(self, provider: Optional[str] = None) -> Optional[ChromaDBClient]:
+        """One ChromaDB client per embedding provider (None in test mode, like RAGService)."""
+        embedding_provider = self.embedding_provider_for(provider)
+        embedding_client = self.get_embedding_client(provider)
+        with self._lock:
+            if embedding_provider not in self._vector_db_clients:
+                if "PYTEST_CURRENT_TEST" in os.environ:
+                    self._vector_db_clients[embedding_provider] = None
+                else:
+                    self._vector_db_clients[embedding_provider] = ChromaDBClient(
+                        embedding_function=AsyncEmbeddingFunction(embedding_client, name=embedding_provider),
+                        client=self._chroma_client,
+                        collection_name=collection_name_for(getattr(embedding_client, "embedding_model", None))
+                    )
+            return self._vector_db_clients[embedding_provider]
+
+    def get_rag_service(self, provider: Optional[str] = None) -> RAGService:
+        """Return the shared RAGService for a provider, built from the pooled clients."""
+        provider = _normalize_provider(provider)
+        service = self._rag_services.get(provider)
+        if service is None:
+            service = RAGService(
+                provider=provider,
+                llm_client=self.get_llm_client(provider),
+                embedding_client=self.get_embedding_client(provider),
+                vector_db_client=self.get_vector_db_client(provider)
+            )
+            with self._lock:
+                service = self._rag_services.setdefault(provider, service)
+        return service
+
+    async def aclose(self) -> None:
+        """Close every pooled client. The registry can be reused afterwards and will reconnect."""
+        with self._lock:
+            clients = list(self._llm_clients.values()) + list(self._embedding_clients.values())
+            http_client = self._http_client
+            self._llm_clients, self._embedding_clients = {}, {}
+            self._vector_db_clients, self._rag_services = {}, {}
+            self._http_client = None
+        closed = set()
+        for client in clients:
+            aclose = getattr(client, "aclose", None)
+            if aclose is None or id(client) in closed:
+                continue
+            closed.add(id(client))
+            try:
+                await aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close {type(client).__name__}: {e}")
+        if http_client is not None:
+            await http_client.aclose()
+
+
+_registry: Optional[ClientRegistry] = None
+
+
+def get_client_registry() -> ClientRegistry:
+    """Process-wide registry, for code paths that have no access to app.state."""
+    global _registry
+    if _registry is None:
+        _registry = ClientRegistry()
+    return _registry
@@ -0,0 +1,114 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from ..core.config import settings
+from .embedding_scheduler import estimate_tokens
+
+# Shorter common spans between neighbouring chunks are treated as coincidence, not overlap
+MIN_OVERLAP_CHARS = 20
+
+
+def overlap_length(previous: str, following: str) -> int:
+    """
+    Length of the longest suffix of previous that is also a prefix of following, i.e. the
+    text the splitter repeated at the start of the next chunk (prefix function, linear time).
+    """
+    size = min(len(previous), len(following))
+    if not size:
+        return 0
+    text = following[:size] + "\0" + previous[-size:]
+    border = [0] * len(text)
+    for i in range(1, len(text)):
+        k = border[i - 1]
+        while k and text[i] != text[k]:
+            k = border[k - 1]
+        if text[i] == text[k]:
+            k += 1
+        border[i] = k
+    return border[-1]
+
+
+def merge_chunks(chunks: Sequence[str]) -> str:
+    """Join consecutive chunks of one document, dropping the text repeated by the chunk overlap."""
+    merged = chunks[0] if chunks else ""
+    for chunk in chunks[1:]:
+        overlap = overlap_length(merged[-len(chunk):], chunk)
+        merged = merged + chunk[overlap:] if overlap >= MIN_OVERLAP_CHARS else f"{merged}\n{chunk}"
+    return merged
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text to at most max_tokens, at a word boundary where possible."""
+    while text and estimate_tokens(text) > max_tokens:
+        cut = int(len(text) * max_tokens / estimate_tokens(text) * 0.95)
+        space = text.rfind(" ", 0, cut)
+        text = text[:space if space > cut // 2 else cut]
+    return text
+
+
+def context_token_budget(model: Optional[str]) -> int:
+    """Context budget for an LLM model: CONTEXT_MODEL_MAX_TOKENS[model] (with or without its :tag), else CONTEXT_MAX_TOKENS."""
+    budgets = settings.CONTEXT_MODEL_MAX_TOKENS
+    if model:
+        for name in (model, model.split(":", 1)[0]):
+            if name in budgets:
+                return budgets[name]
+    return settings.CONTEXT_MAX_TOKENS
+
+
+def build_context(documents: Sequence[str], metadatas: Sequence[Optional[Dict[str, Any]]],
+                  max_tokens: int) -> Tuple[str, List[str]]:
+    """
+    Assemble retrieved chunks (best first) into the prompt context.
+
+    Chunks of the same source with consecutive "chunk" numbers are merged into one passage
+    without their overlapping text, and duplicates are dropped. Passages are ranked by their
+    best chunk and added until max_tokens is reached; a passage that does not fit is skipped
+    for smaller ones that do, and the first passage is truncated rather than dropped.
+
+    Args:
+        documents (Sequence[str]): Chunk texts in relevance order.
+        metadatas (Sequence[Optional[Dict[str, Any]]]): Their metadata ("source" and "chunk").
+        max_tokens (int): Token budget for the whole context.
+
+    Returns:
+        (context, sources): The context text and the sources of the passages it contains.
+    """
+    # Group chunks into runs of consecutive chunk numbers per source, keyed by the best rank in the run
+    by_source: Dict[str, Dict[int, Tuple[int, str]]] = {}
+    passages: List[Tuple[int, str, Optional[str]]] = []
+    for rank, (document, metadata) in enumerate(zip(documents, metadatas)):
+        metadata = metadata or {}
+        source, number = metadata.get("source"), metadata.get("chunk")
+        if source is None or not isinstance(number, int):
+            passages.append((rank, document, source))
+            continue
+        by_source.setdefault(source, {}).setdefault(number, (rank, document))
+    for source, chunks in by_source.items():
+        numbers = sorted(chunks)
+        run = [numbers[0]]
+        for number in numbers[1:] + [None]:
+            if number is not None and number == run[-1] + 1:
+                run.append(number)
+                continue
+            passages.append((min(chunks[n][0] for n in run), merge_chunks([chunks[n][1] for n in run]), source))
+            if number is not None:
+                run = [number]
+    passages.sort(key=lambda passage: passage[0])
+
+    parts: List[str] = []
+    sources: List[str] = []
+    remaining = max_tokens
+    for _, text, source in passages:
+        # Passages are separated by a blank line, about one token
+        tokens = estimate_tokens(text) + (1 if parts else 0)
+        if tokens > remaining:
+            if parts:
+                continue
+            text = _truncate(text, remaining)
+            tokens = estimate_tokens(text)
+        if not text:
+            continue
+        parts.append(text)
+        remaining -= tokens
+        if source is not None and source not in sources:
+            sources.append(source)
+    return "\n\n".join(parts), sources
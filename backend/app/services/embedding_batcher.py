@@ -0,0 +1,92 @@
+import time
+import asyncio
+from typing import List, Optional, Tuple
+from ..core.interfaces import AbstractEmbeddingClient
+from ..core.metrics import EMBED_MICROBATCH_SIZE, EMBED_MICROBATCH_WAIT_SECONDS
+
+# (text, future for its vector, enqueue time)
+_Pending = Tuple[str, asyncio.Future, float]
+
+
+class EmbeddingBatcher(AbstractEmbeddingClient):
+    """
+    Micro-batches concurrent create_embedding() calls into one embed_documents() request.
+
+    The first query embedding to arrive opens a batch; the batch is sent when window_ms has
+    passed or max_batch texts are waiting, whichever comes first, and every caller gets its
+    own vector back. Identical texts in a batch are embedded once, and a batch of one is sent
+    through the wrapped create_embedding(). embed_documents() calls (ingestion, which batches
+    already) go straight to the wrapped client.
+
+    The embedding_model and cache attributes of the wrapped client are exposed unchanged, so
+    the batcher can stand in for it anywhere (e.g. in AsyncEmbeddingFunction).
+    """
+    def __init__(self, client: AbstractEmbeddingClient, window_ms: float = 2.0, max_batch: int = 64) -> None:
+        """
+        Args:
+            client (AbstractEmbeddingClient): Client that sends the batched requests.
+            window_ms (float): Longest time the first text of a batch waits for others.
+            max_batch (int): Batch size that is sent without waiting for the window.
+        """
+        self.client = client
+        self.window_ms = window_ms
+        self.max_batch = max(1, max_batch)
+        for name in ("embedding_model", "cache"):
+            if hasattr(client, name):
+                setattr(self, name, getattr(client, name))
+        self._pending: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def create_embedding(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+        return await future
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.client.embed_documents(texts)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        # Callers that went away (e.g. a disconnected chat client) no longer need a vector
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[_Pending]) -> None:
+        sent = time.perf_counter()
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        EMBED_MICROBATCH_SIZE.observe(len(batch))
+        for _, _, queued in batch:
+            EMBED_MICROBATCH_WAIT_SECONDS.observe(sent - queued)
+        try:
+            # A lone text is sent as a plain single-input request
+            embeddings = await self.client.embed_documents(texts) if len(texts) > 1 else [await self.client.create_embedding(texts[0])]
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+            vectors = dict(zip(texts, embeddings))
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(vectors[text])
+
+    async def aclose(self) -> None:
+        """Close the wrapped client."""
+        aclose = getattr(self.client, "aclose", None)
+        if aclose is not None:
+            await aclose()
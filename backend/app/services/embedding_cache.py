@@ -0,0 +1,159 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from array import array
+from typing import Dict, List, Optional
+from ..core.config import settings
+from ..core.metrics import metrics, cache_collector
+
+logger = logging.getLogger(__name__)
+
+# Seconds between writes of the last_used times of cache hits
+TOUCH_INTERVAL = 5.0
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies of a text share a cache entry."""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model, normalized text hash), backed by SQLite.
+
+    Vectors are stored as float32 blobs. The cache holds at most max_entries vectors and
+    evicts the least recently used ones beyond that. Hits update last_used in memory first;
+    the times are written with the next insert or at most every TOUCH_INTERVAL seconds, so a
+    lookup usually costs a single SELECT. Hit/miss counters are kept in memory.
+    """
+    def __init__(self, path: str, max_entries: int) -> None:
+        """
+        Args:
+            path (str): SQLite database file. Created if missing.
+            max_entries (int): Maximum number of cached vectors.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        self._touched_at = time.monotonic()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: List[str], count_misses: bool = True) -> List[Optional[List[float]]]:
+        """
+        Look up cached vectors, returning None for texts that are not cached.
+        Pass count_misses=False when the caller falls back to another cached path that will
+        record the miss itself.
+        """
+        if not texts:
+            return []
+        keys = [self.make_key(model, text) for text in texts]
+        found = {}
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), 500):
+                part = unique[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._touched.update((key, now) for key in found)
+                if time.monotonic() - self._touched_at >= TOUCH_INTERVAL:
+                    self._write_touched()
+                    self._conn.commit()
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            if count_misses:
+                self.misses += len(keys) - hits
+        return [array("f", found[key]).tolist() if key in found else None for key in keys]
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]) -> None:
+        """Store vectors for texts, evicting the least recently used entries over the cap."""
+        if not texts:
+            return
+        now = time.time()
+        rows = [(self.make_key(model, text), model, array("f", vector).tobytes(), now) for text, vector in zip(texts, vectors)]
+        with self._lock:
+            self._write_touched()
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO embeddings (key, model, vector, last_used) VALUES (?, ?, ?, ?)", rows)
+            self._size += self._conn.total_changes - before
+            overflow = self._size - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self._size -= overflow
+            self._conn.commit()
+
+    def _write_touched(self) -> None:
+        """Write the pending last_used times (the caller holds the lock and commits)."""
+        if self._touched:
+            self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                   [(used, key) for key, used in self._touched.items()])
+            self._touched = {}
+        self._touched_at = time.monotonic()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "entries": self._size,
+            "max_entries": self.max_entries
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide embedding cache, or None when EMBED_CACHE_ENABLED is off."""
+    global _cache
+    if not settings.EMBED_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = EmbeddingCache(settings.EMBED_CACHE_PATH, settings.EMBED_CACHE_MAX_ENTRIES)
+            except Exception as e:
+                logger.error(f"Could not open embedding cache at {settings.EMBED_CACHE_PATH}: {e}. Caching disabled.")
+                return None
+        return _cache
+
+
+metrics.add_collector(cache_collector("embedding_cache", "Embedding cache", lambda: _cache.stats() if _cache is not None else None))
@@ -0,0 +1,145 @@
+import asyncio
+import random
+import logging
+from typing import List
+from ..core.config import settings
+from ..core.interfaces import AbstractEmbeddingClient
+from ..core.metrics import EMBED_INPUTS, EMBED_REQUESTS, EMBED_RETRIES, EMBED_TOKENS
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Number of embedding tokens in a text. Uses tiktoken when it is installed,
+    otherwise the usual ~4 characters per token approximation.
+    """
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def count_embedding_request(texts: List[str]) -> None:
+    """
+    Record one embedding request to the provider. Adapters call this only for texts that
+    missed the embedding cache, so the EMBED_* counters reflect real provider traffic.
+    """
+    EMBED_REQUESTS.inc()
+    EMBED_INPUTS.inc(len(texts))
+    EMBED_TOKENS.inc(sum(estimate_tokens(text) for text in texts))
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Seconds requested by a Retry-After header on the error's HTTP response, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits (429) and transient server errors (5xx) are retried; everything else is not."""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or (isinstance(status, int) and status >= 500)
+
+
+class EmbeddingScheduler:
+    """
+    Embeds large lists of texts through an AbstractEmbeddingClient.
+
+    Texts are packed into batches bounded by a token budget and an input count, several
+    batches run concurrently under a shared limit, and rate-limited batches are retried
+    with exponential backoff (honouring Retry-After when the provider sends it).
+    """
+    def __init__(
+        self,
+        client: AbstractEmbeddingClient,
+        max_batch_tokens: int | None = None,
+        max_batch_size: int | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+        base_delay: float | None = None
+    ) -> None:
+        """
+        Args:
+            client (AbstractEmbeddingClient): Client used for the embedding requests.
+            max_batch_tokens (int | None): Token budget per request. Defaults to settings.EMBED_BATCH_MAX_TOKENS.
+            max_batch_size (int | None): Maximum inputs per request. Defaults to settings.EMBED_BATCH_MAX_INPUTS.
+            max_concurrency (int | None): Requests in flight at once. Defaults to settings.EMBED_MAX_CONCURRENCY.
+            max_retries (int | None): Retries per batch on rate limits. Defaults to settings.EMBED_MAX_RETRIES.
+            base_delay (float | None): First backoff delay in seconds. Defaults to settings.EMBED_RETRY_BASE_DELAY.
+        """
+        self.client = client
+        self.max_batch_tokens = max_batch_tokens or settings.EMBED_BATCH_MAX_TOKENS
+        self.max_batch_size = max_batch_size or settings.EMBED_BATCH_MAX_INPUTS
+        self.max_retries = settings.EMBED_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = settings.EMBED_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_concurrency = max_concurrency or settings.EMBED_MAX_CONCURRENCY
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # A semaphore is bound to one event loop; the service may outlive a loop (e.g. in tests)
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def pack(self, texts: List[str]) -> List[List[int]]:
+        """
+        Group text indices into batches that respect both the token budget and the input count.
+        A single text over the budget still gets a batch of its own.
+        """
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for i, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and (current_tokens + tokens > self.max_batch_tokens or len(current) >= self.max_batch_size):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, returning one vector per text in input order."""
+        if not texts:
+            return []
+        batches = self.pack(texts)
+        results = await asyncio.gather(*(self._embed_batch([texts[i] for i in batch]) for batch in batches))
+        embeddings: List[List[float]] = [[] for _ in texts]
+        for batch, vectors in zip(batches, results):
+            for i, vector in zip(batch, vectors):
+                embeddings[i] = vector
+        return embeddings
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                async with self._get_semaphore():
+                    return await self.client.embed_documents(texts)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = _retry_after(e) or self.base_delay * (2 ** attempt) * (1 + random.random())
+                attempt += 1
+                EMBED_RETRIES.inc()
+                logger.warning(f"Embedding batch of {len(texts)} texts failed ({e}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
@@ -1,8 +1,11 @@
 import os
 import time
+import logging
 from datetime import datetime, timedelta
 from fastapi import BackgroundTasks
 
+logger = logging.getLogger(__name__)
+
 def delete_old_files_task(directory: str, max_age_hours: int = 24):
     """
     Delete files older than max_age_hours in the given directory.
@@ -16,6 +19,6 @@ def delete_old_files_task(directory: str, max_age_hours: int = 24):
             if file_mtime < cutoff:
                 try:
                     os.remove(file_path)
-                    print(f"Deleted old file: {file_path}")
+                    logger.info(f"Deleted old file: {file_path}")
                 except Exception as e:
-                    print(f"Failed to delete {file_path}: {e}")
+                    logger.warning(f"Failed to delete {file_path}: {e}")
@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+from ..core.config import settings
+from ..core.metrics import INGEST_JOBS
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+class IngestionJobQueue:
+    """
+    Background queue for ingestion work submitted through the API.
+
+    Jobs are persisted in SQLite before they are acknowledged, processed by a bounded pool
+    of asyncio workers, and report progress while they run. Jobs that were queued or
+    running when the process stopped are picked up again by start().
+
+    A job is one of {"kind": "file", "payload": {"file_path", "file_name", "content_hash"}},
+    {"kind": "link", "payload": {"url"}} or {"kind": "directory", "payload": {"directory_path", "workers"}}.
+    """
+    def __init__(self, ingestion_service, path: str | None = None, workers: int | None = None) -> None:
+        """
+        Args:
+            ingestion_service (IngestionService): Service that performs the ingestion.
+            path (str | None): SQLite database file. Defaults to settings.INGEST_JOBS_DB_PATH.
+            workers (int | None): Jobs processed concurrently. Defaults to settings.INGEST_JOB_WORKERS.
+        """
+        self.ingestion_service = ingestion_service
+        self.path = path or settings.INGEST_JOBS_DB_PATH
+        self.workers = max(1, workers or settings.INGEST_JOB_WORKERS)
+        self._lock = threading.Lock()
+        self._queue: asyncio.Queue | None = None
+        self._tasks: List[asyncio.Task] = []
+        # Live progress of running jobs; persisted when the job finishes
+        self._progress: Dict[str, Dict[str, Any]] = {}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL, "
+            "progress TEXT, result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+        self._conn.commit()
+
+    def _update(self, job_id: str, **fields: Any) -> None:
+        fields["updated_at"] = time.time()
+        for key in ("progress", "result"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key], default=str)
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = {
+            "job_id": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "payload": json.loads(row["payload"]),
+            "progress": json.loads(row["progress"]) if row["progress"] else {},
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
+        }
+        if row["id"] in self._progress:
+            job["progress"] = dict(self._progress[row["id"]])
+        return job
+
+    def enqueue(self, kind: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a new job and hand it to the workers. Returns the job."""
+        if kind not in ("file", "link", "directory"):
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), JOB_QUEUED, now, now)
+            )
+            self._conn.commit()
+        if self._queue is not None:
+            self._queue.put_nowait(job_id)
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job by id, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: str | None = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Return the most recent jobs, optionally filtered by status."""
+        query, params = "SELECT * FROM jobs", []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    async def start(self) -> None:
+        """Start the workers and resume jobs left queued or running by a previous process."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (JOB_QUEUED, JOB_RUNNING)
+            ).fetchall()
+            self._conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (JOB_QUEUED, JOB_RUNNING))
+            self._conn.commit()
+        for row in rows:
+            self._queue.put_nowait(row["id"])
+        if rows:
+            logger.info(f"Resuming {len(rows)} ingestion jobs")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers. Unfinished jobs stay in the database and resume on the next start()."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def join(self) -> None:
+        """Wait until every job handed to the workers has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Ingestion job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = self.get(job_id)
+        if job is None or job["status"] != JOB_QUEUED:
+            return
+        self._update(job_id, status=JOB_RUNNING)
+        self._progress[job_id] = {}
+
+        def progress(update: Dict[str, Any]) -> None:
+            self._progress[job_id].update(update)
+
+        payload = job["payload"]
+        try:
+            if job["kind"] == "file":
+                result = await self.ingestion_service.ingest_document(
+                    payload["file_path"], payload["file_name"], progress=progress,
+                    content_hash=payload.get("content_hash")
+                )
+            elif job["kind"] == "link":
+                result = await self.ingestion_service.ingest_link(payload["url"], progress=progress)
+            else:
+                result = await self.ingestion_service.ingest_directory(
+                    payload["directory_path"], workers=payload.get("workers"), progress=progress
+                )
+        except Exception as e:
+            logger.error(f"Ingestion job {job_id} failed: {e}")
+            self._update(job_id, status=JOB_FAILED, error=str(e), progress=self._progress.pop(job_id))
+            INGEST_JOBS.inc(kind=job["kind"], status=JOB_FAILED)
+            return
+        status = JOB_FAILED if result.get("status") == "error" else JOB_SUCCEEDED
+        self._update(
+            job_id,
+            status=status,
+            result=result,
+            error=result.get("message") if status == JOB_FAILED else None,
+            progress=self._progress.pop(job_id)
+        )
+        INGEST_JOBS.inc(kind=job["kind"], status=status)
+        logger.info(f"Ingestion job {job_id} {status}")
@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional
+from ..db.chroma_client import DEFAULT_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path_for(path: str, collection_name: str) -> str:
+    """
+    Manifest file for one Chroma collection: path itself for the default collection, else path
+    with the collection name appended (data/ingest_manifest__rag_documents__<model>.json), so
+    a file ingested for one embedding model is not skipped when ingesting for another.
+    """
+    if collection_name == DEFAULT_COLLECTION:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}__{collection_name}{extension}"
+
+
+def hash_text(text: str) -> str:
+    """Return the SHA-256 hex digest of a chunk of text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IngestionManifest:
+    """
+    Local record of what has been ingested, used to skip unchanged files without
+    contacting ChromaDB and to re-embed only the chunks that changed.
+
+    The manifest is a JSON file of the form:
+        {"files": {file_name: {"content_hash": ..., "document_type": ...,
+                               "chunks": {chunk_id: chunk_hash, ...}, "ingested_at": ...}}}
+    where "chunks" is kept in document order.
+
+    Changes are written at most every save_interval seconds (and by flush()), so recording
+    thousands of files does not rewrite the whole file thousands of times. An entry lost in a
+    crash only makes its file look new again; its chunks are still found in ChromaDB by source
+    and are not embedded again.
+    """
+    def __init__(self, path: str, save_interval: float = 0.0) -> None:
+        """
+        Args:
+            path (str): Location of the manifest JSON file. Created on first save.
+            save_interval (float): Minimum seconds between two saves; 0 saves every change.
+        """
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._by_hash: Dict[str, str] = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._files = data.get("files", {})
+            self._by_hash = {entry["content_hash"]: name for name, entry in self._files.items()}
+        except Exception as e:
+            logger.error(f"Failed to load ingestion manifest {self.path}: {e}. Starting with an empty manifest.")
+            self._files, self._by_hash = {}, {}
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"files": self._files}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self._save()
+
+    def flush(self) -> None:
+        """Write unsaved changes now."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def get(self, file_name: str) -> Optional[Dict[str, Any]]:
+        """Return the manifest entry for a file, or None if it was never ingested."""
+        with self._lock:
+            return self._files.get(file_name)
+
+    def find_by_hash(self, content_hash: str) -> Optional[str]:
+        """Return the name of an ingested file with the given content hash, if any."""
+        with self._lock:
+            return self._by_hash.get(content_hash)
+
+    def record(self, file_name: str, content_hash: str, chunks: Dict[str, str], document_type: str) -> None:
+        """Store (or replace) the entry for a file; it is persisted within save_interval."""
+        with self._lock:
+            previous = self._files.get(file_name)
+            if previous and self._by_hash.get(previous["content_hash"]) == file_name:
+                del self._by_hash[previous["content_hash"]]
+            self._files[file_name] = {
+                "content_hash": content_hash,
+                "document_type": document_type,
+                "chunks": chunks,
+                "ingested_at": time.time()
+            }
+            self._by_hash[content_hash] = file_name
+            self._changed()
+
+    def remove(self, file_name: str) -> None:
+        """Forget a file; the change is persisted within save_interval."""
+        with self._lock:
+            entry = self._files.pop(file_name, None)
+            if entry is None:
+                return
+            if self._by_hash.get(entry["content_hash"]) == file_name:
+                del self._by_hash[entry["content_hash"]]
+            self._changed()
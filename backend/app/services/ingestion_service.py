@@ -1,23 +1,40 @@
 import os
+import time
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterator, AsyncIterator, Callable
+from itertools import islice
 from pathlib import Path
-from pdfminer.high_level import extract_text as extract_pdf_text
+from pdfminer.high_level import extract_text as extract_pdf_text, extract_pages
+from pdfminer.layout import LTTextContainer
 import docx
 import pytesseract
 from PIL import Image
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from ..db.chroma_client import ChromaDBClient
+from ..db.chroma_client import ChromaDBClient, collection_name_for
 from ..adapters.openai_adapter import OpenAIAdapter
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import threading        
 from chromadb.utils import embedding_functions
 from ..core.config import settings
+from ..core.metrics import INGEST_CHUNKS, INGEST_DOCUMENTS, INGEST_STAGE_SECONDS
+from .ingestion_manifest import IngestionManifest, hash_file, hash_text, manifest_path_for
+from .embedding_scheduler import EmbeddingScheduler
+from .answer_cache import get_answer_cache
+from .link_fetcher import LinkFetcher, LinkFetchError
+from .token_chunker import TokenChunker
+from .bm25_index import get_bm25_index
+from .vector_mirror import get_vector_mirror
+from ..core.interfaces import ChunkListener
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Receives progress counters (e.g. {"chunks_embedded": 10, "chunks_total": 40}) while ingesting
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
 class DocumentProcessor:
     """Handles extraction of text from various document types"""
     @staticmethod
@@ -124,21 +141,120 @@ class DocumentProcessor:
         else:
             return ""
 
-from typing import List
-import asyncio
+    @staticmethod
+    def iter_text_from_pdf(file_path: str) -> Iterator[str]:
+        try:
+            for page in extract_pages(file_path):
+                yield "".join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+        except Exception as e:
+            logger.error(f"Failed to extract text from PDF {file_path}: {e}")
+
+    @staticmethod
+    def iter_text_from_docx(file_path: str, block_chars: int) -> Iterator[str]:
+        try:
+            doc = docx.Document(file_path)
+            block: List[str] = []
+            size = 0
+            for p in doc.paragraphs:
+                block.append(p.text)
+                size += len(p.text) + 1
+                if size >= block_chars:
+                    yield "\n".join(block)
+                    block, size = [], 0
+            if block:
+                yield "\n".join(block)
+        except Exception as e:
+            logger.error(f"Failed to extract text from DOCX {file_path}: {e}")
+
+    @staticmethod
+    def iter_text_from_txt(file_path: str, block_chars: int) -> Iterator[str]:
+        # Blocks end at a line break (or at least whitespace) so that, like PDF pages and
+        # DOCX paragraphs, they can be joined with a newline without splitting a word
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                carry = ""
+                for block in iter(lambda: f.read(block_chars), ""):
+                    block = carry + block
+                    cut = block.rfind("\n")
+                    if cut < 0:
+                        cut = max(block.rfind(" "), block.rfind("\t"))
+                    if cut < 0:
+                        carry = ""
+                        yield block
+                        continue
+                    carry = block[cut + 1:]
+                    yield block[:cut]
+                if carry:
+                    yield carry
+        except Exception as e:
+            logger.error(f"Failed to extract text from TXT {file_path}: {e}")
+
+    def iter_text(self, file_path: str, block_chars: int = 65536) -> Iterator[str]:
+        """
+        Yield a document's text page by page (PDF) or in blocks of about block_chars
+        (DOCX, TXT) instead of returning it as one string. Formats that cannot be read
+        incrementally (DOC, images) are yielded as a single block.
+        """
+        doc_type = self.get_document_type(file_path)
+        if doc_type == 'pdf':
+            yield from self.iter_text_from_pdf(file_path)
+        elif doc_type == 'docx':
+            yield from self.iter_text_from_docx(file_path, block_chars)
+        elif doc_type == 'txt':
+            yield from self.iter_text_from_txt(file_path, block_chars)
+        else:
+            text = self.extract_text(file_path)
+            if text:
+                yield text
+
+def _extract_text_worker(file_path: str) -> tuple[str, float]:
+    """
+    Process-pool entry point: extract text from a file and report how long it took.
+    Kept at module level so it can be pickled by ProcessPoolExecutor.
+    """
+    start = time.perf_counter()
+    text = DocumentProcessor().extract_text(file_path)
+    return text, time.perf_counter() - start
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop running forever in a daemon thread, for sync callers that need async clients."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="embedding-loop", daemon=True).start()
+        return _loop
 
 class AsyncEmbeddingFunction:
     """
     Wrapper for async embedding client compatible with ChromaDB.
     Pass an embedding client object (e.g., OpenAIAdapter) that implements async create_embedding(text: str) -> list[float].
     """
-    def __init__(self, client, name: str = "openai"):
+    def __init__(self, client, name: str = "openai", cache=None):
         self._client = client
         self._name = name
+        self._cache = cache if cache is not None else getattr(client, "cache", None)
+        self._model = getattr(client, "embedding_model", name)
 
-    def __call__(self, texts: list[str]) -> list[list[float]]:
-        # ChromaDB expects a synchronous callable. This wraps async embedding calls.
-        import asyncio
+    def __call__(self, input: list[str]) -> list[list[float]]:
+        # ChromaDB expects a synchronous callable named (self, input). This wraps async embedding calls.
+        texts = input
+        # Cached vectors are served directly, so fully cached inputs never start a thread or event loop.
+        if self._cache is not None:
+            cached = self._cache.get_many(self._model, texts, count_misses=False)
+            missing = [i for i, vector in enumerate(cached) if vector is None]
+            if not missing:
+                return cached
+            vectors = self._embed([texts[i] for i in missing])
+            for i, vector in zip(missing, vectors):
+                cached[i] = vector
+            return cached
+        return self._embed(texts)
+
+    def _embed(self, texts: list[str]) -> list[list[float]]:
         async def get_embeddings():
             # Try embed_documents (batch) if available, else fallback to create_embedding per text
             if hasattr(self._client, "embed_documents"):
@@ -146,20 +262,10 @@ class AsyncEmbeddingFunction:
             else:
                 return [await self._client.create_embedding(t) for t in texts]
 
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-        # If already in an event loop (e.g. FastAPI), use a thread to avoid 'str not callable' errors
-        if loop.is_running():
-            from concurrent.futures import ThreadPoolExecutor
-            with ThreadPoolExecutor() as executor:
-                future = executor.submit(lambda: asyncio.run(get_embeddings()))
-                return future.result()
-        else:
-            return loop.run_until_complete(get_embeddings())
+        # Run on one long-lived background loop instead of a new thread and event loop per call.
+        # Request handlers pass query_embeddings to Chroma, so this is only a fallback for
+        # callers that query by text.
+        return asyncio.run_coroutine_threadsafe(get_embeddings(), _background_loop()).result()
 
     # Only a method, not a property, for ChromaDB compatibility
     def name(self):
@@ -175,26 +281,53 @@ class IngestionService:
         self.chunk_overlap = chunk_overlap
         self.provider = (provider or os.getenv("LLM_PROVIDER", "openai")).lower()
         
-        if self.provider == "ollama":
-            logger.warning("Ollama doesn't support embeddings. Switching to OpenAI for embeddings.")
-            embedding_provider = "openai"
-        else:
-            embedding_provider = self.provider
-            
+        # Chunks are embedded by EMBEDDING_PROVIDER whatever the LLM provider
+        embedding_provider = LLMFactory.embedding_provider()
         self.embedding_client = LLMFactory.get_embedding_client(embedding_provider)
-        
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if not openai_api_key:
-            raise RuntimeError("OPENAI_API_KEY is not set in the environment or .env file.")
-        self.embedding_function = embedding_functions.OpenAIEmbeddingFunction(api_key=openai_api_key)
-        self.vector_db_client = ChromaDBClient(embedding_function=self.embedding_function)
+        self.embedding_scheduler = EmbeddingScheduler(self.embedding_client)
+
+        if embedding_provider == "openai":
+            openai_api_key = os.getenv("OPENAI_API_KEY")
+            if not openai_api_key:
+                raise RuntimeError("OPENAI_API_KEY is not set in the environment or .env file.")
+            self.embedding_function = embedding_functions.OpenAIEmbeddingFunction(api_key=openai_api_key)
+        else:
+            # Chroma calls the embedding function on the background loop, so it gets its own
+            # client: an HTTP connection pool must not be shared between two event loops
+            self.embedding_function = AsyncEmbeddingFunction(LLMFactory.get_embedding_client(embedding_provider),
+                                                             name=embedding_provider)
+        collection_name = collection_name_for(getattr(self.embedding_client, "embedding_model", None))
+        self.vector_db_client = ChromaDBClient(embedding_function=self.embedding_function, collection_name=collection_name)
         self.document_processor = DocumentProcessor()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
-        )
+        # What is ingested is tracked per collection, i.e. per embedding model
+        self.manifest = IngestionManifest(manifest_path_for(settings.INGEST_MANIFEST_PATH, collection_name),
+                                          settings.INGEST_MANIFEST_SAVE_INTERVAL)
+        self.link_fetcher = LinkFetcher()
+        # Secondary indexes kept in sync with the chunks stored in ChromaDB
+        self.chunk_listeners: List[ChunkListener] = []
+        bm25_index = get_bm25_index()
+        if bm25_index is not None:
+            self.chunk_listeners.append(bm25_index)
+        vector_mirror = get_vector_mirror()
+        if vector_mirror is not None:
+            self.chunk_listeners.append(vector_mirror)
+        if settings.CHUNKER.lower() == "token":
+            self.text_splitter = TokenChunker(settings.CHUNK_TOKENS, settings.CHUNK_OVERLAP_TOKENS)
+        else:
+            self.text_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            )
         logger.info(f"Initialized IngestionService with {embedding_provider} embeddings.")
 
+    def _notify(self, method: str, *args) -> None:
+        """Call a ChunkListener method on every listener; a failing listener never fails ingestion."""
+        for listener in self.chunk_listeners:
+            try:
+                getattr(listener, method)(*args)
+            except Exception as e:
+                logger.warning(f"{type(listener).__name__}.{method} failed: {e}")
+
     def _is_supported_file(self, file_path: str) -> bool:
         try:
             self.document_processor.get_document_type(file_path)
@@ -202,11 +335,77 @@ class IngestionService:
         except Exception:
             return False
 
-    async def ingest_document(self, file_path: str, file_name: str) -> Dict[str, Any]:
+    def _check_unchanged(self, file_name: str, content_hash: str) -> Dict[str, Any] | None:
         """
-        Ingest a single document, skipping if already present in ChromaDB by filename (or hash).
-        Now includes post-ingest verification, duplicate detection, and improved messaging.
+        Return a 'skipped' result if the manifest shows this content is already ingested, else None.
+        Only consults the local manifest; ChromaDB and the embedding provider are never contacted.
         """
+        entry = self.manifest.get(file_name)
+        if entry and entry["content_hash"] == content_hash:
+            logger.info(f"[INGESTION] Document {file_name} is unchanged since it was last ingested. Skipping.")
+            return {
+                "status": "skipped",
+                "message": f"Document {file_name} is unchanged since it was last ingested. Skipped. (No duplicate ingested)",
+                "file_name": file_name,
+                "duplicate": True,
+                "existing_ids": list(entry["chunks"])
+            }
+        return None
+
+    def _find_original(self, file_name: str, content_hash: str) -> str | None:
+        """Name of an already ingested file with the same content, for a file not ingested yet."""
+        if self.manifest.get(file_name) is not None:
+            return None
+        original = self.manifest.find_by_hash(content_hash)
+        return original if original and original != file_name and self.manifest.get(original) else None
+
+    def _existing_ids(self, file_name: str) -> List[str]:
+        """IDs stored in ChromaDB for a source that is not in the manifest (ingested before it existed)."""
+        try:
+            existing = self.vector_db_client.collection.get(where={"source": file_name})
+            return existing.get("ids", []) if existing else []
+        except Exception as e:
+            logger.warning(f"[INGESTION] Could not check for existing document: {e}")
+            return []
+
+    @staticmethod
+    def _observe(result: Dict[str, Any]) -> None:
+        """Record a document's outcome, stage timings and chunk counts in the ingestion metrics."""
+        INGEST_DOCUMENTS.inc(status=result.get("status", "error"))
+        for stage, seconds in result.get("stage_seconds", {}).items():
+            INGEST_STAGE_SECONDS.observe(seconds, stage=stage)
+        for key, label in (("chunks_added", "added"), ("chunks_unchanged", "unchanged"), ("chunks_deleted", "deleted")):
+            if result.get(key):
+                INGEST_CHUNKS.inc(result[key], result=label)
+
+    def _should_stream(self, file_path: str) -> bool:
+        """Files above INGEST_STREAM_THRESHOLD_MB are ingested through the streaming pipeline."""
+        return os.path.getsize(file_path) > settings.INGEST_STREAM_THRESHOLD_MB * 1024 * 1024
+
+    async def ingest_document(self, file_path: str, file_name: str, stream: bool | None = None,
+                              progress: ProgressCallback | None = None, content_hash: str | None = None) -> Dict[str, Any]:
+        """
+        Ingest a single document. Files whose content hash matches the manifest are skipped;
+        a new file with the same content as an ingested one gets a copy of its chunks and
+        embeddings; changed files only embed the chunks that changed and drop the stale ones.
+        Includes post-ingest verification of the inserted chunks.
+
+        Args:
+            file_path (str): Path of the file on disk.
+            file_name (str): Name stored as the chunks' "source".
+            stream (bool | None): Extract, chunk and upsert incrementally with bounded memory.
+                Defaults to streaming only files above INGEST_STREAM_THRESHOLD_MB.
+            progress (ProgressCallback | None): Called with chunk counts as batches are stored.
+            content_hash (str | None): SHA-256 of the file when the caller already computed it
+                (e.g. while streaming an upload to disk), so the file is not read twice.
+        """
+        result = await self._ingest_document(file_path, file_name, stream=stream, progress=progress, content_hash=content_hash)
+        self._observe(result)
+        return result
+
+    async def _ingest_document(self, file_path: str, file_name: str, stream: bool | None = None,
+                               progress: ProgressCallback | None = None, content_hash: str | None = None) -> Dict[str, Any]:
+        """ingest_document without recording metrics (ingest_directory records its own)."""
         if not os.path.exists(file_path):
             return {"status": "error", "message": f"File not found: {file_path}", "file_name": file_name}
 
@@ -216,129 +415,504 @@ class IngestionService:
         logger.info(f"Starting ingestion of {file_name}")
 
         try:
-            # Check for existing document by filename (or hash)
-            try:
-                existing = self.vector_db_client.collection.get(where={"source": file_name}, limit=1)
-                if existing and existing.get("ids"):
-                    logger.info(f"[INGESTION] Document {file_name} already exists in DB. Skipping.")
-                    return {
-                        "status": "skipped",
-                        "message": f"Document {file_name} already exists in database. Skipped. (No duplicate ingested)",
-                        "file_name": file_name,
-                        "duplicate": True,
-                        "existing_ids": existing.get("ids", [])
-                    }
-            except Exception as e:
-                logger.warning(f"[INGESTION] Could not check for existing document: {e}")
+            # Skip unchanged content using the local manifest. Hashing and extraction block for
+            # a long time on large or scanned files, so they run in a thread: ingestion jobs share
+            # the event loop with chat requests
+            if content_hash is None:
+                content_hash = await asyncio.to_thread(hash_file, file_path)
+            unchanged = self._check_unchanged(file_name, content_hash)
+            if unchanged:
+                return unchanged
+            original = self._find_original(file_name, content_hash)
+            if original:
+                copied = await self._index_copy(file_path, file_name, content_hash, original)
+                if copied:
+                    return copied
+
+            if stream is None:
+                stream = self._should_stream(file_path)
+            if stream:
+                return await self._index_stream(file_path, file_name, content_hash, progress=progress)
 
             # Extract text
-            text = self.document_processor.extract_text(file_path)
-            if not text.strip():
-                return {"status": "warning", "message": f"No text content extracted from {file_name}", "file_name": file_name}
+            extract_start = time.perf_counter()
+            text = await asyncio.to_thread(self.document_processor.extract_text, file_path)
+            extract_seconds = time.perf_counter() - extract_start
+        except Exception as e:
+            logger.error(f"Error ingesting {file_name}: {e}")
+            return {"status": "error", "message": f"Failed to ingest document: {str(e)}", "file_name": file_name}
 
-            # Split into chunks
+        return await self._index_text(file_path, file_name, text, content_hash, extract_seconds=extract_seconds, progress=progress)
+
+    @staticmethod
+    def _chunk_ids(file_name: str, chunk_hashes: List[str], seen: Dict[str, int]) -> List[str]:
+        """
+        Content-addressed chunk ids, so an unchanged chunk keeps its id wherever it moves.
+        `seen` counts ids already issued for this file so repeated chunks stay unique across batches.
+        """
+        ids = []
+        for chunk_hash in chunk_hashes:
+            base = f"{file_name}_chunk_{chunk_hash[:16]}"
+            occurrence = seen.get(base, 0)
+            seen[base] = occurrence + 1
+            ids.append(base if occurrence == 0 else f"{base}_{occurrence}")
+        return ids
+
+    def _iter_chunks(self, blocks: Iterator[str]) -> Iterator[str]:
+        """
+        Split a stream of text blocks incrementally. The splitter only ever sees a window of
+        roughly INGEST_STREAM_BLOCK_CHARS; its last chunk is carried over into the next window
+        because it may continue in the following block. A splitter with its own streaming
+        support (TokenChunker) is used directly.
+        """
+        if isinstance(self.text_splitter, TokenChunker):
+            yield from self.text_splitter.split_stream(blocks)
+            return
+        window = max(self.chunk_size * 8, settings.INGEST_STREAM_BLOCK_CHARS)
+        buffer = ""
+        for block in blocks:
+            buffer = f"{buffer}\n{block}" if buffer else block
+            if len(buffer) < window:
+                continue
+            chunks = self.text_splitter.split_text(buffer)
+            yield from chunks[:-1]
+            buffer = chunks[-1] if chunks else ""
+        if buffer.strip():
+            yield from self.text_splitter.split_text(buffer)
+
+    async def ingest_link(self, url: str, progress: ProgressCallback | None = None) -> Dict[str, Any]:
+        """
+        Download a document from a URL and ingest it with the URL as its source.
+        A URL that was ingested before is fetched conditionally; if the server reports it
+        unchanged nothing is downloaded or embedded.
+
+        Args:
+            url (str): http(s) URL of a PDF, DOCX, TXT, image or HTML page.
+            progress (ProgressCallback | None): Called with chunk counts as batches are stored.
+        """
+        logger.info(f"Fetching {url}")
+        try:
+            fetched = await self.link_fetcher.fetch(url, conditional=self.manifest.get(url) is not None)
+        except LinkFetchError as e:
+            logger.error(f"Error fetching {url}: {e}")
+            result = {"status": "error", "message": str(e), "file_name": url, "url": url}
+            self._observe(result)
+            return result
+        if fetched["status"] == "not_modified":
+            result = {
+                "status": "skipped",
+                "message": f"{url} has not changed since it was last ingested. Skipped.",
+                "file_name": url,
+                "url": url,
+                "not_modified": True
+            }
+            self._observe(result)
+            return result
+        result = await self.ingest_document(fetched["file_path"], url, progress=progress, content_hash=fetched["content_hash"])
+        if result["status"] in ("success", "skipped"):
+            self.link_fetcher.remember(url, fetched)
+        result["url"] = url
+        result["final_url"] = fetched["final_url"]
+        return result
+
+    async def _index_text(self, file_path: str, file_name: str, text: str, content_hash: str, extract_seconds: float = 0.0,
+                          progress: ProgressCallback | None = None) -> Dict[str, Any]:
+        """Split already-extracted text into chunks and sync them with ChromaDB."""
+        if not text.strip():
+            return {"status": "warning", "message": f"No text content extracted from {file_name}", "file_name": file_name}
+
+        try:
+            split_start = time.perf_counter()
             chunks = self.text_splitter.split_text(text)
-            if not chunks:
-                return {"status": "warning", "message": f"No text chunks created from {file_name}", "file_name": file_name}
+            split_seconds = time.perf_counter() - split_start
+        except Exception as e:
+            logger.error(f"Error ingesting {file_name}: {e}")
+            return {"status": "error", "message": f"Failed to ingest document: {str(e)}", "file_name": file_name}
 
-            # Prepare metadata
-            doc_type = self.document_processor.get_document_type(file_path)
-            metadatas = [
-                {
-                    "source": file_name,
-                    "chunk": i+1,
-                    "total_chunks": len(chunks),
-                    "document_type": doc_type,
-                    "file_path": file_path,
-                    "chunk_size": len(chunk)
-                }
-                for i, chunk in enumerate(chunks)
-            ]
-            ids = [f"{file_name}_chunk_{i}" for i in range(len(chunks))]
+        async def batches() -> AsyncIterator[List[str]]:
+            for i in range(0, len(chunks), settings.INGEST_BATCH_SIZE):
+                yield chunks[i:i + settings.INGEST_BATCH_SIZE]
+
+        return await self._index_chunks(file_path, file_name, content_hash, batches(), total_chunks=len(chunks),
+                                        extract_seconds=extract_seconds, split_seconds=split_seconds, progress=progress)
 
-            # Add to vector database with error handling and duplicate detection
-            add_result = False
+    async def _index_stream(self, file_path: str, file_name: str, content_hash: str,
+                            progress: ProgressCallback | None = None) -> Dict[str, Any]:
+        """
+        Streaming ingestion: a worker thread extracts pages/blocks and splits them into chunk
+        batches, which flow through a bounded queue into the upsert stage. At most
+        INGEST_QUEUE_SIZE batches wait in memory, however large the document is.
+        """
+        chunk_iter = self._iter_chunks(self.document_processor.iter_text(file_path, settings.INGEST_STREAM_BLOCK_CHARS))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+        extract_seconds = 0.0
+
+        def next_batch() -> List[str]:
+            return list(islice(chunk_iter, settings.INGEST_BATCH_SIZE))
+
+        async def produce() -> None:
+            nonlocal extract_seconds
             try:
-                add_result = self.vector_db_client.add_documents(documents=chunks, metadatas=metadatas, ids=ids)
+                while True:
+                    start = time.perf_counter()
+                    batch = await asyncio.to_thread(next_batch)
+                    extract_seconds += time.perf_counter() - start
+                    if not batch:
+                        break
+                    await queue.put(batch)
             except Exception as e:
-                logger.error(f"Error adding documents to ChromaDB for {file_name}: {e}")
-                return {"status": "error", "message": f"Failed to add to ChromaDB: {str(e)}", "file_name": file_name}
+                await queue.put(e)
+                return
+            await queue.put(None)
+
+        async def batches() -> AsyncIterator[List[str]]:
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+        producer = asyncio.create_task(produce())
+        try:
+            result = await self._index_chunks(file_path, file_name, content_hash, batches(), progress=progress)
+        finally:
+            if not producer.done():
+                producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+        if result["status"] == "success":
+            result["streamed"] = True
+            result["extract_seconds"] = round(extract_seconds, 4)
+            # Extraction and splitting are interleaved in the producer thread
+            result["stage_seconds"]["extract"] = round(extract_seconds, 4)
+        return result
+
+    async def _index_chunks(self, file_path: str, file_name: str, content_hash: str, batches: AsyncIterator[List[str]],
+                            total_chunks: int | None = None, extract_seconds: float = 0.0, split_seconds: float = 0.0,
+                            progress: ProgressCallback | None = None) -> Dict[str, Any]:
+        """
+        Sync a file's chunks with ChromaDB one batch at a time: embed and add chunks that are new,
+        update the metadata of unchanged ones, verify each insert, and finally delete stale chunks
+        and record the file in the manifest. Up to EMBED_MAX_CONCURRENCY batches are embedded
+        concurrently by the EmbeddingScheduler while earlier batches are upserted. The result
+        carries per-file timings so callers can report throughput. When chunks are streamed,
+        total_chunks is unknown and left out of the chunk metadata.
 
-            if not add_result:
-                logger.error(f"ChromaDBClient.add_documents returned False for {file_name}. Possible duplicate or insertion error.")
-                # Check if all IDs already exist (true duplicate)
+        progress, if given, is called after every batch with a dict of chunks_embedded,
+        chunks_processed and chunks_total (None while streaming).
+
+        stage_seconds in the result breaks the time down into extract, split, embed, upsert
+        and verify. Embedding batches overlap, so embed is the sum of their durations and
+        can exceed the wall time.
+        """
+        index_start = time.perf_counter()
+        stages = {"extract": extract_seconds, "split": split_seconds, "embed": 0.0, "upsert": 0.0, "verify": 0.0}
+        try:
+            doc_type = self.document_processor.get_document_type(file_path)
+
+            # Diff against what is already stored for this file
+            entry = self.manifest.get(file_name)
+            previous_ids = list(entry["chunks"]) if entry else self._existing_ids(file_name)
+            previous = set(previous_ids)
+            current: Dict[str, str] = {}
+            seen: Dict[str, int] = {}
+            added = kept = embedded = 0
+            # Batches whose embeddings are being computed, upserted in order once ready
+            pending: deque = deque()
+
+            async def embed(documents: List[str]) -> List[List[float]]:
+                start = time.perf_counter()
                 try:
-                    verify_result = self.vector_db_client.collection.get(ids=ids)
-                    found_ids = verify_result.get("ids", []) if verify_result else []
-                    if set(found_ids) == set(ids):
-                        logger.info(f"All chunks for {file_name} already exist in ChromaDB. Duplicate detected.")
-                        return {
-                            "status": "skipped",
-                            "message": f"Document {file_name} already exists in database. Skipped. (All chunks present, no duplicate ingested)",
-                            "file_name": file_name,
-                            "duplicate": True,
-                            "existing_ids": found_ids
-                        }
-                    else:
-                        logger.error(f"Some chunks for {file_name} missing after attempted insert. Missing: {set(ids) - set(found_ids)}")
-                        return {
-                            "status": "error",
-                            "message": f"Failed to insert all chunks for {file_name}. Missing: {set(ids) - set(found_ids)}",
-                            "file_name": file_name,
-                            "missing_ids": list(set(ids) - set(found_ids))
-                        }
+                    return await self.embedding_scheduler.embed(documents)
+                finally:
+                    stages["embed"] += time.perf_counter() - start
+
+            def report() -> None:
+                if progress:
+                    progress({"chunks_embedded": embedded, "chunks_processed": embedded + kept, "chunks_total": total_chunks})
+
+            async def upsert_next() -> Dict[str, Any] | None:
+                nonlocal embedded
+                embed_task, documents, metadatas, new_ids = pending.popleft()
+                try:
+                    embeddings = await embed_task
                 except Exception as e:
-                    logger.error(f"Error during duplicate/verification check for {file_name}: {e}")
-                    return {"status": "error", "message": f"Verification error after failed insert: {str(e)}", "file_name": file_name}
+                    logger.error(f"Error embedding chunks for {file_name}: {e}")
+                    return {"status": "error", "message": f"Failed to embed chunks: {str(e)}", "file_name": file_name}
+                error = await asyncio.to_thread(self._add_chunks, file_name, documents, metadatas, new_ids, embeddings, stages)
+                if not error:
+                    embedded += len(new_ids)
+                    report()
+                return error
 
-            # Post-ingest verification: query ChromaDB for all new ids
             try:
-                verify_result = self.vector_db_client.collection.get(ids=ids)
-                found_ids = verify_result.get("ids", []) if verify_result else []
-                missing_ids = [i for i in ids if i not in found_ids]
-                if not found_ids or len(found_ids) < len(ids):
-                    logger.error(f"Post-ingest verification failed for {file_name}: {len(missing_ids)} chunks missing in ChromaDB")
-                    return {
-                        "status": "error",
-                        "message": f"Post-ingest verification failed: {len(missing_ids)} chunks missing in ChromaDB",
-                        "file_name": file_name,
-                        "missing_ids": missing_ids
-                    }
-            except Exception as e:
-                logger.error(f"Error during post-ingest verification for {file_name}: {e}")
-                return {"status": "error", "message": f"Post-ingest verification error: {str(e)}", "file_name": file_name}
+                async for chunks in batches:
+                    prepare_start = time.perf_counter()
+                    chunk_hashes = [hash_text(chunk) for chunk in chunks]
+                    ids = self._chunk_ids(file_name, chunk_hashes, seen)
+                    metadatas = []
+                    for i, chunk in enumerate(chunks):
+                        metadata = {
+                            "source": file_name,
+                            "chunk": len(current) + i + 1,
+                            "document_type": doc_type,
+                            "file_path": file_path,
+                            "chunk_size": len(chunk)
+                        }
+                        if total_chunks is not None:
+                            metadata["total_chunks"] = total_chunks
+                        metadatas.append(metadata)
+                    current.update(zip(ids, chunk_hashes))
 
-            logger.info(f"Successfully ingested {file_name} with {len(chunks)} chunks and verified in ChromaDB")
+                    new_idx = [i for i, chunk_id in enumerate(ids) if chunk_id not in previous]
+                    kept_idx = [i for i, chunk_id in enumerate(ids) if chunk_id in previous]
+                    stages["split"] += time.perf_counter() - prepare_start
+
+                    if new_idx:
+                        documents = [chunks[i] for i in new_idx]
+                        embed_task = asyncio.create_task(embed(documents))
+                        pending.append((embed_task, documents, [metadatas[i] for i in new_idx], [ids[i] for i in new_idx]))
+                        added += len(new_idx)
+                        # Keep a few batches embedding concurrently while earlier ones are upserted
+                        if len(pending) >= settings.EMBED_MAX_CONCURRENCY:
+                            error = await upsert_next()
+                            if error:
+                                return error
+
+                    # Unchanged chunks keep their embeddings; only positions and totals may have moved
+                    if kept_idx:
+                        update_start = time.perf_counter()
+                        if not self.vector_db_client.update_metadatas(
+                            ids=[ids[i] for i in kept_idx],
+                            metadatas=[metadatas[i] for i in kept_idx]
+                        ):
+                            logger.warning(f"Could not refresh metadata of unchanged chunks for {file_name}")
+                        stages["upsert"] += time.perf_counter() - update_start
+                        kept += len(kept_idx)
+                        report()
+
+                while pending:
+                    error = await upsert_next()
+                    if error:
+                        return error
+            finally:
+                for embed_task, *_ in pending:
+                    embed_task.cancel()
+
+            if not current:
+                return {"status": "warning", "message": f"No text chunks created from {file_name}", "file_name": file_name}
+
+            stale_ids = [chunk_id for chunk_id in previous_ids if chunk_id not in current]
+            delete_start = time.perf_counter()
+            if stale_ids and not self.vector_db_client.delete_documents(stale_ids):
+                logger.error(f"Failed to delete {len(stale_ids)} stale chunks for {file_name}")
+                return {
+                    "status": "error",
+                    "message": f"Failed to delete {len(stale_ids)} stale chunks for {file_name}",
+                    "file_name": file_name,
+                    "stale_ids": stale_ids
+                }
+
+            stages["upsert"] += time.perf_counter() - delete_start
+            if stale_ids:
+                self._notify("remove_chunks", stale_ids)
+            # The manifest and the listeners may write their state to disk here; keep that off the event loop
+            await asyncio.to_thread(self._commit, file_name, content_hash, current, doc_type)
+
+            ids = list(current)
+            index_seconds = time.perf_counter() - index_start
+            elapsed_seconds = extract_seconds + index_seconds
+            logger.info(f"Successfully ingested {file_name} with {len(ids)} chunks "
+                        f"({added} added, {kept} unchanged, {len(stale_ids)} deleted) and verified in ChromaDB")
             return {
                 "status": "success",
                 "message": f"Document {file_name} ingested and verified successfully (all {len(ids)} chunks present)",
                 "file_name": file_name,
-                "chunks_created": len(chunks),
+                "chunks_created": len(ids),
+                "chunks_added": added,
+                "chunks_unchanged": kept,
+                "chunks_deleted": len(stale_ids),
+                "content_hash": content_hash,
                 "document_type": doc_type,
                 "embedding_provider": self.provider,
-                "verified_ids": ids
+                "verified_ids": ids,
+                "extract_seconds": round(extract_seconds, 4),
+                "index_seconds": round(index_seconds, 4),
+                "elapsed_seconds": round(elapsed_seconds, 4),
+                "chunks_per_second": round(len(ids) / elapsed_seconds, 2) if elapsed_seconds > 0 else None,
+                "stage_seconds": {stage: round(seconds, 4) for stage, seconds in stages.items()}
             }
 
         except Exception as e:
             logger.error(f"Error ingesting {file_name}: {e}")
             return {"status": "error", "message": f"Failed to ingest document: {str(e)}", "file_name": file_name}
 
-    async def ingest_directory(self, directory_path: str) -> Dict[str, Any]:
-        """Ingest all supported documents in a directory"""
+    def _commit(self, file_name: str, content_hash: str, chunks: Dict[str, str], document_type: str) -> None:
+        """
+        Record an indexed file in the manifest, let the chunk listeners persist their state and
+        drop the cached chat answers the new content could change.
+        """
+        self.manifest.record(file_name, content_hash, chunks, document_type)
+        self._notify("commit")
+        answer_cache = get_answer_cache()
+        if answer_cache:
+            answer_cache.invalidate_document(file_name)
+
+    async def _index_copy(self, file_path: str, file_name: str, content_hash: str, original: str) -> Dict[str, Any] | None:
+        """
+        Index a file whose content is already ingested as original by copying the original's
+        chunks, embeddings included, under file_name. Nothing is embedded, and the copy can be
+        found with its own file_name filter. Returns None if the original's chunks are no longer
+        all in ChromaDB, so the caller ingests the file normally.
+        """
+        start = time.perf_counter()
+        entry = self.manifest.get(original)
+        if not entry:
+            return None
+        stages = {"upsert": 0.0, "verify": 0.0}
+        original_ids = list(entry["chunks"])
+        chunk_hashes = list(entry["chunks"].values())
+        ids = self._chunk_ids(file_name, chunk_hashes, {})
+        for batch_start in range(0, len(original_ids), settings.INGEST_BATCH_SIZE):
+            batch_ids = original_ids[batch_start:batch_start + settings.INGEST_BATCH_SIZE]
+            try:
+                stored = await asyncio.to_thread(self.vector_db_client.collection.get, ids=batch_ids,
+                                                 include=["documents", "metadatas", "embeddings"])
+            except Exception as e:
+                logger.warning(f"[INGESTION] Could not read the chunks of {original} to copy them: {e}")
+                return None
+            stored_ids = list(stored.get("ids") or [])
+            position = {chunk_id: i for i, chunk_id in enumerate(stored_ids)}
+            if any(chunk_id not in position for chunk_id in batch_ids) or stored.get("embeddings") is None:
+                logger.info(f"[INGESTION] Chunks of {original} are missing in ChromaDB; ingesting {file_name} from scratch.")
+                return None
+            order = [position[chunk_id] for chunk_id in batch_ids]
+            documents = [stored["documents"][i] for i in order]
+            metadatas = [{**(stored["metadatas"][i] or {}), "source": file_name, "file_path": file_path} for i in order]
+            embeddings = [[float(value) for value in stored["embeddings"][i]] for i in order]
+            error = await asyncio.to_thread(self._add_chunks, file_name, documents, metadatas,
+                                            ids[batch_start:batch_start + len(batch_ids)], embeddings, stages)
+            if error:
+                return error
+        await asyncio.to_thread(self._commit, file_name, content_hash, dict(zip(ids, chunk_hashes)), entry["document_type"])
+        elapsed_seconds = time.perf_counter() - start
+        logger.info(f"[INGESTION] Document {file_name} has the same content as {original}; copied its {len(ids)} chunks")
+        return {
+            "status": "success",
+            "message": f"Document {file_name} has the same content as {original}; its {len(ids)} chunks were copied without re-embedding",
+            "file_name": file_name,
+            "duplicate_of": original,
+            "chunks_created": len(ids),
+            "chunks_added": 0,
+            "chunks_copied": len(ids),
+            "chunks_unchanged": 0,
+            "chunks_deleted": 0,
+            "content_hash": content_hash,
+            "document_type": entry["document_type"],
+            "embedding_provider": self.provider,
+            "verified_ids": ids,
+            "elapsed_seconds": round(elapsed_seconds, 4),
+            "stage_seconds": {stage: round(seconds, 4) for stage, seconds in stages.items()}
+        }
+
+    def _add_chunks(self, file_name: str, documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str],
+                    embeddings: List[List[float]], stages: Dict[str, float] | None = None) -> Dict[str, Any] | None:
+        """
+        Add one batch of new chunks with their precomputed embeddings to ChromaDB and verify it.
+        Returns an error result if any chunk is missing afterwards, else None.
+        The time spent is added to stages["upsert"] and stages["verify"] when given.
+        """
+        stages = stages if stages is not None else {"upsert": 0.0, "verify": 0.0}
+        start = time.perf_counter()
+        try:
+            add_result = self.vector_db_client.add_documents(documents=documents, metadatas=metadatas, ids=ids, embeddings=embeddings)
+        except Exception as e:
+            logger.error(f"Error adding documents to ChromaDB for {file_name}: {e}")
+            return {"status": "error", "message": f"Failed to add to ChromaDB: {str(e)}", "file_name": file_name}
+
+        if not add_result:
+            logger.error(f"ChromaDBClient.add_documents returned False for {file_name}. Possible duplicate or insertion error.")
+
+        # Post-ingest verification: query ChromaDB for the new ids (also tells a true duplicate from a failed insert)
+        verify_start = time.perf_counter()
+        stages["upsert"] += verify_start - start
+        try:
+            verify_result = self.vector_db_client.collection.get(ids=ids)
+            found_ids = set(verify_result.get("ids", []) if verify_result else [])
+            missing_ids = [i for i in ids if i not in found_ids]
+            if missing_ids:
+                logger.error(f"Post-ingest verification failed for {file_name}: {len(missing_ids)} chunks missing in ChromaDB")
+                return {
+                    "status": "error",
+                    "message": f"Post-ingest verification failed: {len(missing_ids)} chunks missing in ChromaDB",
+                    "file_name": file_name,
+                    "missing_ids": missing_ids
+                }
+        except Exception as e:
+            logger.error(f"Error during post-ingest verification for {file_name}: {e}")
+            return {"status": "error", "message": f"Post-ingest verification error: {str(e)}", "file_name": file_name}
+        finally:
+            stages["verify"] += time.perf_counter() - verify_start
+        self._notify("add_chunks", ids, documents, metadatas, embeddings)
+        return None
+
+    async def ingest_directory(self, directory_path: str, workers: int | None = None,
+                               progress: ProgressCallback | None = None) -> Dict[str, Any]:
+        """
+        Ingest all supported documents in a directory.
+
+        With more than one worker, text extraction (pdfminer/docx/tesseract) runs in a
+        process pool while the event loop splits, embeds and upserts the files whose
+        extraction has already finished, so extraction overlaps with indexing.
+
+        Args:
+            directory_path (str): Directory to ingest.
+            workers (int | None): Extraction processes. Defaults to settings.INGEST_WORKERS;
+                1 ingests sequentially on the event loop.
+            progress (ProgressCallback | None): Called with files_done, files_total and
+                chunks_embedded after every file.
+        """
         if not os.path.exists(directory_path):
             return {"status": "error", "message": f"Directory not found: {directory_path}"}
-        
+
+        workers = workers or settings.INGEST_WORKERS
         results = {
             "total_files": 0, 
             "successful": 0, 
             "failed": 0, 
             "warnings": 0, 
             "skipped": 0, 
-            "details": []
+            "details": [],
+            "workers": workers
         }
         
-        logger.info(f"Starting directory ingestion from {directory_path}")
-        
+        logger.info(f"Starting directory ingestion from {directory_path} with {workers} worker(s)")
+        start = time.perf_counter()
+
+        files_total = 0
+        files_done = 0
+        chunks_embedded = 0
+        stage_seconds: Dict[str, float] = {}
+
+        def record(result: Dict[str, Any]) -> None:
+            nonlocal files_done, chunks_embedded
+            self._observe(result)
+            results["details"].append(result)
+            files_done += 1
+            if result["status"] == "success":
+                results["successful"] += 1
+            elif result["status"] == "warning":
+                results["warnings"] += 1
+            elif result["status"] == "skipped":
+                results["skipped"] += 1
+            else:
+                results["failed"] += 1
+            chunks_embedded += result.get("chunks_added", 0)
+            for stage, seconds in result.get("stage_seconds", {}).items():
+                stage_seconds[stage] = stage_seconds.get(stage, 0.0) + seconds
+            if progress:
+                progress({"files_done": files_done, "files_total": files_total,
+                          "chunks_embedded": chunks_embedded})
+
+        pending_files = []
         for filename in os.listdir(directory_path):
             file_path = os.path.join(directory_path, filename)
             
@@ -356,19 +930,86 @@ class IngestionService:
                     "message": f"Unsupported file type: {Path(file_path).suffix}"
                 })
                 continue
-            
-            result = await self.ingest_document(file_path, filename)
-            results["details"].append(result)
-            
-            if result["status"] == "success":
-                results["successful"] += 1
-            elif result["status"] == "warning":
-                results["warnings"] += 1
-            else:
-                results["failed"] += 1
+
+            pending_files.append((file_path, filename))
+
+        files_total = len(pending_files)
+        if workers <= 1:
+            for file_path, filename in pending_files:
+                record(await self._ingest_document(file_path, filename))
+        else:
+            await self._ingest_files_parallel(pending_files, workers, record)
+        await asyncio.to_thread(self.manifest.flush)
+
+        elapsed = time.perf_counter() - start
+        total_chunks = sum(d.get("chunks_created", 0) for d in results["details"])
+        results["total_chunks"] = total_chunks
+        results["elapsed_seconds"] = round(elapsed, 4)
+        results["files_per_second"] = round(results["total_files"] / elapsed, 2) if elapsed > 0 else None
+        results["chunks_per_second"] = round(total_chunks / elapsed, 2) if elapsed > 0 else None
+        # Summed over files; files are processed concurrently, so this can exceed elapsed_seconds
+        results["stage_seconds"] = {stage: round(seconds, 4) for stage, seconds in stage_seconds.items()}
         
         logger.info(f"Directory ingestion completed. Total: {results['total_files']}, "
                    f"Success: {results['successful']}, Failed: {results['failed']}, "
-                   f"Warnings: {results['warnings']}, Skipped: {results['skipped']}")
+                   f"Warnings: {results['warnings']}, Skipped: {results['skipped']}, "
+                   f"Elapsed: {results['elapsed_seconds']}s")
         
-        return results
\ No newline at end of file
+        return results
+
+    async def _ingest_files_parallel(self, files: List[tuple[str, str]], workers: int, record) -> None:
+        """
+        Extract files in a process pool and index each one as soon as its text is ready.
+        At most 2 * workers extractions are in flight so extracted text never piles up
+        in memory faster than it can be indexed. Files large enough to be streamed, and copies
+        of already ingested files, skip the pool.
+
+        Workers are spawned rather than forked: the server process already runs threads
+        (ChromaDB client, embedding loop) whose locks a forked child could inherit held.
+        """
+        loop = asyncio.get_running_loop()
+        queue = list(reversed(files))
+        # future -> (file_path, filename, content_hash, whether the future returns a finished result)
+        in_flight: Dict[asyncio.Future, tuple[str, str, str, bool]] = {}
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            async def submit_next() -> None:
+                while queue and len(in_flight) < workers * 2:
+                    file_path, filename = queue.pop()
+                    try:
+                        content_hash = await asyncio.to_thread(hash_file, file_path)
+                    except Exception as e:
+                        logger.error(f"Error hashing {filename}: {e}")
+                        record({"status": "error", "message": f"Failed to ingest document: {str(e)}", "file_name": filename})
+                        continue
+                    unchanged = self._check_unchanged(filename, content_hash)
+                    if unchanged:
+                        record(unchanged)
+                        continue
+                    logger.info(f"Starting ingestion of {filename}")
+                    indexed = self._should_stream(file_path) or self._find_original(filename, content_hash) is not None
+                    if indexed:
+                        # Streamed, or copied from an identical file (which falls back to a normal ingest)
+                        future = asyncio.ensure_future(self._ingest_document(file_path, filename, content_hash=content_hash))
+                    else:
+                        future = loop.run_in_executor(pool, _extract_text_worker, file_path)
+                    in_flight[future] = (file_path, filename, content_hash, indexed)
+
+            await submit_next()
+            while in_flight:
+                done, _ = await asyncio.wait(in_flight.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    file_path, filename, content_hash, indexed = in_flight.pop(future)
+                    if indexed:
+                        record(future.result())
+                        continue
+                    try:
+                        text, extract_seconds = future.result()
+                    except Exception as e:
+                        logger.error(f"Error extracting {filename}: {e}")
+                        record({"status": "error", "message": f"Failed to ingest document: {str(e)}", "file_name": filename})
+                        continue
+                    # Refill the pool before indexing so extraction keeps running meanwhile
+                    await submit_next()
+                    record(await self._index_text(file_path, filename, text, content_hash, extract_seconds=extract_seconds))
+                await submit_next()
@@ -0,0 +1,299 @@
+import os
+import re
+import json
+import asyncio
+import socket
+import hashlib
+import logging
+import ipaddress
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+import aiofiles
+import httpx
+from bs4 import BeautifulSoup
+from ..core.config import settings
+from .ingestion_manifest import hash_file
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE_EXTENSIONS = {
+    "application/pdf": ".pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": ".docx",
+    "application/msword": ".doc",
+    "text/plain": ".txt",
+    "text/html": ".html",
+    "application/xhtml+xml": ".html",
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/bmp": ".bmp",
+    "image/tiff": ".tiff",
+    "image/gif": ".gif",
+}
+
+
+# Redirect hops followed per download; each hop's host is checked before it is requested
+MAX_REDIRECTS = 10
+
+
+class LinkFetchError(Exception):
+    """A link could not be downloaded (bad URL, HTTP error, timeout, size cap, unsupported type)."""
+
+
+def html_to_text(html: str | bytes) -> str:
+    """
+    Visible text of an HTML page, one block per line, without scripts and styles.
+    Pass bytes to let BeautifulSoup detect the page's encoding.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript", "template", "svg"]):
+        tag.decompose()
+    lines = (line.strip() for line in soup.get_text("\n").splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class LinkFetcher:
+    """
+    Downloads documents from URLs for ingestion.
+
+    Downloads go through the app's pooled httpx.AsyncClient, stream to disk with a size cap,
+    follow redirects and are limited to max_concurrency at a time. Unless private hosts are
+    allowed, a URL (or redirect target) whose host resolves to a private, loopback or
+    link-local address is refused, so links cannot reach services on the internal network. The ETag and Last-Modified
+    validators of every ingested URL are kept in a small JSON state file so that re-fetching
+    an unchanged document is answered with 304 Not Modified and nothing is downloaded.
+    HTML pages are converted to plain text with BeautifulSoup.
+    """
+    def __init__(
+        self,
+        client: httpx.AsyncClient | None = None,
+        download_dir: str | None = None,
+        state_path: str | None = None,
+        max_bytes: int | None = None,
+        timeout: float | None = None,
+        max_concurrency: int | None = None,
+        allow_private_hosts: bool | None = None
+    ) -> None:
+        """
+        Args:
+            client (httpx.AsyncClient | None): Client to download with. Defaults to the
+                ClientRegistry's pooled client.
+            download_dir (str | None): Where downloads are stored. Defaults to settings.LINK_DOWNLOAD_DIR.
+            state_path (str | None): JSON file of per-URL validators. Defaults to settings.LINK_STATE_PATH.
+            max_bytes (int | None): Largest accepted download. Defaults to settings.LINK_MAX_MB.
+            timeout (float | None): Per-request timeout in seconds. Defaults to settings.LINK_TIMEOUT.
+            max_concurrency (int | None): Downloads in flight at once. Defaults to settings.LINK_MAX_CONCURRENCY.
+            allow_private_hosts (bool | None): Allow hosts with non-public addresses. Defaults to
+                settings.LINK_ALLOW_PRIVATE_HOSTS.
+        """
+        self._client = client
+        self.download_dir = Path(download_dir or settings.LINK_DOWNLOAD_DIR)
+        self.state_path = state_path or settings.LINK_STATE_PATH
+        self.max_bytes = max_bytes or settings.LINK_MAX_MB * 1024 * 1024
+        self.timeout = timeout or settings.LINK_TIMEOUT
+        self.max_concurrency = max_concurrency or settings.LINK_MAX_CONCURRENCY
+        self.allow_private_hosts = settings.LINK_ALLOW_PRIVATE_HOSTS if allow_private_hosts is None else allow_private_hosts
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    self._state = json.load(f)
+            except Exception as e:
+                logger.error(f"Failed to load link state {self.state_path}: {e}. Starting empty.")
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            from .client_registry import get_client_registry
+            return get_client_registry().http_client
+        return self._client
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    def _save(self) -> None:
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def remember(self, url: str, fetched: Dict[str, Any]) -> None:
+        """Store the validators of a successfully ingested download for conditional requests."""
+        with self._lock:
+            self._state[url] = {
+                "etag": fetched.get("etag"),
+                "last_modified": fetched.get("last_modified"),
+                "content_hash": fetched.get("content_hash")
+            }
+            self._save()
+
+    @staticmethod
+    def _local_name(url: str, extension: str) -> str:
+        parsed = urlparse(url)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{parsed.netloc}{parsed.path}").strip("_")[:80] or "link"
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()[:12]
+        return f"{slug}_{digest}{extension}"
+
+    @staticmethod
+    def _extension(content_type: str, url: str) -> Optional[str]:
+        extension = CONTENT_TYPE_EXTENSIONS.get(content_type)
+        if extension is None:
+            # Servers often send application/octet-stream; fall back to the URL's suffix
+            suffix = Path(urlparse(url).path).suffix.lower()
+            if suffix in CONTENT_TYPE_EXTENSIONS.values() or suffix in (".jpeg", ".htm"):
+                extension = ".html" if suffix == ".htm" else suffix
+        return extension
+
+    @staticmethod
+    def _is_public(address: str) -> bool:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+            ip = ip.ipv4_mapped
+        return not (ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved
+                    or ip.is_multicast or ip.is_unspecified)
+
+    async def _check_url(self, url: str) -> None:
+        """
+        Refuse a URL that is not http(s) or, unless private hosts are allowed, whose host
+        resolves to any non-public address.
+
+        Raises:
+            LinkFetchError: The URL may not be fetched.
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            raise LinkFetchError(f"Only http and https links are supported: {url}")
+        if self.allow_private_hosts:
+            return
+        if not parsed.hostname:
+            raise LinkFetchError(f"No host in {url}")
+        try:
+            addresses = await asyncio.get_running_loop().getaddrinfo(
+                parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80), type=socket.SOCK_STREAM
+            )
+        except (socket.gaierror, UnicodeError) as e:
+            raise LinkFetchError(f"Could not resolve {parsed.hostname}: {e}")
+        for *_, sockaddr in addresses:
+            if not self._is_public(sockaddr[0]):
+                raise LinkFetchError(f"{url} resolves to a non-public address ({sockaddr[0]})")
+
+    async def _open(self, url: str, headers: Dict[str, str]) -> httpx.Response:
+        """
+        Send a streaming GET, following redirects by hand so every hop is checked with
+        _check_url() before it is requested. The caller closes the returned response.
+        """
+        current = url
+        for _ in range(MAX_REDIRECTS + 1):
+            await self._check_url(current)
+            request = self.client.build_request("GET", current, headers=headers, timeout=self.timeout)
+            response = await self.client.send(request, stream=True)
+            if not response.has_redirect_location:
+                return response
+            await response.aclose()
+            current = str(response.url.join(response.headers["location"]))
+        raise LinkFetchError(f"Too many redirects fetching {url}")
+
+    async def fetch(self, url: str, conditional: bool = True) -> Dict[str, Any]:
+        """
+        Download a URL.
+
+        Args:
+            url (str): http(s) URL of the document.
+            conditional (bool): Send the stored ETag/Last-Modified so an unchanged document
+                is not downloaded again.
+
+        Returns:
+            Dict[str, Any]: {"status": "not_modified", "url"} when the server answered 304, else
+            {"status": "downloaded", "url", "final_url", "file_path", "content_type",
+             "content_hash", "size_bytes", "etag", "last_modified"}.
+
+        Raises:
+            LinkFetchError: The URL could not be downloaded.
+        """
+        headers = {}
+        state = self._state.get(url) if conditional else None
+        if state:
+            if state.get("etag"):
+                headers["If-None-Match"] = state["etag"]
+            if state.get("last_modified"):
+                headers["If-Modified-Since"] = state["last_modified"]
+
+        try:
+            async with self._get_semaphore():
+                response = await self._open(url, headers)
+                try:
+                    if response.status_code == 304:
+                        logger.info(f"[LINK] {url} not modified since the last download")
+                        return {"status": "not_modified", "url": url, "content_hash": (state or {}).get("content_hash")}
+                    if response.status_code >= 400:
+                        raise LinkFetchError(f"Fetching {url} failed with HTTP {response.status_code}")
+                    length = response.headers.get("content-length")
+                    if length and length.isdigit() and int(length) > self.max_bytes:
+                        raise LinkFetchError(f"{url} is larger than the {self.max_bytes} byte download limit")
+                    content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+                    final_url = str(response.url)
+                    extension = self._extension(content_type, final_url)
+                    if extension is None:
+                        raise LinkFetchError(f"Unsupported content type for {url}: {content_type or 'unknown'}")
+                    self.download_dir.mkdir(parents=True, exist_ok=True)
+                    destination = self.download_dir / self._local_name(url, extension)
+                    size = await self._download(response, destination, url)
+                    etag = response.headers.get("etag")
+                    last_modified = response.headers.get("last-modified")
+                finally:
+                    await response.aclose()
+        except httpx.TimeoutException:
+            raise LinkFetchError(f"Timed out fetching {url}")
+        except httpx.HTTPError as e:
+            raise LinkFetchError(f"Failed to fetch {url}: {e}")
+
+        if extension == ".html":
+            destination = await asyncio.to_thread(self._convert_html, destination)
+        return {
+            "status": "downloaded",
+            "url": url,
+            "final_url": final_url,
+            "file_path": str(destination),
+            "content_type": content_type,
+            "content_hash": await asyncio.to_thread(hash_file, str(destination)),
+            "size_bytes": size,
+            "etag": etag,
+            "last_modified": last_modified
+        }
+
+    async def _download(self, response: httpx.Response, destination: Path, url: str) -> int:
+        size = 0
+        part_path = destination.with_name(destination.name + ".part")
+        try:
+            async with aiofiles.open(part_path, "wb") as f:
+                async for block in response.aiter_bytes():
+                    size += len(block)
+                    if size > self.max_bytes:
+                        raise LinkFetchError(f"{url} is larger than the {self.max_bytes} byte download limit")
+                    await f.write(block)
+            os.replace(part_path, destination)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        return size
+
+    @staticmethod
+    def _convert_html(path: Path) -> Path:
+        with open(path, "rb") as f:
+            text = html_to_text(f.read())
+        text_path = path.with_suffix(".txt")
+        with open(text_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        path.unlink()
+        return text_path
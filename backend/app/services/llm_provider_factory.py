@@ -3,21 +3,56 @@ from ..core.interfaces import AbstractLLMClient, AbstractEmbeddingClient
 
 from ..adapters.ollama_adapter import OllamaAdapter
 import os
+import httpx
 from typing import Optional
 
 class LLMFactory:
     @staticmethod
-    def get_llm_client(provider: Optional[str] = None) -> AbstractLLMClient:
+    def get_llm_client(provider: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None) -> AbstractLLMClient:
+        """
+        Return the LLM client for a provider. Ollama clients reuse http_client when one is given.
+        """
         provider_str = (provider or os.getenv("LLM_PROVIDER", "ollama")).lower()
         if provider_str == "openai":
             from ..adapters.openai_adapter import OpenAIAdapter
             return OpenAIAdapter(api_key=os.getenv("OPENAI_API_KEY", ""))
-        return OllamaAdapter(host=settings.OLLAMA_HOST, port=settings.OLLAMA_PORT)
+        return OllamaAdapter(host=settings.OLLAMA_HOST, port=settings.OLLAMA_PORT, client=http_client)
+
+    @staticmethod
+    def embedding_provider() -> str:
+        """Provider that embeds chunks and queries for every LLM provider (EMBEDDING_PROVIDER)."""
+        return (settings.EMBEDDING_PROVIDER or "openai").lower()
 
     @staticmethod
-    def get_embedding_client(provider: Optional[str] = None) -> AbstractEmbeddingClient:
+    def get_embedding_client(provider: Optional[str] = None, http_client: Optional[httpx.AsyncClient] = None) -> AbstractEmbeddingClient:
         """
-        Always return an OpenAIAdapter for embeddings, regardless of provider.
+        Return the embedding client for an embedding provider (defaults to EMBEDDING_PROVIDER):
+        OllamaAdapter for "ollama" (reusing http_client when one is given), SentenceTransformerAdapter
+        for "local", else OpenAIAdapter.
+        The adapter shares the process-wide embedding cache when it is enabled.
         """
+        from .embedding_cache import get_embedding_cache
+        provider_str = (provider or LLMFactory.embedding_provider()).lower()
+        if provider_str == "ollama":
+            return OllamaAdapter(
+                host=settings.OLLAMA_HOST,
+                port=settings.OLLAMA_PORT,
+                client=http_client,
+                embedding_model=settings.OLLAMA_EMBEDDING_MODEL,
+                embed_batch_size=settings.OLLAMA_EMBED_BATCH_SIZE,
+                embed_max_concurrency=settings.OLLAMA_EMBED_MAX_CONCURRENCY,
+                cache=get_embedding_cache()
+            )
+        if provider_str == "local":
+            from ..adapters.sentence_transformers_adapter import SentenceTransformerAdapter
+            return SentenceTransformerAdapter(
+                settings.LOCAL_EMBEDDING_MODEL,
+                backend=settings.LOCAL_EMBEDDING_BACKEND,
+                onnx_file=settings.LOCAL_EMBEDDING_ONNX_FILE,
+                int8=settings.LOCAL_EMBEDDING_INT8,
+                batch_size=settings.LOCAL_EMBEDDING_BATCH_SIZE,
+                workers=settings.LOCAL_EMBEDDING_WORKERS,
+                cache=get_embedding_cache()
+            )
         from ..adapters.openai_adapter import OpenAIAdapter
-        return OpenAIAdapter(api_key=os.getenv("OPENAI_API_KEY", ""))
\ No newline at end of file
+        return OpenAIAdapter(api_key=os.getenv("OPENAI_API_KEY", ""), cache=get_embedding_cache())
\ No newline at end of file
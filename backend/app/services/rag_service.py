@@ -1,75 +1,437 @@
 import os
-from ..db.chroma_client import ChromaDBClient
+import time
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from ..core.config import settings
+from ..core.interfaces import AbstractStreamingLLMClient
+from ..core.metrics import (
+    RAG_COALESCED_REQUESTS, RAG_COMPLETION_TOKENS, RAG_PROMPT_TOKENS, RAG_RERANK_FALLBACKS, RAG_RETRIEVED_CHUNKS, RAG_STAGE_SECONDS
+)
+from ..core.debug_log import SampledLogger
+from .answer_cache import get_answer_cache
+from .bm25_index import get_bm25_index
+from .vector_mirror import get_vector_mirror
+from .reranker import get_reranker
+from .context_builder import build_context, context_token_budget
+from .single_flight import SingleFlight
+from ..db.chroma_client import ChromaDBClient, collection_name_for
 from .llm_provider_factory import LLMFactory
 from app.services.ingestion_service import AsyncEmbeddingFunction
+from .embedding_scheduler import EmbeddingScheduler, estimate_tokens
+
+logger = logging.getLogger(__name__)
+debug_log = SampledLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a query, used to recognize identical requests."""
+    return " ".join(query.casefold().split())
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked id lists: every list contributes 1 / (k + rank) to an id's score (rank from 1).
+    Returns (id, score) pairs, best first; ties keep the order in which ids were first seen.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
 
 class RAGService:
-    def __init__(self, provider: str = '', chroma_host=None, chroma_port=None):
-        self.llm_client = LLMFactory.get_llm_client(provider)
-        if provider == "ollama":
-            self.embedding_client = LLMFactory.get_embedding_client("openai")
-            embedding_provider = "openai"
-        else:
-            self.embedding_client = LLMFactory.get_embedding_client(provider)
-            embedding_provider = provider
+    def __init__(self, provider: str = '', chroma_host=None, chroma_port=None,
+                 llm_client=None, embedding_client=None, vector_db_client=None, answer_cache=None,
+                 retrieval_mode: str | None = None, lexical_index=None, vector_mirror=None,
+                 reranker=None):
+        """
+        Args:
+            provider (str): LLM provider ("ollama" or "openai").
+            chroma_host, chroma_port: ChromaDB location when no vector_db_client is given.
+            llm_client, embedding_client, vector_db_client: Long-lived clients to reuse
+                (see ClientRegistry). Any client not given is created for this instance.
+            answer_cache: SemanticAnswerCache to consult; defaults to the process-wide one.
+            retrieval_mode (str | None): "vector" or "hybrid". Defaults to settings.RETRIEVAL_MODE.
+            lexical_index: BM25Index for hybrid retrieval; defaults to the process-wide one.
+            vector_mirror: VectorMirror searched instead of ChromaDB once it is complete;
+                defaults to the process-wide one (None unless VECTOR_MIRROR_ENABLED).
+            reranker: CrossEncoderReranker applied to RERANK_CANDIDATES retrieved chunks;
+                defaults to the process-wide one (None unless RERANK_ENABLED).
+        """
+        self.provider = provider
+        self.retrieval_mode = (retrieval_mode or settings.RETRIEVAL_MODE).lower()
+        self.lexical_index = lexical_index if lexical_index is not None else get_bm25_index()
+        self.vector_mirror = vector_mirror if vector_mirror is not None else get_vector_mirror()
+        self.reranker = reranker if reranker is not None else get_reranker()
+        self.top_k = settings.RETRIEVAL_TOP_K
+        self.single_flight = SingleFlight() if settings.CHAT_COALESCE_ENABLED else None
+        self.answer_cache = answer_cache if answer_cache is not None else get_answer_cache()
+        self.llm_client = llm_client or LLMFactory.get_llm_client(provider)
+        # Queries are embedded by the same provider as the chunks, whatever the LLM provider
+        embedding_provider = LLMFactory.embedding_provider()
+        self.embedding_client = embedding_client or LLMFactory.get_embedding_client(embedding_provider)
 
-        embedding_function = AsyncEmbeddingFunction(self.embedding_client, name=embedding_provider)
-        if "PYTEST_CURRENT_TEST" not in os.environ:
+        if vector_db_client is not None:
+            self.vector_db_client = vector_db_client
+        elif "PYTEST_CURRENT_TEST" not in os.environ:
+            embedding_function = AsyncEmbeddingFunction(self.embedding_client, name=embedding_provider)
             self.vector_db_client = ChromaDBClient(
                 host=chroma_host,
                 port=chroma_port,
-                embedding_function=embedding_function
+                embedding_function=embedding_function,
+                collection_name=collection_name_for(getattr(self.embedding_client, "embedding_model", None))
             )
         else:
             self.vector_db_client = None
 
-    async def answer_query(self, query: str, file_name: str | None = None) -> str:
-        # 1. Create embedding for the query (Ollama)
-        print(f"[RETRIEVAL DEBUG] Query received: {query} (file_name: {file_name})")
-        query_embedding = await self.embedding_client.create_embedding(query)
-        print(f"[RETRIEVAL DEBUG] Query embedding: {query_embedding}")
+    @contextmanager
+    def _stage(self, timings: Dict[str, float] | None, name: str) -> Iterator[None]:
+        """
+        Record the time spent in the block in the rag_stage_seconds histogram, and add it
+        to timings[name] (seconds) if timings is given.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            RAG_STAGE_SECONDS.observe(seconds, provider=self.provider or "default", stage=name)
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + seconds
+
+    async def _embed_query(self, query: str) -> list[float]:
+        # 1. Create embedding for the query (the only embedding call for this request)
+        return await self.embedding_client.create_embedding(query)
 
-        # 2. Retrieve relevant documents, filtered by file_name if provided
-        filter_metadata = None
-        if file_name:
-            filter_metadata = {"source": file_name}
+    async def _retrieve(self, query_embedding: list[float], file_name: str | None = None,
+                        query: str | None = None, limit: int | None = None) -> Dict[str, Any] | None:
+        # 2. Retrieve relevant documents with the precomputed embedding, filtered by file_name if provided
+        filter_metadata = {"source": file_name} if file_name else None
+        limit = limit or self.top_k
 
         if self.vector_db_client:
-            # Try to filter by file_name if provided, else fallback
-            # Only use filtering if the method supports it; otherwise, fallback
-            import inspect
-            sig = inspect.signature(self.vector_db_client.query_documents)
-            filter_param = None
-            for candidate in ["where", "filters", "metadata_filter"]:
-                if candidate in sig.parameters:
-                    filter_param = candidate
-                    break
-            if filter_metadata and filter_param:
-                kwargs = {filter_param: filter_metadata}
-                print(f"[RETRIEVAL DEBUG] Querying vector DB with filter: {kwargs}")
-                retrieved_docs = self.vector_db_client.query_documents(query_texts=[query], n_results=3, **kwargs)
-            else:
-                print(f"[RETRIEVAL DEBUG] Querying vector DB without filter.")
-                retrieved_docs = self.vector_db_client.query_documents(query_texts=[query], n_results=3)
+            if self.retrieval_mode == "hybrid" and self.lexical_index is not None and query:
+                return await self._hybrid_retrieve(query, query_embedding, file_name, limit)
+            return await self._vector_query(query_embedding, limit, filter_metadata)
+        # Mocked response for test mode
+        return {"documents": [["This is a mocked document."]], "metadatas": [[{"source": "mocked.pdf", "page": 1}]], "ids": [["mocked_id"]]}
+
+    async def _vector_query(self, query_embedding: list[float], n_results: int,
+                            where: Dict[str, Any] | None) -> Dict[str, Any] | None:
+        """Dense search in the in-process vector mirror when it can answer, else in ChromaDB."""
+        # Both are synchronous; keep the event loop free while they run
+        if self.vector_mirror is not None and self.vector_mirror.ready:
+            result = await asyncio.to_thread(self.vector_mirror.query, query_embedding, n_results, where)
+            if result is not None:
+                return result
+        return await asyncio.to_thread(
+            self.vector_db_client.query_documents,
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            where=where
+        )
+
+    async def _hybrid_retrieve(self, query: str, query_embedding: list[float], file_name: str | None,
+                               limit: int) -> Dict[str, Any]:
+        """
+        Run BM25 and vector search concurrently, each for HYBRID_CANDIDATES chunks, and keep
+        the best limit chunks by reciprocal rank fusion. Chunks found only by BM25 are fetched
+        from ChromaDB by id. Returns the same shape as a Chroma query.
+        """
+        candidates = max(limit, settings.HYBRID_CANDIDATES)
+        dense, lexical = await asyncio.gather(
+            self._vector_query(query_embedding, candidates, {"source": file_name} if file_name else None),
+            asyncio.to_thread(self.lexical_index.search, query, candidates, file_name)
+        )
+        found: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        dense_ids = dense["ids"][0] if dense and dense.get("ids") else []
+        for i, chunk_id in enumerate(dense_ids):
+            found[chunk_id] = (dense["documents"][0][i], dense["metadatas"][0][i])
+        fused = reciprocal_rank_fusion([dense_ids, [chunk_id for chunk_id, _ in lexical]], k=settings.RRF_K)[:limit]
+
+        missing = [chunk_id for chunk_id, _ in fused if chunk_id not in found]
+        if missing:
+            source = self.vector_mirror if self.vector_mirror is not None and self.vector_mirror.ready else self.vector_db_client
+            extra = await asyncio.to_thread(source.get_documents, missing)
+            for chunk_id, document, metadata in zip(extra.get("ids") or [], extra.get("documents") or [], extra.get("metadatas") or []):
+                found[chunk_id] = (document, metadata)
+        ranked = [(chunk_id, score) for chunk_id, score in fused if chunk_id in found]
+        return {
+            "ids": [[chunk_id for chunk_id, _ in ranked]],
+            "documents": [[found[chunk_id][0] for chunk_id, _ in ranked]],
+            "metadatas": [[found[chunk_id][1] for chunk_id, _ in ranked]],
+            "scores": [[score for _, score in ranked]]
+        }
+
+    async def _retrieve_context(self, query: str, query_embedding: list[float], file_name: str | None,
+                                timings: Dict[str, float] | None) -> Dict[str, Any] | None:
+        """Retrieve top_k chunks, or RERANK_CANDIDATES chunks narrowed to top_k by the reranker."""
+        if self.reranker is None:
+            with self._stage(timings, "retrieve"):
+                return await self._retrieve(query_embedding, file_name, query)
+        with self._stage(timings, "retrieve"):
+            candidates = await self._retrieve(query_embedding, file_name, query,
+                                              limit=max(self.top_k, settings.RERANK_CANDIDATES))
+        with self._stage(timings, "rerank"):
+            return await self._rerank(query, candidates)
+
+    async def _rerank(self, query: str, retrieved_docs: Dict[str, Any] | None) -> Dict[str, Any] | None:
+        """
+        Reorder the retrieved candidates by cross-encoder score and keep top_k of them. If the
+        reranker misses its RERANK_BUDGET_MS budget, the top_k candidates in retrieval order are kept.
+        """
+        if not retrieved_docs or not retrieved_docs.get("documents") or not retrieved_docs["documents"][0]:
+            return retrieved_docs
+        documents = retrieved_docs["documents"][0]
+        scores = await self.reranker.rerank(query, documents, settings.RERANK_BUDGET_MS / 1000)
+        if scores is None or len(scores) != len(documents):
+            RAG_RERANK_FALLBACKS.inc(provider=self.provider or "default")
+            order = list(range(min(self.top_k, len(documents))))
+            scores = None
         else:
-            # Mocked response for test mode
-            print(f"[RETRIEVAL DEBUG] Using mocked response for retrieval.")
-            retrieved_docs = {"documents": [["This is a mocked document."]], "metadatas": [[{"source": "mocked.pdf", "page": 1}]], "ids": [["mocked_id"]]}
+            order = sorted(range(len(documents)), key=lambda i: scores[i], reverse=True)[:self.top_k]
+        reranked = {key: [[values[0][i] for i in order]] for key, values in retrieved_docs.items()
+                    if isinstance(values, list) and values and isinstance(values[0], list) and len(values[0]) == len(documents)}
+        if scores is not None:
+            reranked["rerank_scores"] = [[scores[i] for i in order]]
+        return reranked
 
-        context = ""
+    def _cache_answer(self, file_name: str | None, query_embedding: list[float], response: str,
+                      retrieved_docs: Dict[str, Any] | None) -> None:
+        """
+        Cache an answer, unless it was generated without any retrieved context (retrieval
+        failed, or the document asked about is not ingested yet): that answer goes stale as
+        soon as the context exists.
+        """
+        documents = retrieved_docs.get("documents") if retrieved_docs else None
+        if self.answer_cache and documents and any(documents):
+            self.answer_cache.store(self.provider, file_name, query_embedding, response, self._sources(retrieved_docs))
+
+    @staticmethod
+    def _sources(retrieved_docs: Dict[str, Any] | None) -> set[str]:
+        """Names of the documents the retrieved context came from."""
+        metadatas = retrieved_docs.get("metadatas") if retrieved_docs else None
+        return {m["source"] for sublist in metadatas or [] if sublist for m in sublist if m and "source" in m}
+
+    def _build_prompt(self, query: str, retrieved_docs: Dict[str, Any] | None) -> str:
         documents = retrieved_docs.get('documents') if retrieved_docs else None
-        print(f"[RETRIEVAL DEBUG] Retrieved documents: {documents}")
-        if documents:
-            context = "\n".join([doc for sublist in documents if sublist for doc in sublist])
-            print(f"[RETRIEVAL DEBUG] Combined context for LLM: {context[:300]}... (truncated)")
+        metadatas = retrieved_docs.get('metadatas') if retrieved_docs else None
+        chunks = [doc for sublist in documents if sublist for doc in sublist] if documents else []
+        chunk_metadatas = [m for sublist in metadatas if sublist for m in sublist] if metadatas else []
+        if len(chunk_metadatas) != len(chunks):
+            chunk_metadatas = [None] * len(chunks)
+        RAG_RETRIEVED_CHUNKS.observe(len(chunks), provider=self.provider or "default")
+        # Neighbouring chunks are merged without their overlap and the context is packed up to the model's budget
+        context, _ = build_context(chunks, chunk_metadatas, context_token_budget(getattr(self.llm_client, "model", None)))
 
         # 3. Augment prompt with context
         if context:
             prompt = f"Based on the following context, answer the question: {context}\n\nQuestion: {query}"
         else:
             prompt = f"No specific context found. Answer the question: {query}"
-        print(f"[RETRIEVAL DEBUG] Final prompt to LLM: {prompt[:300]}... (truncated)")
+        RAG_PROMPT_TOKENS.inc(estimate_tokens(prompt), provider=self.provider or "default")
+        if debug_log.sampled():
+            debug_log.logger.debug("Query %.200r: %d chunks from %s, prompt %.300r", query, len(chunks),
+                                   sorted(self._sources(retrieved_docs)), prompt)
+        return prompt
+
+    async def answer_query(self, query: str, file_name: str | None = None, timings: Dict[str, float] | None = None) -> str:
+        """
+        Answer a query from the retrieved context.
+
+        Concurrent calls for the same normalized query and file_name share one pipeline run
+        (CHAT_COALESCE_ENABLED). A caller that is cancelled does not cancel the run for the others.
+
+        Args:
+            query (str): User question.
+            file_name (str | None): Restrict retrieval to one source document.
+            timings (Dict[str, float] | None): Filled with the seconds spent per stage
+                (embed, cache, retrieve, rerank, context, generate), or with the time spent
+                waiting ("coalesced") when another request computed the answer.
+        """
+        if self.single_flight is None:
+            return await self._answer_query(query, file_name, timings)
+        start = time.perf_counter()
+        run_timings: Dict[str, float] = {}
+        response, shared = await self.single_flight.do(
+            (normalize_query(query), self.provider, file_name or ""),
+            lambda: self._answer_query(query, file_name, run_timings)
+        )
+        if shared:
+            RAG_COALESCED_REQUESTS.inc(provider=self.provider or "default")
+            if timings is not None:
+                timings["coalesced"] = time.perf_counter() - start
+        elif timings is not None:
+            timings.update(run_timings)
+        return response
+
+    async def _answer_query(self, query: str, file_name: str | None, timings: Dict[str, float] | None) -> str:
+        with self._stage(timings, "embed"):
+            query_embedding = await self._embed_query(query)
+        if self.answer_cache:
+            with self._stage(timings, "cache"):
+                cached = self.answer_cache.lookup(self.provider, file_name, query_embedding)
+            if cached is not None:
+                debug_log.debug("Query %.200r answered from the answer cache", query)
+                return cached
+
+        retrieved_docs = await self._retrieve_context(query, query_embedding, file_name, timings)
+        return await self._generate_answer(query, file_name, query_embedding, retrieved_docs, timings)
+
+    async def _generate_answer(self, query: str, file_name: str | None, query_embedding: list[float],
+                               retrieved_docs: Dict[str, Any] | None, timings: Dict[str, float] | None) -> str:
+        """Build the prompt from the retrieved context, generate the answer and cache it."""
+        with self._stage(timings, "context"):
+            prompt = self._build_prompt(query, retrieved_docs)
 
         # 4. Generate response (Ollama)
-        response = await self.llm_client.generate_response(prompt)
-        return response
\ No newline at end of file
+        with self._stage(timings, "generate"):
+            response = await self.llm_client.generate_response(prompt)
+        RAG_COMPLETION_TOKENS.inc(estimate_tokens(response), provider=self.provider or "default")
+        self._cache_answer(file_name, query_embedding, response, retrieved_docs)
+        return response
+
+    async def _retrieve_batch(self, queries: List[str], query_embeddings: List[list[float]],
+                              file_names: List[str | None]) -> List[Dict[str, Any] | None]:
+        """
+        Retrieve context for many queries. Plain vector retrieval from ChromaDB sends one
+        multi-query collection.query per distinct file_name filter; hybrid retrieval and the
+        vector mirror (single-query paths) run per query, concurrently. Reranking is applied per query.
+        """
+        limit = max(self.top_k, settings.RERANK_CANDIDATES) if self.reranker is not None else self.top_k
+        per_query = (
+            self.vector_db_client is None
+            or (self.vector_mirror is not None and self.vector_mirror.ready)
+            or (self.retrieval_mode == "hybrid" and self.lexical_index is not None)
+        )
+        if per_query:
+            retrieved = list(await asyncio.gather(*(
+                self._retrieve(embedding, file_name, query, limit=limit)
+                for query, embedding, file_name in zip(queries, query_embeddings, file_names)
+            )))
+        else:
+            retrieved: List[Dict[str, Any] | None] = [None] * len(queries)
+            groups: Dict[Optional[str], List[int]] = {}
+            for i, file_name in enumerate(file_names):
+                groups.setdefault(file_name or None, []).append(i)
+
+            async def query_group(file_name: str | None, indexes: List[int]) -> None:
+                result = await asyncio.to_thread(
+                    self.vector_db_client.query_documents,
+                    query_embeddings=[query_embeddings[i] for i in indexes],
+                    n_results=limit,
+                    where={"source": file_name} if file_name else None
+                )
+                # Split the per-query lists (ids, documents, metadatas, distances) of the combined result
+                for position, i in enumerate(indexes):
+                    retrieved[i] = {key: [values[position]] for key, values in (result or {}).items()
+                                    if isinstance(values, list) and len(values) == len(indexes)
+                                    and all(isinstance(value, list) for value in values)}
+            await asyncio.gather(*(query_group(file_name, indexes) for file_name, indexes in groups.items()))
+        if self.reranker is not None:
+            retrieved = list(await asyncio.gather(*(self._rerank(query, docs) for query, docs in zip(queries, retrieved))))
+        return retrieved
+
+    async def answer_batch(self, items: List[Tuple[str, str | None]],
+                           concurrency: int | None = None) -> AsyncIterator[Tuple[int, str | Exception]]:
+        """
+        Answer many (query, file_name) pairs, yielding (index, answer) as each answer is ready,
+        or (index, exception) for a query whose generation failed.
+
+        All queries are embedded together (one request per EMBED_BATCH_MAX_INPUTS queries),
+        answers found in the answer cache are yielded first, retrieval is batched (see
+        _retrieve_batch) and at most concurrency generations (CHAT_BATCH_CONCURRENCY) run at once.
+        Closing the iterator cancels the generations that have not finished.
+        """
+        if not items:
+            return
+        queries = [query for query, _ in items]
+        file_names = [file_name for _, file_name in items]
+        # Whole-batch durations get their own stage labels so they do not skew per-query latencies
+        with self._stage(None, "batch_embed"):
+            query_embeddings = await EmbeddingScheduler(self.embedding_client).embed(queries)
+
+        pending = []
+        for i, (query, file_name) in enumerate(items):
+            cached = self.answer_cache.lookup(self.provider, file_name, query_embeddings[i]) if self.answer_cache else None
+            if cached is not None:
+                yield i, cached
+            else:
+                pending.append(i)
+        if not pending:
+            return
+
+        with self._stage(None, "batch_retrieve"):
+            retrieved = await self._retrieve_batch([queries[i] for i in pending], [query_embeddings[i] for i in pending],
+                                                   [file_names[i] for i in pending])
+        slots = asyncio.Semaphore(concurrency or settings.CHAT_BATCH_CONCURRENCY)
+
+        async def answer(i: int, retrieved_docs: Dict[str, Any] | None) -> Tuple[int, str | Exception]:
+            async with slots:
+                try:
+                    return i, await self._generate_answer(queries[i], file_names[i], query_embeddings[i], retrieved_docs, None)
+                except Exception as e:
+                    logger.warning(f"Batch query {i} failed: {e}")
+                    return i, e
+
+        tasks = [asyncio.ensure_future(answer(i, docs)) for i, docs in zip(pending, retrieved)]
+        try:
+            for next_answer in asyncio.as_completed(tasks):
+                yield await next_answer
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def stream_answer(self, query: str, file_name: str | None = None,
+                            timings: Dict[str, float] | None = None) -> AsyncIterator[str]:
+        """
+        Same pipeline as answer_query, but yields the answer token by token as the LLM
+        produces it. Clients without streaming support, and cached answers, are yielded at once.
+        timings gets the same stages as answer_query; generate covers the time spent waiting
+        on the LLM, not on the consumer of the stream.
+        """
+        with self._stage(timings, "embed"):
+            query_embedding = await self._embed_query(query)
+        if self.answer_cache:
+            with self._stage(timings, "cache"):
+                cached = self.answer_cache.lookup(self.provider, file_name, query_embedding)
+            if cached is not None:
+                debug_log.debug("Query %.200r answered from the answer cache", query)
+                yield cached
+                return
+
+        retrieved_docs = await self._retrieve_context(query, query_embedding, file_name, timings)
+        with self._stage(timings, "context"):
+            prompt = self._build_prompt(query, retrieved_docs)
+
+        # Only time spent waiting on the LLM counts; time the consumer takes to read each
+        # token (a slow SSE client, for example) is not part of generate
+        generate_seconds = 0.0
+        if isinstance(self.llm_client, AbstractStreamingLLMClient):
+            tokens = []
+            stream = self.llm_client.stream_response(prompt)
+            while True:
+                started = time.perf_counter()
+                try:
+                    token = await stream.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    generate_seconds += time.perf_counter() - started
+                tokens.append(token)
+                yield token
+            response = "".join(tokens)
+        else:
+            started = time.perf_counter()
+            response = await self.llm_client.generate_response(prompt)
+            generate_seconds = time.perf_counter() - started
+            yield response
+        RAG_STAGE_SECONDS.observe(generate_seconds, provider=self.provider or "default", stage="generate")
+        RAG_COMPLETION_TOKENS.inc(estimate_tokens(response), provider=self.provider or "default")
+        if timings is not None:
+            timings["generate"] = generate_seconds
+        # Only complete answers are cached; an interrupted stream never reaches this point
+        self._cache_answer(file_name, query_embedding, response, retrieved_docs)
@@ -0,0 +1,102 @@
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Scores (query, chunk) pairs with a small sentence-transformers cross-encoder on CPU.
+
+    All candidates of a query are scored in one batched forward pass. Scoring runs on a
+    dedicated thread pool so a slow model never holds up the default executor, and every call
+    has a latency budget: rerank() returns None when the budget runs out (or the model is not
+    loaded yet) so the caller keeps the retrieval order. Work that is still queued when its
+    budget has passed is dropped instead of scored.
+    """
+    def __init__(self, model_name: str, max_length: int = 512, workers: int = 1, model: Any = None) -> None:
+        """
+        Args:
+            model_name (str): Hugging Face name of the cross-encoder.
+            max_length (int): Token limit per (query, chunk) pair; longer chunks are truncated.
+            workers (int): Concurrent forward passes.
+            model: Already loaded model with a predict(pairs, batch_size=...) method (e.g. for tests).
+        """
+        self.model_name = model_name
+        self.max_length = max_length
+        self._model = model
+        self._load_lock = threading.Lock()
+        self._load_failed = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rerank")
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> bool:
+        """Load the model (blocking) unless it is loaded already. Returns whether it is available."""
+        with self._load_lock:
+            if self._model is None and not self._load_failed:
+                try:
+                    from sentence_transformers import CrossEncoder
+                    start = time.perf_counter()
+                    self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+                    logger.info(f"Loaded reranker {self.model_name} in {time.perf_counter() - start:.1f}s")
+                except Exception as e:
+                    self._load_failed = True
+                    logger.error(f"Could not load reranker {self.model_name}: {e}. Retrieval order is kept.")
+        return self._model is not None
+
+    def score(self, query: str, documents: Sequence[str]) -> List[float]:
+        """Relevance score per document (higher is better), from a single batched forward pass."""
+        if not documents or not self.load():
+            return []
+        scores = self._model.predict([(query, document) for document in documents],
+                                     batch_size=len(documents), show_progress_bar=False)
+        return [float(score) for score in scores]
+
+    async def rerank(self, query: str, documents: Sequence[str], budget_seconds: float) -> Optional[List[float]]:
+        """
+        score() within budget_seconds, or None if the budget runs out, the model is not loaded
+        yet (loading starts in the background) or scoring fails.
+        """
+        if not documents:
+            return []
+        if not self.loaded:
+            if not self._load_failed:
+                self._executor.submit(self.load)
+            return None
+        deadline = time.monotonic() + budget_seconds
+
+        def score_in_time() -> Optional[List[float]]:
+            # Skip the forward pass if the request gave up while this call waited for a worker
+            if time.monotonic() >= deadline:
+                return None
+            return self.score(query, documents)
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._executor, score_in_time), budget_seconds)
+        except asyncio.TimeoutError:
+            return None
+        except Exception as e:
+            logger.warning(f"Reranking failed, keeping retrieval order: {e}")
+            return None
+
+
+_reranker: Optional[CrossEncoderReranker] = None
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """Process-wide reranker, or None when RERANK_ENABLED is off. The model loads on first use."""
+    global _reranker
+    if not settings.RERANK_ENABLED:
+        return None
+    if _reranker is None:
+        _reranker = CrossEncoderReranker(settings.RERANK_MODEL, settings.RERANK_MAX_LENGTH, settings.RERANK_WORKERS)
+    return _reranker
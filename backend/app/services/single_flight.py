@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation.
+
+    The first caller for a key starts the computation in its own task; callers that arrive
+    while it runs await the same task and get the same result or exception. Each caller waits
+    through asyncio.shield, so a caller that is cancelled (e.g. its client disconnected) only
+    stops waiting. The computation is cancelled only once every caller has gone away.
+    """
+    def __init__(self) -> None:
+        # key -> (task, number of callers waiting for it)
+        self._calls: Dict[Hashable, Tuple[asyncio.Task, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run factory() unless a call with the same key is in flight, and return (result, shared).
+
+        Args:
+            key (Hashable): Identity of the computation.
+            factory (Callable[[], Awaitable[Any]]): Starts the computation; only called by the first caller.
+
+        Returns:
+            The result, and whether it came from a computation started by another caller.
+        """
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            task = asyncio.ensure_future(factory())
+            task.add_done_callback(lambda _, key=key, task=task: self._forget(key, task))
+        else:
+            task = call[0]
+        self._calls[key] = (task, (call[1] if call else 0) + 1)
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if not task.done() and key in self._calls and self._calls[key][0] is task:
+                waiting = self._calls[key][1] - 1
+                if waiting == 0:
+                    # Forget the key before the task is cancelled, so a caller arriving before the
+                    # cancellation completes starts a new run instead of joining the cancelled one
+                    del self._calls[key]
+                    task.cancel()
+                else:
+                    self._calls[key] = (task, waiting)
+            raise
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if key in self._calls and self._calls[key][0] is task:
+            del self._calls[key]
@@ -0,0 +1,102 @@
+import re
+from typing import Callable, Iterable, Iterator, List, Tuple
+from .embedding_scheduler import estimate_tokens
+
+# A sentence-like unit: text up to and including sentence punctuation or a line break,
+# plus the whitespace that follows. Every character of a text belongs to exactly one unit.
+_UNIT_PATTERN = re.compile(r"[^.!?\n]+[.!?]*\s*|[.!?\n]+\s*")
+_WORD_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+class TokenChunker:
+    """
+    Single-pass text splitter that sizes chunks in embedding tokens.
+
+    Drop-in alternative to langchain's RecursiveCharacterTextSplitter (same split_text()
+    interface). The text is scanned once into sentence-like units which are packed greedily
+    into chunks of at most chunk_size tokens; units longer than a chunk fall back to word
+    and then character boundaries. Because chunks are measured with the same token counter
+    the EmbeddingScheduler uses, embedding batches can be budgeted exactly, and the overlap
+    is expressed in tokens rather than characters.
+    """
+    def __init__(
+        self,
+        chunk_size: int = 256,
+        chunk_overlap: int = 0,
+        token_counter: Callable[[str], int] = estimate_tokens
+    ) -> None:
+        """
+        Args:
+            chunk_size (int): Maximum tokens per chunk.
+            chunk_overlap (int): Tokens of trailing context repeated at the start of the next chunk.
+            token_counter (Callable[[str], int]): Counts the tokens of a piece of text.
+        """
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.count_tokens = token_counter
+
+    def split_text(self, text: str) -> List[str]:
+        """Split a text into chunks of at most chunk_size tokens."""
+        return list(self._pack(self._units(text)))
+
+    def split_stream(self, blocks: Iterable[str]) -> Iterator[str]:
+        """
+        Split a stream of text blocks (pages, paragraphs) joined by line breaks, yielding chunks
+        as soon as they are complete. Memory use is bounded by one block plus one chunk.
+        """
+        def units() -> Iterator[Tuple[str, int]]:
+            for block in blocks:
+                yield from self._units(block + "\n")
+        return self._pack(units())
+
+    def _units(self, text: str) -> Iterator[Tuple[str, int]]:
+        for match in _UNIT_PATTERN.finditer(text):
+            unit = match.group()
+            tokens = self.count_tokens(unit)
+            if tokens <= self.chunk_size:
+                yield unit, tokens
+            else:
+                yield from self._split_long(unit)
+
+    def _split_long(self, unit: str) -> Iterator[Tuple[str, int]]:
+        # A sentence longer than a chunk is split between words, and a word longer than a
+        # chunk (e.g. a base64 blob) into pieces of roughly chunk_size tokens
+        for match in _WORD_PATTERN.finditer(unit):
+            word = match.group()
+            tokens = self.count_tokens(word)
+            if tokens <= self.chunk_size:
+                yield word, tokens
+                continue
+            step = max(1, len(word) * self.chunk_size // tokens)
+            for start in range(0, len(word), step):
+                piece = word[start:start + step]
+                yield piece, min(self.count_tokens(piece), self.chunk_size)
+
+    def _pack(self, units: Iterator[Tuple[str, int]]) -> Iterator[str]:
+        current: List[Tuple[str, int]] = []
+        current_tokens = 0
+        for unit, tokens in units:
+            if current and current_tokens + tokens > self.chunk_size:
+                chunk = "".join(text for text, _ in current).strip()
+                if chunk:
+                    yield chunk
+                # Keep trailing units as overlap, as long as the next unit still fits
+                keep = 0
+                kept_tokens = 0
+                for _, unit_tokens in reversed(current):
+                    if kept_tokens + unit_tokens > self.chunk_overlap or kept_tokens + unit_tokens + tokens > self.chunk_size:
+                        break
+                    kept_tokens += unit_tokens
+                    keep += 1
+                current = current[len(current) - keep:] if keep else []
+                current_tokens = kept_tokens
+                # Overlap made only of whitespace adds nothing
+                if not "".join(text for text, _ in current).strip():
+                    current, current_tokens = [], 0
+            current.append((unit, tokens))
+            current_tokens += tokens
+        chunk = "".join(text for text, _ in current).strip()
+        if chunk:
+            yield chunk
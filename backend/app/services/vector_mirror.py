@@ -0,0 +1,503 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+from ..core.config import settings
+from ..core.interfaces import ChunkListener
+from ..core.metrics import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: only one process may write to the mirror
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_BLOCK_ROWS = 65536
+_SQLITE_MAX_VARIABLES = 500
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, block: int = 4096) -> np.ndarray:
+    """Index of the most similar centroid for every (normalized) vector, computed in blocks."""
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), block):
+        chunk = np.asarray(vectors[start:start + block], dtype=np.float32)
+        assignments[start:start + block] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+class VectorMirror(ChunkListener):
+    """
+    In-process read replica of the rag_documents collection for retrieval without a
+    round-trip to the Chroma server.
+
+    Normalized embeddings live in a memory-mapped float32 (or float16) matrix; per-row source
+    ids, a live flag and an IVF list number live in small memory-mapped arrays next to it, and
+    chunk ids, texts and metadata in a SQLite table. Queries are a blocked NumPy dot product
+    plus top-k (cosine similarity), or, above VECTOR_MIRROR_IVF_MIN_ROWS chunks, an IVF index:
+    k-means centroids pick the VECTOR_MIRROR_IVF_PROBES closest lists and only their rows are
+    scored.
+
+    Rows are append-only; removed chunks are flagged dead. state.json records the committed
+    row count and is replaced atomically, so processes that share the directory (e.g. gunicorn
+    workers) map the same pages from the page cache and only ever read fully written rows.
+    Writers serialize on a file lock.
+    """
+    def __init__(self, directory: str, dtype: str = "float32") -> None:
+        """
+        Args:
+            directory (str): Directory of the mirror files; created if missing.
+            dtype (str): "float32" or "float16" for new mirrors. An existing mirror keeps its dtype.
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, "table.sqlite3"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS rows (row INTEGER PRIMARY KEY, id TEXT UNIQUE, document TEXT, metadata TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sources (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+        self._db.commit()
+        self._state: Dict[str, Any] = self._empty_state(dtype)
+        self._dtype = dtype
+        self._maps: Dict[str, np.memmap] = {}
+        self._mapped = (None, 0)
+        self._centroids: Optional[np.ndarray] = None
+        self._centroids_version = 0
+        self._training = False
+        self._state_mtime = 0.0
+        self._checked_at = 0.0
+        self._load_state()
+
+    @staticmethod
+    def _empty_state(dtype: str) -> Dict[str, Any]:
+        return {"generation": 0, "count": 0, "capacity": 0, "dim": None, "dtype": dtype,
+                "complete": False, "ivf_rows": 0, "ivf_version": 0}
+
+    @property
+    def ready(self) -> bool:
+        """True once the mirror holds the whole collection (after rebuild()), so queries can use it."""
+        return bool(self._state["complete"])
+
+    @property
+    def live_rows(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM rows").fetchone()[0]
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        with open(self._path("write.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # State and memory maps
+
+    def _load_state(self) -> None:
+        path = self._path("state.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                self._state = json.load(f)
+            self._state_mtime = os.path.getmtime(path)
+        if self._mapped != (self._state["generation"], self._state["capacity"]):
+            self._map()
+        if self._state["ivf_rows"] and (self._centroids is None or self._centroids_version != self._state["ivf_version"]):
+            self._centroids = np.load(self._path("centroids.npy"))
+            self._centroids_version = self._state["ivf_version"]
+        elif not self._state["ivf_rows"]:
+            self._centroids = None
+
+    def _write_state(self) -> None:
+        path = self._path("state.json")
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(self._state, f)
+        os.replace(f"{path}.tmp", path)
+        self._state_mtime = os.path.getmtime(path)
+
+    def _map(self) -> None:
+        for array in self._maps.values():
+            array.flush()
+        self._maps = {}
+        capacity, dim = self._state["capacity"], self._state["dim"]
+        if capacity and dim:
+            self._maps = {
+                "vectors": np.memmap(self._path("vectors.bin"), dtype=self._state["dtype"], mode="r+", shape=(capacity, dim)),
+                "sources": np.memmap(self._path("sources.bin"), dtype=np.uint32, mode="r+", shape=(capacity,)),
+                "alive": np.memmap(self._path("alive.bin"), dtype=np.uint8, mode="r+", shape=(capacity,)),
+                "lists": np.memmap(self._path("lists.bin"), dtype=np.int32, mode="r+", shape=(capacity,))
+            }
+        self._mapped = (self._state["generation"], capacity)
+
+    def _grow(self, rows: int) -> None:
+        capacity = max(self._state["capacity"], 1024)
+        while capacity < rows:
+            capacity *= 2
+        row_bytes = {"vectors.bin": self._state["dim"] * np.dtype(self._state["dtype"]).itemsize,
+                     "sources.bin": 4, "alive.bin": 1, "lists.bin": 4}
+        for name, size in row_bytes.items():
+            # Extending a file keeps existing mappings of its beginning valid in other processes
+            with open(self._path(name), "r+b" if os.path.exists(self._path(name)) else "w+b") as f:
+                f.truncate(capacity * size)
+        self._state["capacity"] = capacity
+        self._map()
+
+    def _refresh(self) -> None:
+        """Pick up rows committed by other processes (at most every VECTOR_MIRROR_RELOAD_CHECK_SECONDS)."""
+        now = time.monotonic()
+        if now - self._checked_at < settings.VECTOR_MIRROR_RELOAD_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        path = self._path("state.json")
+        try:
+            if os.path.exists(path) and os.path.getmtime(path) != self._state_mtime:
+                with self._lock:
+                    self._load_state()
+        except Exception as e:
+            logger.warning(f"Could not reload vector mirror state: {e}")
+
+    # Writes
+
+    def _source_id(self, name: str) -> int:
+        row = self._db.execute("SELECT id FROM sources WHERE name = ?", (name,)).fetchone()
+        if row:
+            return row[0]
+        return self._db.execute("INSERT INTO sources (name) VALUES (?)", (name,)).lastrowid
+
+    def _remove(self, ids: List[str]) -> None:
+        alive = self._maps.get("alive")
+        for start in range(0, len(ids), _SQLITE_MAX_VARIABLES):
+            batch = ids[start:start + _SQLITE_MAX_VARIABLES]
+            marks = ",".join("?" * len(batch))
+            rows = [row for (row,) in self._db.execute(f"SELECT row FROM rows WHERE id IN ({marks})", batch)]
+            if rows and alive is not None:
+                alive[rows] = 0
+            self._db.execute(f"DELETE FROM rows WHERE id IN ({marks})", batch)
+
+    def add_chunks(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+                   embeddings: List[List[float]]) -> None:
+        """Append chunks; chunk ids that are already mirrored are replaced."""
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Expected one embedding per chunk")
+        with self._lock, self._write_lock():
+            self._load_state()
+            self._append(ids, documents, metadatas, vectors)
+
+    def _append(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]], vectors: np.ndarray) -> None:
+        """add_chunks() for a caller that holds both locks and has loaded the state."""
+        if self._state["dim"] is None:
+            self._state["dim"] = int(vectors.shape[1])
+        elif vectors.shape[1] != self._state["dim"]:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the mirror ({self._state['dim']})")
+        self._remove(list(ids))
+        start = self._state["count"]
+        end = start + len(ids)
+        if end > self._state["capacity"]:
+            self._grow(end)
+        maps = self._maps
+        maps["vectors"][start:end] = vectors.astype(self._state["dtype"])
+        maps["sources"][start:end] = [self._source_id((metadata or {}).get("source", "")) for metadata in metadatas]
+        maps["lists"][start:end] = _nearest(vectors, self._centroids) if self._centroids is not None else -1
+        maps["alive"][start:end] = 1
+        self._db.executemany(
+            "INSERT OR REPLACE INTO rows (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+            [(start + i, chunk_id, document, json.dumps(metadata or {}))
+             for i, (chunk_id, document, metadata) in enumerate(zip(ids, documents, metadatas))]
+        )
+        self._db.commit()
+        for array in maps.values():
+            array.flush()
+        # Publishing the new count is what makes the rows visible to readers
+        self._state["count"] = end
+        self._write_state()
+
+    def remove_chunks(self, ids: List[str]) -> None:
+        with self._lock, self._write_lock():
+            self._load_state()
+            self._remove(list(ids))
+            self._db.commit()
+            if "alive" in self._maps:
+                self._maps["alive"].flush()
+
+    def commit(self) -> None:
+        """Train (or retrain, once the mirror has doubled) the IVF index for large mirrors."""
+        count = self._state["count"]
+        if count >= settings.VECTOR_MIRROR_IVF_MIN_ROWS and count >= 2 * self._state["ivf_rows"]:
+            self.train_ivf()
+
+    def reset(self) -> None:
+        """Drop every row, e.g. before rebuilding from ChromaDB."""
+        with self._lock, self._write_lock():
+            self._clear()
+
+    def _clear(self) -> None:
+        """reset() for a caller that holds both locks."""
+        self._db.execute("DELETE FROM rows")
+        self._db.execute("DELETE FROM sources")
+        self._db.commit()
+        generation = self._state["generation"] + 1
+        self._state = self._empty_state(self._dtype)
+        self._state["generation"] = generation
+        for name in ("vectors.bin", "sources.bin", "alive.bin", "lists.bin", "centroids.npy"):
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+        self._centroids = None
+        self._map()
+        self._write_state()
+
+    def rebuild(self, collection: Any, batch_size: int = 1000) -> int:
+        """
+        Copy every chunk of a ChromaDB collection (with its embedding) into an empty mirror
+        and mark the mirror complete. Returns the number of chunks copied.
+
+        The locks are held from the reset until the mirror is marked complete, so no other
+        writer (thread or process) can interleave its rows with the copy.
+        """
+        offset = 0
+        with self._lock, self._write_lock():
+            self._clear()
+            while True:
+                page = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+                ids = page.get("ids") or []
+                if not ids:
+                    break
+                self._append(ids, page["documents"], page["metadatas"],
+                             _normalize(np.asarray(page["embeddings"], dtype=np.float32)))
+                offset += len(ids)
+            self._state["complete"] = True
+            self._write_state()
+        self.commit()
+        return offset
+
+    def mark_complete(self) -> None:
+        """Record that the mirror now holds the whole collection, so queries use it."""
+        with self._lock, self._write_lock():
+            self._load_state()
+            self._state["complete"] = True
+            self._write_state()
+
+    def train_ivf(self, iterations: int = 10, seed: int = 0) -> None:
+        """
+        Cluster the live rows with spherical k-means and assign every row to its nearest centroid.
+
+        Training works on a copy of a sample and reads committed rows, which never change, so
+        it runs without holding the locks; queries and writes only wait for the final swap.
+        Rows appended meanwhile are assigned with the new centroids during the swap. If the
+        mirror is reset while training, the result is dropped.
+        """
+        with self._lock:
+            if self._training:
+                return
+            self._training = True
+        try:
+            with self._lock, self._write_lock():
+                self._load_state()
+                generation, count = self._state["generation"], self._state["count"]
+                if not count:
+                    return
+                vectors = self._maps["vectors"]
+                live = np.flatnonzero(self._maps["alive"][:count])
+                nlist = int(min(4096, max(16, 4 * np.sqrt(len(live)))))
+                if len(live) < nlist:
+                    return
+                rng = np.random.default_rng(seed)
+                sample = np.sort(rng.choice(live, size=min(len(live), max(40 * nlist, 20000), 200000), replace=False))
+                data = np.asarray(vectors[sample], dtype=np.float32)
+
+            centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assignments = _nearest(data, centroids)
+                order = np.argsort(assignments, kind="stable")
+                clusters, starts = np.unique(assignments[order], return_index=True)
+                centroids[clusters] = _normalize(np.add.reduceat(data[order], starts, axis=0))
+                empty = np.setdiff1d(np.arange(nlist), clusters)
+                if len(empty):
+                    centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+            # vectors still maps the committed rows even if the files were grown meanwhile
+            assignments = np.empty(count, dtype=np.int32)
+            for start in range(0, count, _BLOCK_ROWS):
+                end = min(count, start + _BLOCK_ROWS)
+                assignments[start:end] = _nearest(vectors[start:end], centroids)
+
+            with self._lock, self._write_lock():
+                self._load_state()
+                if self._state["generation"] != generation:
+                    return
+                total = self._state["count"]
+                lists = self._maps["lists"]
+                lists[:count] = assignments
+                if total > count:
+                    lists[count:total] = _nearest(self._maps["vectors"][count:total], centroids)
+                lists.flush()
+                with open(self._path("centroids.npy.tmp"), "wb") as f:
+                    np.save(f, centroids)
+                os.replace(self._path("centroids.npy.tmp"), self._path("centroids.npy"))
+                self._centroids = centroids
+                self._state["ivf_rows"] = total
+                self._state["ivf_version"] += 1
+                self._centroids_version = self._state["ivf_version"]
+                self._write_state()
+            logger.info(f"Trained IVF index with {nlist} lists over {total} mirrored chunks")
+        finally:
+            with self._lock:
+                self._training = False
+
+    # Reads
+
+    def query(self, query_embedding: List[float], n_results: int = 3, where: Dict[str, Any] | None = None) -> Dict[str, Any] | None:
+        """
+        Nearest chunks by cosine similarity, in the shape of a Chroma query result
+        ("distances" are cosine distances). Returns None when the mirror cannot answer
+        (incomplete, or an unsupported where filter) so the caller can ask Chroma instead.
+
+        Args:
+            query_embedding (List[float]): Query vector.
+            n_results (int): Number of chunks.
+            where (Dict[str, Any] | None): None or {"source": file_name}.
+        """
+        self._refresh()
+        if not self.ready:
+            return None
+        source = None
+        if where:
+            if set(where) != {"source"} or not isinstance(where["source"], str):
+                return None
+            source = where["source"]
+        query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+        # Take a snapshot under the lock and score without it: rows below count are never
+        # rewritten, and the maps stay valid after a grow or reset swaps in new ones
+        with self._lock:
+            count = self._state["count"]
+            if not count:
+                return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+            if self._state["dim"] != len(query):
+                return None
+            vectors, sources, alive, lists = (self._maps[name] for name in ("vectors", "sources", "alive", "lists"))
+            centroids = self._centroids
+            generation = self._state["generation"]
+            source_id = None
+            if source is not None:
+                found = self._db.execute("SELECT id FROM sources WHERE name = ?", (source,)).fetchone()
+                if not found:
+                    return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+                source_id = found[0]
+
+        rows = None
+        if centroids is not None:
+            probes = min(settings.VECTOR_MIRROR_IVF_PROBES, len(centroids))
+            probe = np.argpartition(-(centroids @ query), probes - 1)[:probes]
+            mask = np.isin(lists[:count], probe) & (alive[:count] == 1)
+            if source_id is not None:
+                mask &= sources[:count] == source_id
+            rows = np.flatnonzero(mask)
+            if len(rows) < n_results:
+                rows = None
+        if rows is not None:
+            scores = np.asarray(vectors[rows], dtype=np.float32) @ query
+        else:
+            scores = np.empty(count, dtype=np.float32)
+            for start in range(0, count, _BLOCK_ROWS):
+                end = min(count, start + _BLOCK_ROWS)
+                scores[start:end] = np.asarray(vectors[start:end], dtype=np.float32) @ query
+            scores[alive[:count] == 0] = -np.inf
+            if source_id is not None:
+                scores[sources[:count] != source_id] = -np.inf
+        k = min(n_results, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k else np.array([], dtype=np.intp)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[np.isfinite(scores[top])]
+        best_rows = (rows[top] if rows is not None else top).tolist()
+        similarities = scores[top].tolist()
+        # Chunks removed while scoring are no longer in the table and are dropped here; after a
+        # reset the row numbers belong to other chunks, so Chroma answers instead
+        with self._lock:
+            if self._state["generation"] != generation:
+                return None
+            records = self._rows(best_rows)
+        hits = [(records[row], similarity) for row, similarity in zip(best_rows, similarities) if row in records]
+        return {
+            "ids": [[record[0] for record, _ in hits]],
+            "documents": [[record[1] for record, _ in hits]],
+            "metadatas": [[record[2] for record, _ in hits]],
+            "distances": [[1.0 - similarity for _, similarity in hits]]
+        }
+
+    def _rows(self, rows: List[int]) -> Dict[int, tuple]:
+        if not rows:
+            return {}
+        marks = ",".join("?" * len(rows))
+        return {row: (chunk_id, document, json.loads(metadata))
+                for row, chunk_id, document, metadata in self._db.execute(
+                    f"SELECT row, id, document, metadata FROM rows WHERE row IN ({marks})", rows)}
+
+    def get_documents(self, ids: List[str]) -> Dict[str, Any]:
+        """Documents and metadata by chunk id, like ChromaDBClient.get_documents."""
+        result = {"ids": [], "documents": [], "metadatas": []}
+        with self._lock:
+            for start in range(0, len(ids), _SQLITE_MAX_VARIABLES):
+                batch = ids[start:start + _SQLITE_MAX_VARIABLES]
+                marks = ",".join("?" * len(batch))
+                for chunk_id, document, metadata in self._db.execute(
+                        f"SELECT id, document, metadata FROM rows WHERE id IN ({marks})", batch):
+                    result["ids"].append(chunk_id)
+                    result["documents"].append(document)
+                    result["metadatas"].append(json.loads(metadata))
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            for array in self._maps.values():
+                array.flush()
+            self._maps = {}
+            self._db.close()
+
+
+_mirror: Optional[VectorMirror] = None
+_mirror_lock = threading.Lock()
+
+
+def get_vector_mirror() -> Optional[VectorMirror]:
+    """Process-wide mirror in VECTOR_MIRROR_DIR, or None when VECTOR_MIRROR_ENABLED is off."""
+    global _mirror
+    if not settings.VECTOR_MIRROR_ENABLED:
+        return None
+    with _mirror_lock:
+        if _mirror is None:
+            try:
+                _mirror = VectorMirror(settings.VECTOR_MIRROR_DIR, settings.VECTOR_MIRROR_DTYPE)
+            except Exception as e:
+                logger.error(f"Could not open vector mirror in {settings.VECTOR_MIRROR_DIR}: {e}. Mirror disabled.")
+                return None
+        return _mirror
+
+
+def _collect() -> Iterable:
+    if _mirror is None:
+        return []
+    state = _mirror._state
+    return [
+        ("vector_mirror_rows", "gauge", "Rows in the vector mirror, including removed ones.", [({}, state["count"])]),
+        ("vector_mirror_ready", "gauge", "1 when the vector mirror serves queries.", [({}, 1 if state["complete"] else 0)])
+    ]
+
+
+metrics.add_collector(_collect)
@@ -0,0 +1,299 @@
+"""
+Load test for the chat endpoints with offline stand-ins.
+
+Starts local stand-ins for OpenAI (embeddings and completions), Ollama (/chat, /embed) and Chroma
+(an in-process client with added latency, seeded with synthetic chunks), serves the real
+FastAPI app with uvicorn, and sends requests to /api/chat/ (or /api/chat/stream) at a
+fixed arrival rate. Reports achieved RPS, error rate, p50/p95/p99 latency and a per-stage
+breakdown taken from the Server-Timing header (embed, cache, retrieve, generate, plus the
+remaining HTTP/framework overhead). For /stream the time to first token is reported too.
+
+Pass --url to load-test a running deployment instead; no stand-ins are started then.
+
+The load generator, the app and the stand-ins share one process, so compare runs made on
+the same machine rather than reading the numbers as absolute capacity.
+
+Usage (from backend/):
+    python -m benchmarks.chat_load --rps 20 --duration 30
+    python -m benchmarks.chat_load --provider openai --llm-latency-ms 400 --token-ms 5 --endpoint stream
+    python -m benchmarks.chat_load --unique-queries 20          # repeated queries hit the answer cache
+    python -m benchmarks.chat_load --compare benchmarks/results/chat_load_<commit>_<time>.json
+"""
+import os
+import sys
+import time
+import random
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+import threading
+import contextlib
+from typing import Any, Dict, List, Optional
+import httpx
+from .chunking import synthetic_text
+from .stand_ins import FakeOllamaServer, FakeOpenAIServer, SlowChromaClient, fake_embedding
+from .reporting import RESULTS_DIR, make_report, peak_rss_mb, print_comparison, save_report
+
+METRICS = [
+    ("achieved RPS", ("achieved_rps",), True),
+    ("error rate", ("error_rate",), False),
+    ("p50 ms", ("latency_ms", "p50"), False),
+    ("p95 ms", ("latency_ms", "p95"), False),
+    ("p99 ms", ("latency_ms", "p99"), False),
+    ("TTFT p50 ms", ("ttft_ms", "p50"), False),
+    ("TTFT p95 ms", ("ttft_ms", "p95"), False),
+] + [(f"{stage} p95 ms", ("stages_ms", stage, "p95"), False)
+     for stage in ("embed", "cache", "retrieve", "context", "generate", "overhead")]
+
+
+def percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+    return {
+        "mean": round(sum(ordered) / len(ordered), 1),
+        "p50": at(0.50),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": round(ordered[-1], 1)
+    }
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """'embed;dur=12.5, generate;dur=300.1' -> {"embed": 12.5, "generate": 300.1}"""
+    timings = {}
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                try:
+                    timings[name] = float(value)
+                except ValueError:
+                    pass
+    return timings
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Sample:
+    __slots__ = ("ok", "latency_ms", "ttft_ms", "stages", "error")
+
+    def __init__(self, ok: bool, latency_ms: float, ttft_ms: float | None = None,
+                 stages: Dict[str, float] | None = None, error: str | None = None) -> None:
+        self.ok = ok
+        self.latency_ms = latency_ms
+        self.ttft_ms = ttft_ms
+        self.stages = stages or {}
+        self.error = error
+
+
+async def chat_request(client: httpx.AsyncClient, body: Dict[str, Any]) -> Sample:
+    start = time.perf_counter()
+    try:
+        response = await client.post("/api/chat/", json=body)
+        latency = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            return Sample(False, latency, error=f"HTTP {response.status_code}")
+        return Sample(True, latency, stages=parse_server_timing(response.headers.get("server-timing", "")))
+    except Exception as e:
+        return Sample(False, (time.perf_counter() - start) * 1000, error=type(e).__name__)
+
+
+async def stream_request(client: httpx.AsyncClient, body: Dict[str, Any]) -> Sample:
+    start = time.perf_counter()
+    ttft = None
+    try:
+        async with client.stream("POST", "/api/chat/stream", json=body) as response:
+            if response.status_code != 200:
+                return Sample(False, (time.perf_counter() - start) * 1000, error=f"HTTP {response.status_code}")
+            async for line in response.aiter_lines():
+                if ttft is None and line.startswith("data: {\"token\""):
+                    ttft = (time.perf_counter() - start) * 1000
+                if line.startswith("event: error"):
+                    return Sample(False, (time.perf_counter() - start) * 1000, ttft, error="stream error event")
+        return Sample(True, (time.perf_counter() - start) * 1000, ttft)
+    except Exception as e:
+        return Sample(False, (time.perf_counter() - start) * 1000, ttft, error=type(e).__name__)
+
+
+async def generate_load(url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Open-loop load: requests start on schedule whether or not earlier ones have finished."""
+    total = max(1, int(args.rps * args.duration))
+    unique = args.unique_queries or total
+    queries = [f"Question {i}: how does the {random.Random(i).choice(['index', 'cache', 'chunker', 'model'])} work?"
+               for i in range(unique)]
+    send = stream_request if args.endpoint == "stream" else chat_request
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        # Warm up connections and lazily created clients outside the measurement
+        for i in range(min(3, unique)):
+            await send(client, {"query": f"warm-up {i}", "provider": args.provider})
+        tasks = []
+        start = time.perf_counter()
+        for i in range(total):
+            delay = start + i / args.rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            body = {"query": queries[i % unique], "provider": args.provider}
+            tasks.append(asyncio.create_task(send(client, body)))
+        samples: List[Sample] = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    ok = [s for s in samples if s.ok]
+    errors: Dict[str, int] = {}
+    for s in samples:
+        if not s.ok:
+            errors[s.error] = errors.get(s.error, 0) + 1
+    stage_names = sorted({name for s in ok for name in s.stages})
+    stages = {name: percentiles([s.stages[name] for s in ok if name in s.stages]) for name in stage_names}
+    if stage_names:
+        stages["overhead"] = percentiles([s.latency_ms - sum(s.stages.values()) for s in ok if s.stages])
+    return {
+        "requests": total,
+        "target_rps": args.rps,
+        "achieved_rps": round(len(ok) / elapsed, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "errors": errors,
+        "error_rate": round((total - len(ok)) / total, 4),
+        "latency_ms": percentiles([s.latency_ms for s in ok]),
+        "ttft_ms": percentiles([s.ttft_ms for s in ok if s.ttft_ms is not None]),
+        "stages_ms": stages
+    }
+
+
+def serve_app(args: argparse.Namespace, work_dir: str, openai_url: str, ollama_url: str) -> tuple:
+    """Configure the app against the stand-ins and serve it with uvicorn in a background thread."""
+    os.environ["OPENAI_API_KEY"] = "load-test"
+    os.environ["OPENAI_BASE_URL"] = f"{openai_url}/v1"
+    import chromadb
+    import uvicorn
+    from app.core.config import settings
+    host, port = ollama_url.rsplit("//", 1)[1].split(":")
+    settings.OLLAMA_HOST, settings.OLLAMA_PORT = host, int(port)
+    settings.ANSWER_CACHE_ENABLED = not args.no_answer_cache
+    settings.EMBED_CACHE_ENABLED = not args.no_embed_cache
+    settings.EMBEDDING_PROVIDER = args.embedding_provider
+    settings.EMBED_CACHE_PATH = os.path.join(work_dir, "embedding_cache.sqlite3")
+    settings.INGEST_MANIFEST_PATH = os.path.join(work_dir, "manifest.json")
+    settings.INGEST_JOBS_DB_PATH = os.path.join(work_dir, "ingest_jobs.sqlite3")
+    settings.LINK_STATE_PATH = os.path.join(work_dir, "link_state.json")
+    settings.BM25_INDEX_PATH = os.path.join(work_dir, "bm25_index.npz")
+    settings.RETRIEVAL_MODE = args.retrieval
+    settings.VECTOR_MIRROR_ENABLED = args.vector_mirror
+    settings.VECTOR_MIRROR_DIR = os.path.join(work_dir, "vector_mirror")
+    from app.main import app
+    from app.services.client_registry import ClientRegistry
+    from app.services.bm25_index import get_bm25_index
+    from app.services.vector_mirror import get_vector_mirror
+
+    chroma = SlowChromaClient(chromadb.EphemeralClient(), latency_ms=args.chroma_latency_ms, jitter_ms=args.jitter_ms)
+    registry = ClientRegistry(chroma_client=chroma)
+    collection = registry.get_vector_db_client(args.provider).collection
+    documents = synthetic_text(args.documents * 1000 / 1024 / 1024, seed=1).split("\n\n")[:args.documents]
+    bm25_index = get_bm25_index()
+    for i in range(0, len(documents), 500):
+        batch = documents[i:i + 500]
+        ids = [f"doc_{i + j}" for j in range(len(batch))]
+        metadatas = [{"source": f"doc_{(i + j) % 50}.pdf", "chunk": i + j} for j in range(len(batch))]
+        collection.add(ids=ids, documents=batch, metadatas=metadatas,
+                       embeddings=[fake_embedding(text, args.dim) for text in batch])
+        bm25_index.add_chunks(ids, batch, metadatas)
+    bm25_index.flush(force=True)
+    if args.vector_mirror:
+        get_vector_mirror().rebuild(collection)
+    app.state.clients = registry
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=free_port(), log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{server.config.port}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Load-test a running app instead of starting one with stand-ins")
+    parser.add_argument("--endpoint", choices=("chat", "stream"), default="chat")
+    parser.add_argument("--provider", choices=("ollama", "openai"), default="ollama")
+    parser.add_argument("--embedding-provider", choices=("openai", "ollama"), default="openai")
+    parser.add_argument("--retrieval", choices=("vector", "hybrid"), default="vector")
+    parser.add_argument("--vector-mirror", action="store_true", help="Serve dense retrieval from the in-process vector mirror")
+    parser.add_argument("--rps", type=float, default=20, help="Target arrival rate")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load")
+    parser.add_argument("--unique-queries", type=int, default=0, help="Distinct queries to cycle through (0: all distinct)")
+    parser.add_argument("--max-connections", type=int, default=200, help="Client connection pool size")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--embed-latency-ms", type=float, default=30)
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Time to first token of completions")
+    parser.add_argument("--token-ms", type=float, default=0, help="Generation time per completion token")
+    parser.add_argument("--completion-tokens", type=int, default=50)
+    parser.add_argument("--chroma-latency-ms", type=float, default=10)
+    parser.add_argument("--jitter-ms", type=float, default=5, help="Random extra latency of every stand-in call")
+    parser.add_argument("--documents", type=int, default=1000, help="Chunks seeded into the Chroma stand-in")
+    parser.add_argument("--dim", type=int, default=256, help="Embedding dimensions")
+    parser.add_argument("--no-answer-cache", action="store_true")
+    parser.add_argument("--no-embed-cache", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="Show the app's own output")
+    parser.add_argument("--output", default=RESULTS_DIR, help="Directory for the JSON results")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    args = parser.parse_args()
+
+    if args.url:
+        results = asyncio.run(generate_load(args.url, args))
+    else:
+        work_dir = tempfile.mkdtemp(prefix="chat_load_")
+        openai_server = FakeOpenAIServer(
+            dim=args.dim, embed_latency_ms=args.embed_latency_ms, latency_ms=args.llm_latency_ms,
+            jitter_ms=args.jitter_ms, completion_tokens=args.completion_tokens, token_ms=args.token_ms
+        ).start()
+        ollama_server = FakeOllamaServer(
+            dim=args.dim, embed_latency_ms=args.embed_latency_ms, latency_ms=args.llm_latency_ms,
+            jitter_ms=args.jitter_ms, completion_tokens=args.completion_tokens, token_ms=args.token_ms
+        ).start()
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+        if not args.verbose:
+            logging.disable(logging.INFO)
+        try:
+            with output:
+                server, thread, url = serve_app(args, work_dir, openai_server.url, ollama_server.url)
+                try:
+                    results = asyncio.run(generate_load(url, args))
+                finally:
+                    server.should_exit = True
+                    thread.join(timeout=10)
+        finally:
+            openai_server.stop()
+            ollama_server.stop()
+        results["stand_in_requests"] = {"openai": openai_server.requests, "ollama": ollama_server.requests}
+        results["peak_rss_mb"] = peak_rss_mb()
+
+    report = make_report("chat_load", vars(args), results)
+    latency = results["latency_ms"] or {}
+    print(f"{results['requests']} requests at {args.rps} RPS target -> {results['achieved_rps']} RPS achieved, "
+          f"error rate {results['error_rate']:.2%} {results['errors'] or ''}")
+    print(f"Latency ms: p50 {latency.get('p50')}  p95 {latency.get('p95')}  p99 {latency.get('p99')}  max {latency.get('max')}")
+    if results["ttft_ms"]:
+        print(f"Time to first token ms: p50 {results['ttft_ms']['p50']}  p95 {results['ttft_ms']['p95']}  p99 {results['ttft_ms']['p99']}")
+    for stage, stats in results["stages_ms"].items():
+        if stats:
+            print(f"  {stage:<10} mean {stats['mean']:>8}  p50 {stats['p50']:>8}  p95 {stats['p95']:>8}  p99 {stats['p99']:>8}")
+    print(f"Saved {save_report(report, args.output)}")
+    if args.compare:
+        print_comparison(report, args.compare, METRICS)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
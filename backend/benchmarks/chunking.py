@@ -0,0 +1,90 @@
+"""
+Compare the langchain RecursiveCharacterTextSplitter with TokenChunker.
+
+Reports split throughput, number of chunks and the total number of tokens that would be
+sent to the embedding model (overlap included) for each configuration.
+
+Usage (from backend/):
+    python -m benchmarks.chunking                 # synthetic ~5 MB text
+    python -m benchmarks.chunking --size-mb 20
+    python -m benchmarks.chunking --file path/to/document.txt
+"""
+import argparse
+import random
+import time
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from app.services.token_chunker import TokenChunker
+from app.services.embedding_scheduler import estimate_tokens, _ENCODING
+
+WORDS = (
+    "retrieval augmented generation document chunk embedding vector index query answer context "
+    "model latency throughput the a of and to in is for on with as by that this from"
+).split()
+
+
+def synthetic_text(size_mb: float, seed: int = 0) -> str:
+    """Paragraphs of random sentences, roughly size_mb megabytes."""
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    paragraphs, size = [], 0
+    while size < target:
+        sentences = []
+        for _ in range(rng.randint(3, 10)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 30))]
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def run(name: str, split, text: str, repeat: int) -> dict:
+    best = float("inf")
+    chunks = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = split(text)
+        best = min(best, time.perf_counter() - start)
+    embedded = sum(estimate_tokens(chunk) for chunk in chunks)
+    return {
+        "name": name,
+        "seconds": best,
+        "mb_per_second": len(text) / 1024 / 1024 / best,
+        "chunks": len(chunks),
+        "embedded_tokens": embedded
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="Text file to split instead of synthetic text")
+    parser.add_argument("--size-mb", type=float, default=5.0, help="Size of the synthetic text")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the fastest is reported")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_text(args.size_mb)
+    source_tokens = estimate_tokens(text)
+    print(f"Input: {len(text) / 1024 / 1024:.1f} MB, {source_tokens} tokens "
+          f"({'tiktoken' if _ENCODING is not None else 'approximate'} token counts)")
+
+    configurations = [
+        ("recursive 1000/200 chars", RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200).split_text),
+        ("recursive 1000/0 chars", RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0).split_text),
+        ("token 256/0 tokens", TokenChunker(256, 0).split_text),
+        ("token 256/32 tokens", TokenChunker(256, 32).split_text),
+    ]
+    results = [run(name, split, text, args.repeat) for name, split in configurations]
+    baseline = results[0]
+    print(f"{'splitter':<26}{'seconds':>10}{'MB/s':>10}{'chunks':>10}{'embedded tokens':>18}{'vs baseline':>13}")
+    for r in results:
+        change = (r["embedded_tokens"] - baseline["embedded_tokens"]) / baseline["embedded_tokens"] * 100
+        print(f"{r['name']:<26}{r['seconds']:>10.3f}{r['mb_per_second']:>10.2f}{r['chunks']:>10}"
+              f"{r['embedded_tokens']:>18}{change:>12.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Synthetic document corpora for the ingestion benchmarks.
+
+generate_corpus() writes TXT, DOCX, PDF and image files of a configurable size filled with
+deterministic random prose, so runs on different commits ingest identical input.
+"""
+import os
+import random
+from typing import List
+from .chunking import synthetic_text
+
+KINDS = ("txt", "docx", "pdf", "image")
+
+
+def _paragraphs(size_kb: float, seed: int) -> List[str]:
+    return synthetic_text(size_kb / 1024, seed=seed).split("\n\n")
+
+
+def write_txt(path: str, paragraphs: List[str]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n\n".join(paragraphs))
+
+
+def write_docx(path: str, paragraphs: List[str]) -> None:
+    import docx
+    document = docx.Document()
+    for paragraph in paragraphs:
+        document.add_paragraph(paragraph)
+    document.save(path)
+
+
+def _wrap(paragraphs: List[str], width: int) -> List[str]:
+    lines = []
+    for paragraph in paragraphs:
+        line = ""
+        for word in paragraph.split():
+            if line and len(line) + len(word) + 1 > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.extend([line, ""])
+    return lines
+
+
+def write_pdf(path: str, paragraphs: List[str], lines_per_page: int = 60) -> None:
+    """Minimal text-only PDF (Helvetica, one content stream per page) readable by pdfminer."""
+    lines = _wrap(paragraphs, 95)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects: List[bytes] = []
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for page_id, page in zip(page_ids, pages):
+        escaped = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in page]
+        stream = "BT /F1 10 Tf 12 TL 40 800 Td " + " ".join(f"({line}) '" for line in escaped) + " ET"
+        stream = stream.encode("latin-1", "replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(output)
+
+
+def write_image(path: str, paragraphs: List[str]) -> None:
+    """A scanned-page stand-in: black text on a white PNG, one line per row."""
+    from PIL import Image, ImageDraw
+    lines = _wrap(paragraphs, 90)[:80]
+    image = Image.new("RGB", (1240, max(200, 24 * len(lines) + 40)), "white")
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((20, 20 + 24 * i), line, fill="black")
+    image.save(path)
+
+
+WRITERS = {"txt": (write_txt, ".txt"), "docx": (write_docx, ".docx"), "pdf": (write_pdf, ".pdf"), "image": (write_image, ".png")}
+
+
+def generate_corpus(directory: str, files: int, size_kb: float, kinds=KINDS, seed: int = 0) -> List[str]:
+    """
+    Write `files` documents of about size_kb of text each, cycling through `kinds`.
+    Returns the created paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        kind = kinds[i % len(kinds)]
+        writer, extension = WRITERS[kind]
+        path = os.path.join(directory, f"doc_{i:04d}{extension}")
+        writer(path, _paragraphs(size_kb, seed=rng.randrange(1 << 30)))
+        paths.append(path)
+    return paths
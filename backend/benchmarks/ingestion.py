@@ -0,0 +1,148 @@
+"""
+End-to-end ingestion benchmark against offline stand-ins.
+
+Generates a synthetic corpus, starts a local OpenAI-compatible embedding server and a local
+persistent Chroma, and runs IngestionService.ingest_directory over the corpus. Reports
+files/s, chunks/s, per-stage timings (extract, split, embed, upsert, verify) and peak
+memory, and saves the results as JSON tagged with the current commit so runs can be
+compared between commits.
+
+Usage (from backend/):
+    python -m benchmarks.ingestion
+    python -m benchmarks.ingestion --files 200 --size-kb 200 --workers 4 --embed-latency-ms 50
+    python -m benchmarks.ingestion --compare benchmarks/results/ingestion_<commit>_<time>.json
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+from typing import Any, Dict
+from .corpus import KINDS, generate_corpus
+from .stand_ins import FakeOpenAIServer
+from .reporting import RESULTS_DIR, make_report, peak_rss_mb, print_comparison, save_report
+
+
+def tesseract_available() -> bool:
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+async def run_ingestion(args: argparse.Namespace, corpus_dir: str, work_dir: str, embed_url: str) -> Dict[str, Any]:
+    # Configure the app before any client is created
+    os.environ["OPENAI_API_KEY"] = "benchmark"
+    os.environ["OPENAI_BASE_URL"] = f"{embed_url}/v1"
+    import chromadb
+    from app.core.config import settings
+    settings.INGEST_MANIFEST_PATH = os.path.join(work_dir, "manifest.json")
+    settings.LINK_STATE_PATH = os.path.join(work_dir, "link_state.json")
+    settings.EMBED_CACHE_ENABLED = args.embed_cache
+    settings.EMBED_CACHE_PATH = os.path.join(work_dir, "embedding_cache.sqlite3")
+    settings.CHUNKER = args.chunker
+    from app.services.ingestion_service import IngestionService
+    from app.db.chroma_client import ChromaDBClient
+
+    service = IngestionService()
+    service.vector_db_client = ChromaDBClient(
+        client=chromadb.PersistentClient(path=os.path.join(work_dir, "chroma")),
+        embedding_function=service.embedding_function
+    )
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = await service.ingest_directory(corpus_dir, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    traced_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    if args.tracemalloc:
+        tracemalloc.stop()
+
+    failures = [d for d in result["details"] if d["status"] not in ("success", "skipped")]
+    return {
+        "files": result["total_files"],
+        "successful": result["successful"],
+        "warnings": result["warnings"],
+        "failed": result["failed"],
+        "failures": [{"file_name": d.get("file_name"), "message": d.get("message")} for d in failures][:10],
+        "chunks": result["total_chunks"],
+        "elapsed_seconds": round(elapsed, 3),
+        "files_per_second": round(result["total_files"] / elapsed, 2),
+        "chunks_per_second": round(result["total_chunks"] / elapsed, 2),
+        "stage_seconds": result.get("stage_seconds", {}),
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_traced_mb": round(traced_peak / 1024 / 1024, 1) if traced_peak is not None else None
+    }
+
+
+METRICS = [
+    ("files/s", ("files_per_second",), True),
+    ("chunks/s", ("chunks_per_second",), True),
+    ("elapsed s", ("elapsed_seconds",), False),
+] + [(f"{stage} s", ("stage_seconds", stage), False) for stage in ("extract", "split", "embed", "upsert", "verify")] + [
+    ("peak RSS MB", ("peak_rss_mb", "self"), False),
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=40, help="Number of documents")
+    parser.add_argument("--size-kb", type=float, default=100, help="Text per document")
+    parser.add_argument("--kinds", default=None,
+                        help=f"Comma-separated subset of {','.join(KINDS)}; images only by default when Tesseract is installed")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default INGEST_WORKERS)")
+    parser.add_argument("--embed-latency-ms", type=float, default=20, help="Latency of each embedding request")
+    parser.add_argument("--dim", type=int, default=256, help="Embedding dimensions")
+    parser.add_argument("--chunker", default="recursive", choices=("recursive", "token"))
+    parser.add_argument("--embed-cache", action="store_true", help="Enable the embedding cache (fresh per run)")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report the Python heap peak (slower)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_DIR, help="Directory for the JSON results")
+    parser.add_argument("--compare", help="Earlier results file to compare with")
+    args = parser.parse_args()
+
+    if args.kinds:
+        kinds = tuple(kind.strip() for kind in args.kinds.split(","))
+    else:
+        kinds = KINDS if tesseract_available() else tuple(kind for kind in KINDS if kind != "image")
+
+    work_dir = tempfile.mkdtemp(prefix="ingest_bench_")
+    try:
+        corpus_dir = os.path.join(work_dir, "corpus")
+        start = time.perf_counter()
+        generate_corpus(corpus_dir, args.files, args.size_kb, kinds=kinds, seed=args.seed)
+        corpus_bytes = sum(os.path.getsize(os.path.join(corpus_dir, name)) for name in os.listdir(corpus_dir))
+        print(f"Generated {args.files} files ({', '.join(kinds)}), {corpus_bytes / 1024 / 1024:.1f} MB "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        with FakeOpenAIServer(dim=args.dim, embed_latency_ms=args.embed_latency_ms) as embed_server:
+            results = asyncio.run(run_ingestion(args, corpus_dir, work_dir, embed_server.url))
+            results["embedding_requests"] = embed_server.requests
+            results["embedded_inputs"] = embed_server.embedded_inputs
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    config = {**vars(args), "kinds": list(kinds), "corpus_mb": round(corpus_bytes / 1024 / 1024, 2)}
+    report = make_report("ingestion", config, results)
+    print(f"\nFiles: {results['files']} ({results['successful']} ok, {results['warnings']} warnings, {results['failed']} failed)")
+    print(f"Chunks: {results['chunks']}  embedding requests: {results['embedding_requests']}")
+    print(f"Elapsed: {results['elapsed_seconds']}s  files/s: {results['files_per_second']}  chunks/s: {results['chunks_per_second']}")
+    print("Stage seconds (summed over files): " + ", ".join(f"{k} {v:.2f}" for k, v in results["stage_seconds"].items()))
+    print(f"Peak RSS MB: {results['peak_rss_mb']}" +
+          (f"  traced heap MB: {results['peak_traced_mb']}" if results["peak_traced_mb"] is not None else ""))
+    for failure in results["failures"]:
+        print(f"  failed: {failure['file_name']}: {failure['message']}")
+
+    print(f"Saved {save_report(report, args.output)}")
+    if args.compare:
+        print_comparison(report, args.compare, METRICS)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Saving and comparing benchmark results.
+
+Every benchmark writes a JSON report tagged with the commit it ran on to benchmarks/results/
+and can print the change of its key metrics against an earlier report.
+"""
+import os
+import json
+import time
+import resource
+import platform
+import subprocess
+from typing import Any, Dict, List, Tuple
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# (label, path of keys into report["results"], whether a higher value is better)
+Metric = Tuple[str, Tuple[str, ...], bool]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident memory of this process and of its (waited-for) children."""
+    # ru_maxrss is in kilobytes on Linux
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    }
+
+
+def make_report(benchmark: str, config: Dict[str, Any], results: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "benchmark": benchmark,
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "results": results
+    }
+
+
+def save_report(report: Dict[str, Any], output_dir: str = RESULTS_DIR) -> str:
+    """Write a report to <output_dir>/<benchmark>_<commit>_<time>.json and return the path."""
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{report['benchmark']}_{report['commit']}_{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def _lookup(results: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        if not isinstance(results, dict):
+            return None
+        results = results.get(key)
+    return results
+
+
+def print_comparison(report: Dict[str, Any], baseline_path: str, metrics: List[Metric]) -> None:
+    """Print each metric of report next to its value in the baseline report, flagging changes over 5%."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline['commit']} ({os.path.basename(baseline_path)}):")
+    for label, keys, higher_is_better in metrics:
+        old, new = _lookup(baseline["results"], keys), _lookup(report["results"], keys)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        better = change > 0 if higher_is_better else change < 0
+        flag = "" if abs(change) < 5 else (" better" if better else " WORSE")
+        print(f"  {label:<16}{old:>12}{new:>12}{change:>+9.1f}%{flag}")
@@ -0,0 +1,310 @@
+"""
+Local stand-ins for the remote services the backend talks to, for offline benchmarks.
+
+Each server runs a ThreadingHTTPServer on 127.0.0.1 in a daemon thread, answers with
+deterministic payloads and can add a fixed latency (plus jitter) to every request.
+Chroma is stood in for in-process by SlowChromaClient, which adds latency to a local
+chromadb client.
+"""
+import json
+import time
+import base64
+import random
+import hashlib
+import threading
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic unit-length vector derived from the text's hash."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.uniform(-1.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+@dataclass
+class Streamed:
+    """A response sent with chunked transfer encoding, one chunk every delay_ms."""
+    chunks: List[bytes]
+    content_type: str
+    delay_ms: float = 0.0
+
+
+class StandInServer:
+    """
+    Base class: subclasses implement route(method, path, body) and return
+    (status, payload) where payload is a dict (sent as JSON), bytes or Streamed.
+    """
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0) -> None:
+        """
+        Args:
+            latency_ms (float): Delay added to every request.
+            jitter_ms (float): Random extra delay, uniformly distributed in [0, jitter_ms].
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def route(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        raise NotImplementedError
+
+    def latency_for(self, path: str) -> float:
+        """Base latency in milliseconds for a request path."""
+        return self.latency_ms
+
+    def delay(self, path: str) -> None:
+        seconds = (self.latency_for(path) + random.uniform(0, self.jitter_ms)) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def start(self) -> "StandInServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = raw
+                with server._lock:
+                    server.requests += 1
+                path = self.path.split("?")[0]
+                server.delay(path)
+                status, payload = server.route(method, path, body)
+                if isinstance(payload, Streamed):
+                    self._stream(status, payload)
+                    return
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream" if isinstance(payload, bytes) else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, status: int, payload: Streamed) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", payload.content_type)
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for i, chunk in enumerate(payload.chunks):
+                    if i and payload.delay_ms:
+                        time.sleep(payload.delay_ms / 1000)
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+ANSWER = ("Retrieval augmented generation answers questions from the documents that were "
+          "ingested, citing the passages the answer is based on.")
+
+
+def answer_tokens(tokens: int) -> List[str]:
+    """The stand-in answer, cut into `tokens` word-sized fragments."""
+    words = ANSWER.split()
+    return [words[i % len(words)] + " " for i in range(tokens)]
+
+
+class FakeOpenAIServer(StandInServer):
+    """
+    OpenAI-compatible /v1/embeddings and /v1/chat/completions endpoints (streaming and not).
+    Point the openai client at it with OPENAI_BASE_URL=<url>/v1. The request latency acts
+    as time to first token; completions then take token_ms per generated token.
+    """
+    def __init__(self, dim: int = 256, completion_tokens: int = 50, token_ms: float = 0.0,
+                 embed_latency_ms: float | None = None, **kwargs) -> None:
+        """
+        Args:
+            dim (int): Embedding dimensions.
+            completion_tokens (int): Tokens per chat completion.
+            token_ms (float): Generation time per completion token.
+            embed_latency_ms (float | None): Latency of embedding requests, if different
+                from the latency of completions.
+            **kwargs: Latency options of StandInServer.
+        """
+        super().__init__(**kwargs)
+        self.dim = dim
+        self.completion_tokens = completion_tokens
+        self.token_ms = token_ms
+        self.embed_latency_ms = embed_latency_ms
+        self.embedded_inputs = 0
+
+    def latency_for(self, path: str) -> float:
+        if path == "/v1/embeddings" and self.embed_latency_ms is not None:
+            return self.embed_latency_ms
+        return self.latency_ms
+
+    def route(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        if method == "POST" and path == "/v1/embeddings":
+            return 200, self.embeddings(body)
+        if method == "POST" and path == "/v1/chat/completions":
+            return 200, self.chat_completion(body)
+        return 404, {"error": {"message": f"No stand-in for {method} {path}"}}
+
+    def chat_completion(self, body: Dict[str, Any]) -> Any:
+        model = body.get("model", "gpt-3.5-turbo")
+        tokens = answer_tokens(self.completion_tokens)
+        created = int(time.time())
+        if body.get("stream"):
+            chunks = []
+            for token in tokens:
+                chunk = {"id": "chatcmpl-stand-in", "object": "chat.completion.chunk", "created": created, "model": model,
+                         "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                chunks.append(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            chunks.append(b"data: [DONE]\n\n")
+            return Streamed(chunks, "text/event-stream", self.token_ms)
+        if self.token_ms:
+            time.sleep(self.token_ms * len(tokens) / 1000)
+        return {
+            "id": "chatcmpl-stand-in",
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(tokens).strip()}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": len(tokens), "total_tokens": 100 + len(tokens)}
+        }
+
+    def embeddings(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        with self._lock:
+            self.embedded_inputs += len(inputs)
+        data = []
+        for i, text in enumerate(inputs):
+            vector = fake_embedding(str(text), self.dim)
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(array("f", vector).tobytes()).decode("ascii")
+            data.append({"object": "embedding", "index": i, "embedding": vector})
+        tokens = sum(len(str(text)) // 4 + 1 for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        }
+
+
+class FakeOllamaServer(StandInServer):
+    """
+    Ollama /chat stand-in (also served at /api/chat), streaming NDJSON or not, and batched
+    /embed (also /api/embed). The request latency acts as time to first token; then token_ms
+    per generated token.
+    """
+    def __init__(self, completion_tokens: int = 50, token_ms: float = 0.0, dim: int = 256,
+                 embed_latency_ms: float | None = None, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.completion_tokens = completion_tokens
+        self.token_ms = token_ms
+        self.dim = dim
+        self.embed_latency_ms = embed_latency_ms
+        self.embedded_inputs = 0
+
+    def latency_for(self, path: str) -> float:
+        if path in ("/embed", "/api/embed") and self.embed_latency_ms is not None:
+            return self.embed_latency_ms
+        return self.latency_ms
+
+    def route(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        if method == "POST" and path in ("/embed", "/api/embed"):
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            with self._lock:
+                self.embedded_inputs += len(inputs)
+            return 200, {"model": body.get("model"), "embeddings": [fake_embedding(str(text), self.dim) for text in inputs]}
+        if method != "POST" or path not in ("/chat", "/api/chat"):
+            return 404, {"error": f"No stand-in for {method} {path}"}
+        model = body.get("model", "llama3.2:latest")
+        tokens = answer_tokens(self.completion_tokens)
+        if body.get("stream", True):
+            lines = [json.dumps({"model": model, "message": {"role": "assistant", "content": token}, "done": False}) + "\n"
+                     for token in tokens]
+            lines.append(json.dumps({"model": model, "message": {"role": "assistant", "content": ""}, "done": True}) + "\n")
+            return 200, Streamed([line.encode("utf-8") for line in lines], "application/x-ndjson", self.token_ms)
+        if self.token_ms:
+            time.sleep(self.token_ms * len(tokens) / 1000)
+        return 200, {"model": model, "message": {"role": "assistant", "content": "".join(tokens).strip()}, "done": True}
+
+
+class _SlowCollection:
+    SLOW_METHODS = ("query", "get", "add", "upsert", "update", "delete")
+
+    def __init__(self, collection: Any, owner: "SlowChromaClient") -> None:
+        self._collection = collection
+        self._owner = owner
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._collection, name)
+        if name not in self.SLOW_METHODS:
+            return attr
+
+        def slow(*args, **kwargs):
+            self._owner.delay()
+            return attr(*args, **kwargs)
+        return slow
+
+
+class SlowChromaClient:
+    """
+    Proxy around a chromadb client (e.g. EphemeralClient) that sleeps latency_ms (plus
+    jitter) before every collection query/get/add/update/delete, standing in for a
+    remote Chroma server.
+    """
+    def __init__(self, client: Any, latency_ms: float = 0.0, jitter_ms: float = 0.0) -> None:
+        self._client = client
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def delay(self) -> None:
+        seconds = (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def get_or_create_collection(self, *args, **kwargs) -> _SlowCollection:
+        return _SlowCollection(self._client.get_or_create_collection(*args, **kwargs), self)
+
+    def get_collection(self, *args, **kwargs) -> _SlowCollection:
+        return _SlowCollection(self._client.get_collection(*args, **kwargs), self)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
@@ -1,7 +1,42 @@
+import os
+import shutil
+import tempfile
 import pytest 
 import sys
 from unittest.mock import MagicMock, patch
 
+# Point every on-disk store at a scratch directory before the app (and its module-level
+# singletons) is imported, so test runs neither write to backend/data nor share state
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="rag-tests-")
+os.environ.update({
+    "EMBED_CACHE_PATH": os.path.join(TEST_DATA_DIR, "embedding_cache.sqlite3"),
+    "INGEST_JOBS_DB_PATH": os.path.join(TEST_DATA_DIR, "ingest_jobs.sqlite3"),
+    "INGEST_MANIFEST_PATH": os.path.join(TEST_DATA_DIR, "ingest_manifest.json"),
+    "UPLOAD_DIR": os.path.join(TEST_DATA_DIR, "raw_docs"),
+    "LINK_STATE_PATH": os.path.join(TEST_DATA_DIR, "link_state.json"),
+    "LINK_DOWNLOAD_DIR": os.path.join(TEST_DATA_DIR, "raw_docs", "links"),
+    "BM25_INDEX_PATH": os.path.join(TEST_DATA_DIR, "bm25_index.npz"),
+    "VECTOR_MIRROR_DIR": os.path.join(TEST_DATA_DIR, "vector_mirror"),
+})
+
+
+@pytest.fixture(scope="session", autouse=True)
+def test_data_dir():
+    yield TEST_DATA_DIR
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def ingestion_service(tmp_path_factory):
+    """IngestionService with fake embedding and vector DB clients and its own manifest."""
+    from app.services.ingestion_manifest import IngestionManifest
+    from app.services.ingestion_service import IngestionService
+    from tests.fakes import with_fakes
+    service = with_fakes(IngestionService())
+    service.manifest = IngestionManifest(str(tmp_path_factory.mktemp("manifest") / "manifest.json"))
+    return service
+
+
 @pytest.fixture(autouse=True)
 def mock_chromadb(monkeypatch):
     if not any("integration" in arg for arg in sys.argv):
@@ -0,0 +1,47 @@
+"""Fake clients shared by the ingestion tests."""
+from unittest.mock import MagicMock
+from app.services.ingestion_service import IngestionService
+from app.services.embedding_scheduler import EmbeddingScheduler
+from app.core.interfaces import AbstractEmbeddingClient
+
+
+class FakeEmbeddingClient(AbstractEmbeddingClient):
+    """Deterministic embeddings without network calls; records every batch it receives."""
+    def __init__(self):
+        self.batches = []
+
+    async def create_embedding(self, text: str) -> list[float]:
+        return [float(len(text)), 1.0, 0.0]
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return [await self.create_embedding(text) for text in texts]
+
+
+def fake_vector_db_client() -> MagicMock:
+    client = MagicMock()
+    # Nothing exists before the insert; every added chunk can be read back afterwards
+    stored = {}
+
+    def add_documents(documents, metadatas, ids, embeddings):
+        stored.update(zip(ids, zip(documents, metadatas, embeddings)))
+        return True
+
+    def get(ids=None, **kwargs):
+        found = [chunk_id for chunk_id in ids or [] if chunk_id in stored]
+        return {
+            "ids": found,
+            "documents": [stored[chunk_id][0] for chunk_id in found],
+            "metadatas": [stored[chunk_id][1] for chunk_id in found],
+            "embeddings": [stored[chunk_id][2] for chunk_id in found]
+        }
+    client.collection.get.side_effect = get
+    client.add_documents.side_effect = add_documents
+    return client
+
+
+def with_fakes(service: IngestionService) -> IngestionService:
+    service.embedding_client = FakeEmbeddingClient()
+    service.embedding_scheduler = EmbeddingScheduler(service.embedding_client)
+    service.vector_db_client = fake_vector_db_client()
+    return service
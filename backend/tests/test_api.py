@@ -1,3 +1,4 @@
+import json
 import pytest
 from httpx import AsyncClient, ASGITransport
 
@@ -21,6 +22,9 @@ def patch_llm_and_embedding(mocker):
         "app.adapters.openai_adapter.OpenAIAdapter.create_embedding",
         return_value=[0.4, 0.5, 0.6]
     )
+    # Every query embeds to the same mocked vector; start each test with an empty answer cache
+    from app.services.answer_cache import get_answer_cache
+    get_answer_cache().clear()
 
 from app.main import app
 
@@ -31,11 +35,74 @@ async def test_chat_endpoint():
         response = await ac.post("/api/chat/", json={"query": "What is this project about?", "provider": "openai"})
         assert response.status_code == 200
         assert "mocked" in response.json().get("answer", "")
+        assert "embed;dur=" in response.headers["server-timing"]
+        assert "generate;dur=" in response.headers["server-timing"]
         response = await ac.post("/api/chat/", json={"query": "What is this project about?", "provider": "openai"})
         assert response.status_code == 200
         assert "mocked" in response.json().get("answer", "")
+        stats = (await ac.get("/api/chat/cache/stats")).json()
+        assert stats["answer_cache"]["hits"] >= 1
+
+@pytest.mark.asyncio
+async def test_chat_failure_does_not_leak_the_traceback(mocker):
+    mocker.patch("app.adapters.openai_adapter.OpenAIAdapter.generate_response",
+                 side_effect=RuntimeError("secret connection string"))
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as ac:
+        response = await ac.post("/api/chat/", json={"query": "Will this fail?", "provider": "openai"})
+    assert response.status_code == 500
+    assert response.json() == {"detail": "Failed to answer the query."}
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as ac:
+        await ac.post("/api/chat/", json={"query": "What do the metrics show?", "provider": "openai"})
+        response = await ac.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'rag_stage_seconds_count{provider="openai",stage="generate"}' in response.text
+    assert "# TYPE answer_cache_hits_total counter" in response.text
+
     # You can mock the ingestion_service.ingest_document here if needed
 @pytest.mark.asyncio
 async def test_upload_document(monkeypatch, mocker):
     # You can mock the ingestion_service.ingest_document here if needed
-    pass  # Implement as needed
\ No newline at end of file
+    pass  # Implement as needed
+
+@pytest.mark.asyncio
+async def test_chat_stream_endpoint(mocker):
+    async def fake_stream(self, prompt, context=None):
+        for token in ["This ", "is ", "streamed."]:
+            yield token
+    mocker.patch("app.adapters.openai_adapter.OpenAIAdapter.stream_response", fake_stream)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as ac:
+        response = await ac.post("/api/chat/stream", json={"query": "What is this project about?", "provider": "openai"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [block for block in response.text.split("\n\n") if block]
+        tokens = [json.loads(block[len("data: "):])["token"] for block in events if block.startswith("data: ")]
+        assert "".join(tokens) == "This is streamed."
+        assert events[-1].startswith("event: done")
+
+@pytest.mark.asyncio
+async def test_chat_batch_endpoint_streams_one_line_per_query(mocker):
+    async def fake_embed(self, texts):
+        return [[float(i), 1.0, 0.0] for i in range(len(texts))]
+    mocker.patch("app.adapters.openai_adapter.OpenAIAdapter.embed_documents", fake_embed)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://testserver") as ac:
+        queries = [{"query": "First?"}, {"query": "Second?", "file_name": "guide.pdf"}, {"query": "Third?"}]
+        response = await ac.post("/api/chat/batch", json={"queries": queries, "provider": "openai"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+        assert all(line["answer"] == "This is a mocked OpenAI answer." for line in lines)
+        assert {line["query"] for line in lines} == {"First?", "Second?", "Third?"}
+
+        too_many = await ac.post("/api/chat/batch", json={"queries": [{"query": "q"}] * 1001, "provider": "openai"})
+        assert too_many.status_code == 413
@@ -0,0 +1,61 @@
+import pytest
+from app.services.ingestion_service import DocumentProcessor
+from app.adapters.openai_adapter import OpenAIAdapter
+from app.adapters.ollama_adapter import OllamaAdapter
+from benchmarks.corpus import generate_corpus
+from benchmarks.chat_load import parse_server_timing, percentiles
+from benchmarks.stand_ins import FakeOllamaServer, FakeOpenAIServer, answer_tokens, fake_embedding
+
+
+def test_synthetic_corpus_is_extractable(tmp_path):
+    paths = generate_corpus(str(tmp_path), files=3, size_kb=4, kinds=("txt", "docx", "pdf"))
+    for path in paths:
+        text = DocumentProcessor().extract_text(path)
+        assert len(text.split()) > 300, path
+
+
+@pytest.mark.asyncio
+async def test_fake_embedding_server_speaks_the_openai_protocol(monkeypatch):
+    with FakeOpenAIServer(dim=8) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{server.url}/v1")
+        adapter = OpenAIAdapter(api_key="benchmark")
+        vectors = await adapter.embed_documents(["alpha", "beta"])
+        await adapter.aclose()
+    assert server.embedded_inputs == 2
+    assert vectors[0] == pytest.approx(fake_embedding("alpha", 8), rel=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_servers_stream_completions(monkeypatch):
+    expected = "".join(answer_tokens(5))
+    with FakeOpenAIServer(completion_tokens=5) as openai_server, FakeOllamaServer(completion_tokens=5) as ollama_server:
+        monkeypatch.setenv("OPENAI_BASE_URL", f"{openai_server.url}/v1")
+        openai = OpenAIAdapter(api_key="benchmark")
+        host, port = ollama_server.url.rsplit("//", 1)[1].split(":")
+        ollama = OllamaAdapter(host, int(port))
+        assert "".join([token async for token in openai.stream_response("q")]) == expected
+        assert "".join([token async for token in ollama.stream_response("q")]) == expected
+        assert await ollama.generate_response("q") == expected.strip()
+        await openai.aclose()
+        await ollama.client.aclose()
+
+
+def test_server_timing_parsing_and_percentiles():
+    assert parse_server_timing("embed;dur=12.5, retrieve;desc=\"x\";dur=3, generate;dur=bad") == {"embed": 12.5, "retrieve": 3.0}
+    stats = percentiles([float(i) for i in range(1, 101)])
+    assert (stats["p50"], stats["p99"], stats["max"]) == (51.0, 100.0, 100.0)
+    assert percentiles([]) is None
+
+
+@pytest.mark.asyncio
+async def test_ollama_embeddings_use_the_batched_endpoint():
+    with FakeOllamaServer(dim=8, latency_ms=20) as server:
+        host, port = server.url.rsplit("//", 1)[1].split(":")
+        ollama = OllamaAdapter(host, int(port), embed_batch_size=2, embed_max_concurrency=2)
+        texts = [f"text {i}" for i in range(5)]
+        vectors = await ollama.embed_documents(texts)
+        assert vectors == [pytest.approx(fake_embedding(text, 8)) for text in texts]
+        assert await ollama.create_embedding("text 3") == pytest.approx(vectors[3])
+        # Three /embed requests of at most two texts, then one for the single query
+        assert server.requests == 4 and server.embedded_inputs == 6
+        await ollama.aclose()
@@ -0,0 +1,87 @@
+import pytest
+from app.services.bm25_index import BM25Index, tokenize
+
+CHUNKS = {
+    "manual_1": ("manual.pdf", "Error E1042 means the pump AB-7731 lost pressure. Replace the seal."),
+    "manual_2": ("manual.pdf", "The pump runs quietly. Check the pressure gauge every week."),
+    "faq_1": ("faq.txt", "Our support team answers questions about billing and accounts."),
+    "faq_2": ("faq.txt", "Pressure problems are usually solved by restarting the pump."),
+}
+
+
+@pytest.fixture
+def index():
+    index = BM25Index()
+    index.add_chunks(list(CHUNKS), [text for _, text in CHUNKS.values()],
+                     [{"source": source} for source, _ in CHUNKS.values()])
+    return index
+
+
+def test_tokenize_keeps_compounds_and_their_parts():
+    assert tokenize("The pump AB-7731 shows E1042") == ["pump", "ab-7731", "ab", "7731", "shows", "e1042"]
+
+
+def test_exact_identifiers_rank_first(index):
+    results = index.search("what does error e1042 mean?", k=3)
+    assert results[0][0] == "manual_1"
+    assert index.search("AB-7731")[0][0] == "manual_1"
+    ranked = [chunk_id for chunk_id, _ in index.search("pump pressure", k=10)]
+    assert set(ranked) == {"manual_1", "manual_2", "faq_2"}
+    assert index.search("unrelated words") == []
+
+
+def test_source_filter_remove_and_replace(index):
+    assert [chunk_id for chunk_id, _ in index.search("pressure", source="faq.txt")] == ["faq_2"]
+    assert index.search("pressure", source="unknown.pdf") == []
+    index.remove_chunks(["manual_1"])
+    assert index.search("e1042") == []
+    index.add_chunks(["faq_1"], ["Billing error E1042 is shown for expired cards."], [{"source": "faq.txt"}])
+    assert index.search("e1042")[0][0] == "faq_1"
+    assert len(index) == 3
+
+
+def test_save_and_load_round_trip(index, tmp_path):
+    index.remove_chunks(["faq_1"])
+    path = str(tmp_path / "bm25.npz")
+    index.save(path)
+    loaded = BM25Index(path)
+    assert len(loaded) == 3
+    for query in ("pump pressure", "e1042", "billing"):
+        assert loaded.search(query, k=5) == pytest.approx(index.search(query, k=5))
+
+
+def test_rebuild_pages_through_a_collection():
+    class Collection:
+        def get(self, include, limit, offset):
+            ids = list(CHUNKS)[offset:offset + limit]
+            return {"ids": ids, "documents": [CHUNKS[i][1] for i in ids], "metadatas": [{"source": CHUNKS[i][0]} for i in ids]}
+
+    index = BM25Index()
+    assert index.rebuild(Collection(), batch_size=3) == 4
+    assert index.search("billing")[0][0] == "faq_1"
+
+    # An index that drifted from the collection (chunks lost in a crash, stale ones kept) is replaced
+    index.remove_chunks(["faq_1"])
+    index.add_chunks(["gone_1"], ["Obsolete billing notes."], [{"source": "old.txt"}])
+    assert index.rebuild(Collection(), batch_size=3) == 4
+    assert len(index) == 4
+    assert [chunk_id for chunk_id, _ in index.search("billing")] == ["faq_1"]
+
+
+def test_rebuild_keeps_changes_made_while_it_reads_the_collection():
+    index = BM25Index()
+
+    class Collection:
+        def get(self, include, limit, offset):
+            ids = list(CHUNKS)[offset:offset + limit]
+            if offset == 0:
+                # An ingestion job commits while the first page is being read
+                index.add_chunks(["late_1"], ["Invoices are sent on the first of the month."], [{"source": "late.txt"}])
+                index.remove_chunks(["faq_1"])
+            return {"ids": ids, "documents": [CHUNKS[i][1] for i in ids], "metadatas": [{"source": CHUNKS[i][0]} for i in ids]}
+
+    index.rebuild(Collection(), batch_size=3)
+
+    assert index.search("invoices")[0][0] == "late_1"
+    assert "faq_1" not in [chunk_id for chunk_id, _ in index.search("billing")]
+    assert len(index) == 4
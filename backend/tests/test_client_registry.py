@@ -0,0 +1,42 @@
+import pytest
+from app.services.client_registry import ClientRegistry
+
+
+@pytest.mark.asyncio
+async def test_registry_reuses_clients_per_provider():
+    registry = ClientRegistry()
+    ollama = registry.get_rag_service("ollama")
+    assert registry.get_rag_service("OLLAMA") is ollama
+    openai = registry.get_rag_service("openai")
+    assert openai is not ollama
+    # Both providers embed with OpenAI and share one embedding client
+    assert ollama.embedding_client is openai.embedding_client
+    assert ollama.llm_client.client is registry.http_client
+
+    http_client = registry.http_client
+    await registry.aclose()
+    assert http_client.is_closed
+    assert registry.get_rag_service("ollama") is not ollama
+    await registry.aclose()
+
+
+@pytest.mark.asyncio
+async def test_ollama_adapter_without_a_pooled_client_uses_the_http_settings(monkeypatch):
+    from app.core.config import settings
+    from app.services.llm_provider_factory import LLMFactory
+    monkeypatch.setattr(settings, "HTTP_TIMEOUT", 90.0)
+    adapter = LLMFactory.get_embedding_client("ollama")
+    # e.g. ingestion, which embeds large /embed batches outside the registry
+    assert adapter.client.timeout.read == 90.0
+    assert adapter.client.timeout.connect == 90.0
+    await adapter.aclose()
+    assert adapter.client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_ollama_adapter_leaves_the_pooled_client_to_the_registry():
+    registry = ClientRegistry()
+    adapter = registry.get_llm_client("ollama")
+    await adapter.aclose()
+    assert not registry.http_client.is_closed
+    await registry.aclose()
@@ -0,0 +1,53 @@
+from app.services.context_builder import build_context, context_token_budget, merge_chunks, overlap_length
+from app.services.embedding_scheduler import estimate_tokens
+
+TEXT = " ".join(f"Sentence number {i} describes step {i} of the pump maintenance procedure." for i in range(40))
+
+
+def _chunks(size=400, overlap=120):
+    step = size - overlap
+    return [TEXT[start:start + size] for start in range(0, len(TEXT) - overlap, step)]
+
+
+def test_merge_strips_the_repeated_overlap():
+    chunks = _chunks()
+    assert overlap_length(chunks[0], chunks[1]) == 120
+    assert merge_chunks(chunks) == TEXT
+    # Unrelated neighbours are kept apart rather than glued on a short accidental match
+    assert merge_chunks(["ends with pump", "pump starts here"]) == "ends with pump\npump starts here"
+
+
+def test_neighbouring_chunks_become_one_passage_in_rank_order():
+    chunks = _chunks()
+    documents = [chunks[3], "Billing answers.", chunks[2], chunks[3]]
+    metadatas = [{"source": "manual.pdf", "chunk": 4}, {"source": "faq.txt", "chunk": 9},
+                 {"source": "manual.pdf", "chunk": 3}, {"source": "manual.pdf", "chunk": 4}]
+    context, sources = build_context(documents, metadatas, max_tokens=10000)
+    assert context == merge_chunks(chunks[2:4]) + "\n\nBilling answers."
+    assert sources == ["manual.pdf", "faq.txt"]
+    naive = "\n".join(documents)
+    assert estimate_tokens(context) < estimate_tokens(naive)
+
+
+def test_context_is_packed_up_to_the_budget():
+    chunks = _chunks()
+    documents = [chunks[0], chunks[5], "Short answer."]
+    metadatas = [{"source": "a.pdf", "chunk": 1}, {"source": "a.pdf", "chunk": 6}, {"source": "b.pdf", "chunk": 1}]
+    budget = estimate_tokens(chunks[0]) + 10
+    context, sources = build_context(documents, metadatas, max_tokens=budget)
+    # The second passage does not fit, the smaller third one does
+    assert context == chunks[0] + "\n\nShort answer."
+    assert sources == ["a.pdf", "b.pdf"]
+    # A first passage larger than the budget is truncated
+    context, _ = build_context([TEXT], [None], max_tokens=50)
+    assert 0 < estimate_tokens(context) <= 50 and TEXT.startswith(context)
+
+
+def test_budget_per_model(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "CONTEXT_MODEL_MAX_TOKENS", {"llama3.2": 4000, "gpt-3.5-turbo": 3000})
+    monkeypatch.setattr(settings, "CONTEXT_MAX_TOKENS", 1500)
+    assert context_token_budget("llama3.2:latest") == 4000
+    assert context_token_budget("gpt-3.5-turbo") == 3000
+    assert context_token_budget("mistral") == 1500
+    assert context_token_budget(None) == 1500
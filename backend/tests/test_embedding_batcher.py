@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from app.core.metrics import EMBED_MICROBATCH_SIZE
+from app.services.embedding_batcher import EmbeddingBatcher
+
+
+class RecordingClient:
+    embedding_model = "test-model"
+    cache = None
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    async def create_embedding(self, text):
+        return (await self.embed_documents([text]))[0]
+
+    async def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_request():
+    client = RecordingClient()
+    batcher = EmbeddingBatcher(client, window_ms=20, max_batch=64)
+    assert batcher.embedding_model == "test-model"
+    batches_before = EMBED_MICROBATCH_SIZE.count()
+
+    vectors = await asyncio.gather(*(batcher.create_embedding(text) for text in ["a", "bb", "a", "ccc"]))
+
+    assert vectors == [[1.0], [2.0], [1.0], [3.0]]
+    # Duplicates are embedded once
+    assert client.batches == [["a", "bb", "ccc"]]
+    assert EMBED_MICROBATCH_SIZE.count() == batches_before + 1
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting_for_the_window():
+    client = RecordingClient()
+    batcher = EmbeddingBatcher(client, window_ms=10000, max_batch=2)
+    vectors = await asyncio.wait_for(
+        asyncio.gather(*(batcher.create_embedding(text) for text in ["a", "bb", "ccc", "dddd"])), timeout=1
+    )
+    assert vectors == [[1.0], [2.0], [3.0], [4.0]]
+    assert client.batches == [["a", "bb"], ["ccc", "dddd"]]
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_cancelled_callers_are_skipped():
+    batcher = EmbeddingBatcher(RecordingClient(fail=True), window_ms=5)
+    results = await asyncio.gather(batcher.create_embedding("a"), batcher.create_embedding("b"), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    client = RecordingClient()
+    batcher = EmbeddingBatcher(client, window_ms=5)
+    abandoned = asyncio.ensure_future(batcher.create_embedding("gone"))
+    await asyncio.sleep(0)
+    abandoned.cancel()
+    assert await batcher.create_embedding("kept") == [4.0]
+    assert client.batches == [["kept"]]
@@ -0,0 +1,48 @@
+import pytest
+from app.services.embedding_cache import EmbeddingCache
+from app.services.ingestion_service import AsyncEmbeddingFunction
+from app.adapters.openai_adapter import OpenAIAdapter
+from app.core.metrics import EMBED_INPUTS, EMBED_REQUESTS
+
+
+def test_cache_hits_misses_and_lru_eviction(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    assert cache.get_many("m", ["alpha"]) == [None]
+    cache.put_many("m", ["alpha", "beta"], [[0.5, 1.0], [2.0, 3.0]])
+
+    # Whitespace differences share an entry; other models do not
+    assert cache.get_many("m", ["  alpha\n"]) == [[0.5, 1.0]]
+    assert cache.get_many("other", ["alpha"]) == [None]
+
+    cache.put_many("m", ["gamma"], [[4.0, 5.0]])
+    assert cache.get_many("m", ["beta", "alpha", "gamma"]) == [None, [0.5, 1.0], [4.0, 5.0]]
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert (stats["hits"], stats["misses"]) == (3, 3)
+
+    # Entries survive a restart
+    cache.close()
+    reopened = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    assert reopened.get_many("m", ["gamma"]) == [[4.0, 5.0]]
+
+
+@pytest.mark.asyncio
+async def test_openai_adapter_only_requests_uncached_texts(tmp_path, mocker):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=10)
+    adapter = OpenAIAdapter(api_key="test-key", cache=cache)
+    cache.put_many(adapter.embedding_model, ["known"], [[1.0]])
+    item = mocker.Mock(index=0, embedding=[2.0])
+    create = mocker.patch.object(adapter.client.embeddings, "create", mocker.AsyncMock(return_value=mocker.Mock(data=[item])))
+    requests, inputs = EMBED_REQUESTS.value(), EMBED_INPUTS.value()
+
+    assert await adapter.embed_documents(["known", "new"]) == [[1.0], [2.0]]
+    assert create.call_args.kwargs["input"] == ["new"]
+    assert await adapter.create_embedding("new") == [2.0]
+    assert create.call_count == 1
+    # Only the request that reached the provider is counted
+    assert (EMBED_REQUESTS.value() - requests, EMBED_INPUTS.value() - inputs) == (1, 1)
+
+    # The Chroma embedding function answers fully cached inputs without calling the client
+    function = AsyncEmbeddingFunction(adapter)
+    assert function(["known", "new"]) == [[1.0], [2.0]]
+    assert create.call_count == 1
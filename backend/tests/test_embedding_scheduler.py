@@ -0,0 +1,56 @@
+import pytest
+from app.core.interfaces import AbstractEmbeddingClient
+from app.services.embedding_scheduler import EmbeddingScheduler, estimate_tokens
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FlakyEmbeddingClient(AbstractEmbeddingClient):
+    """Fails the first `failures` requests with a 429, then embeds texts as [len(text)]."""
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.requests = []
+
+    async def create_embedding(self, text: str) -> list[float]:
+        return [float(len(text))]
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.requests.append(list(texts))
+        if self.failures:
+            self.failures -= 1
+            raise RateLimitError("rate limited")
+        return [[float(len(text))] for text in texts]
+
+
+def test_pack_respects_token_budget_and_input_count():
+    texts = ["word " * 100] * 10 + ["x"] * 5
+    scheduler = EmbeddingScheduler(FlakyEmbeddingClient(), max_batch_tokens=300, max_batch_size=4)
+    batches = scheduler.pack(texts)
+    assert sorted(i for batch in batches for i in batch) == list(range(len(texts)))
+    for batch in batches:
+        assert len(batch) <= 4
+        assert len(batch) == 1 or sum(estimate_tokens(texts[i]) for i in batch) <= 300
+
+
+@pytest.mark.asyncio
+async def test_embed_keeps_input_order_across_concurrent_batches():
+    client = FlakyEmbeddingClient()
+    scheduler = EmbeddingScheduler(client, max_batch_size=2, max_concurrency=3)
+    texts = ["a" * n for n in range(1, 8)]
+    assert await scheduler.embed(texts) == [[float(n)] for n in range(1, 8)]
+    assert len(client.requests) == 4
+
+
+@pytest.mark.asyncio
+async def test_embed_backs_off_on_rate_limits():
+    client = FlakyEmbeddingClient(failures=2)
+    scheduler = EmbeddingScheduler(client, max_retries=3, base_delay=0.001)
+    assert await scheduler.embed(["hello"]) == [[5.0]]
+    assert len(client.requests) == 3
+
+    client = FlakyEmbeddingClient(failures=5)
+    scheduler = EmbeddingScheduler(client, max_retries=1, base_delay=0.001)
+    with pytest.raises(RateLimitError):
+        await scheduler.embed(["hello"])
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from app.services.ingestion_jobs import IngestionJobQueue
+
+
+class FakeIngestionService:
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def ingest_document(self, file_path, file_name, progress=None, content_hash=None):
+        progress({"chunks_embedded": 1, "chunks_total": 2})
+        self.started.set()
+        await self.release.wait()
+        progress({"chunks_embedded": 2})
+        if file_name == "broken.pdf":
+            return {"status": "error", "message": "Failed to extract text", "file_name": file_name}
+        return {"status": "success", "file_name": file_name, "chunks_created": 2}
+
+    async def ingest_directory(self, directory_path, workers=None, progress=None):
+        raise RuntimeError("directory vanished")
+
+
+@pytest.mark.asyncio
+async def test_job_reports_progress_and_result(tmp_path):
+    service = FakeIngestionService()
+    queue = IngestionJobQueue(service, path=str(tmp_path / "jobs.sqlite3"), workers=2)
+    await queue.start()
+    job = queue.enqueue("file", {"file_path": "a.pdf", "file_name": "a.pdf"})
+    assert job["status"] == "queued"
+
+    await asyncio.wait_for(service.started.wait(), 1)
+    running = queue.get(job["job_id"])
+    assert running["status"] == "running"
+    assert running["progress"] == {"chunks_embedded": 1, "chunks_total": 2}
+
+    failed = queue.enqueue("file", {"file_path": "broken.pdf", "file_name": "broken.pdf"})
+    crashed = queue.enqueue("directory", {"directory_path": "gone", "workers": None})
+    service.release.set()
+    await asyncio.wait_for(queue.join(), 1)
+
+    done = queue.get(job["job_id"])
+    assert done["status"] == "succeeded"
+    assert done["progress"] == {"chunks_embedded": 2, "chunks_total": 2}
+    assert done["result"]["chunks_created"] == 2
+    assert queue.get(failed["job_id"])["error"] == "Failed to extract text"
+    assert queue.get(crashed["job_id"])["status"] == "failed"
+    assert [j["status"] for j in queue.list(status="failed")] == ["failed", "failed"]
+    await queue.stop()
+    queue.close()
+
+
+@pytest.mark.asyncio
+async def test_unfinished_jobs_resume_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    service = FakeIngestionService()
+    queue = IngestionJobQueue(service, path=path)
+    await queue.start()
+    interrupted = queue.enqueue("file", {"file_path": "a.pdf", "file_name": "a.pdf"})
+    await asyncio.wait_for(service.started.wait(), 1)
+    await queue.stop()
+    queue.close()
+
+    # Enqueued while no workers were running, e.g. between shutdown and restart
+    restarted = IngestionJobQueue(FakeIngestionService(), path=path)
+    waiting = restarted.enqueue("file", {"file_path": "b.pdf", "file_name": "b.pdf"})
+    assert restarted.get(interrupted["job_id"])["status"] == "running"
+
+    restarted.ingestion_service.release.set()
+    await restarted.start()
+    await asyncio.wait_for(restarted.join(), 1)
+    assert restarted.get(interrupted["job_id"])["status"] == "succeeded"
+    assert restarted.get(waiting["job_id"])["status"] == "succeeded"
+    await restarted.stop()
+    restarted.close()
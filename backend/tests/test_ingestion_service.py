@@ -0,0 +1,220 @@
+import os
+import pytest
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+from app.services.ingestion_service import IngestionService
+from app.services.ingestion_manifest import IngestionManifest
+from tests.fakes import with_fakes
+
+
+@pytest.mark.asyncio
+async def test_ingest_directory_parallel(ingestion_service, tmp_path):
+    for i in range(4):
+        (tmp_path / f"doc{i}.txt").write_text("parallel ingestion " * 200)
+    (tmp_path / "notes.bin").write_text("unsupported")
+
+    result = await ingestion_service.ingest_directory(str(tmp_path), workers=2)
+
+    assert result["total_files"] == 5
+    assert result["successful"] == 4
+    assert result["skipped"] == 1
+    assert result["workers"] == 2
+    assert result["total_chunks"] > 0
+    assert result["files_per_second"] > 0
+    successes = [d for d in result["details"] if d["status"] == "success"]
+    assert all("extract_seconds" in d and "chunks_per_second" in d for d in successes)
+
+
+@pytest.mark.asyncio
+async def test_reingesting_an_unchanged_directory_skips_every_file(ingestion_service, tmp_path):
+    for i in range(3):
+        (tmp_path / f"doc{i}.txt").write_text("unchanged directory " * 200)
+    await ingestion_service.ingest_directory(str(tmp_path))
+
+    updates = []
+    result = await ingestion_service.ingest_directory(str(tmp_path), progress=updates.append)
+
+    assert result["skipped"] == 3
+    assert result["failed"] == 0
+    assert updates[-1]["files_done"] == updates[-1]["files_total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_reingest_only_embeds_changed_chunks(ingestion_service, tmp_path):
+    paragraphs = [f"Paragraph {i}. " + "lorem ipsum dolor sit amet " * 30 for i in range(6)]
+    doc = tmp_path / "handbook.txt"
+    doc.write_text("\n\n".join(paragraphs))
+    first = await ingestion_service.ingest_document(str(doc), "handbook.txt")
+    assert first["status"] == "success"
+    assert first["chunks_added"] == first["chunks_created"]
+
+    # Unchanged content is skipped from the manifest alone
+    db = ingestion_service.vector_db_client
+    db.reset_mock()
+    unchanged = await ingestion_service.ingest_document(str(doc), "handbook.txt")
+    assert unchanged["status"] == "skipped"
+    assert not db.method_calls and not db.collection.get.called
+
+    # A renamed copy is not embedded again, but its chunks are stored under its own name
+    copy = tmp_path / "handbook-copy.txt"
+    copy.write_bytes(doc.read_bytes())
+    embedded = len(ingestion_service.embedding_client.batches)
+    renamed = await ingestion_service.ingest_document(str(copy), "handbook-copy.txt")
+    assert renamed["status"] == "success"
+    assert renamed["duplicate_of"] == "handbook.txt"
+    assert renamed["chunks_copied"] == first["chunks_created"]
+    assert len(ingestion_service.embedding_client.batches) == embedded
+    copied = db.add_documents.call_args.kwargs
+    assert {m["source"] for m in copied["metadatas"]} == {"handbook-copy.txt"}
+    assert all(chunk_id.startswith("handbook-copy.txt_chunk_") for chunk_id in renamed["verified_ids"])
+    assert ingestion_service.manifest.get("handbook-copy.txt")["content_hash"] == first["content_hash"]
+    db.reset_mock()
+
+    # Editing the last paragraph re-embeds only the chunks that changed
+    paragraphs[-1] = "Paragraph 5 was rewritten. " + "consectetur adipiscing elit " * 30
+    doc.write_text("\n\n".join(paragraphs))
+    second = await ingestion_service.ingest_document(str(doc), "handbook.txt")
+    assert second["status"] == "success"
+    assert 0 < second["chunks_added"] < second["chunks_created"]
+    assert second["chunks_unchanged"] > 0
+    assert second["chunks_deleted"] > 0
+    deleted = db.delete_documents.call_args.args[0]
+    assert set(deleted) <= set(first["verified_ids"])
+
+
+@pytest.mark.asyncio
+async def test_streaming_ingestion_batches_chunks(ingestion_service, tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 4)
+    monkeypatch.setattr(settings, "INGEST_STREAM_BLOCK_CHARS", 2048)
+    doc = tmp_path / "large.txt"
+    doc.write_text("\n\n".join(f"Section {i}: " + "streamed text " * 40 for i in range(60)))
+
+    result = await ingestion_service.ingest_document(str(doc), "large.txt", stream=True)
+
+    assert result["status"] == "success"
+    assert result["streamed"] is True
+    add_calls = ingestion_service.vector_db_client.add_documents.call_args_list
+    assert len(add_calls) > 1
+    assert all(len(call.kwargs["ids"]) <= 4 for call in add_calls)
+    assert sum(len(call.kwargs["ids"]) for call in add_calls) == result["chunks_created"]
+    positions = [m["chunk"] for call in add_calls for m in call.kwargs["metadatas"]]
+    assert positions == list(range(1, result["chunks_created"] + 1))
+    assert all(len(call.kwargs["embeddings"]) == len(call.kwargs["ids"]) for call in add_calls)
+
+
+@pytest.mark.asyncio
+async def test_precomputed_hash_skips_rehashing(ingestion_service, tmp_path, mocker):
+    from app.services.ingestion_manifest import hash_file
+    doc = tmp_path / "upload.txt"
+    doc.write_text("uploaded once " * 100)
+    content_hash = hash_file(str(doc))
+    rehash = mocker.patch("app.services.ingestion_service.hash_file")
+
+    result = await ingestion_service.ingest_document(str(doc), "upload.txt", content_hash=content_hash)
+
+    assert result["status"] == "success"
+    assert result["content_hash"] == content_hash
+    rehash.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_chunk_listeners_follow_added_and_deleted_chunks(ingestion_service, tmp_path):
+    from app.services.bm25_index import BM25Index
+    index = BM25Index()
+    ingestion_service.chunk_listeners = [index]
+    doc = tmp_path / "codes.txt"
+    doc.write_text("Error E1042 means the pump lost pressure.\n\n" + "Routine maintenance notes. " * 200)
+    result = await ingestion_service.ingest_document(str(doc), "codes.txt")
+    assert result["status"] == "success"
+    assert len(index) == result["chunks_created"]
+    assert index.search("e1042", source="codes.txt")
+
+    doc.write_text("Routine maintenance notes. " * 200)
+    await ingestion_service.ingest_document(str(doc), "codes.txt")
+    assert index.search("e1042") == []
+
+
+def test_manifest_saves_at_most_once_per_interval(tmp_path):
+    path = tmp_path / "manifest.json"
+    manifest = IngestionManifest(str(path), save_interval=3600)
+    manifest.record("a.txt", "hash-a", {"a.txt_chunk_1": "c1"}, "txt")
+    manifest.record("b.txt", "hash-b", {"b.txt_chunk_1": "c2"}, "txt")
+    # The first change is written at once, later ones wait for the interval or flush()
+    assert "b.txt" not in IngestionManifest(str(path))._files
+    manifest.flush()
+    reloaded = IngestionManifest(str(path))
+    assert reloaded.get("b.txt")["content_hash"] == "hash-b"
+    assert reloaded.find_by_hash("hash-a") == "a.txt"
+
+
+@pytest.mark.asyncio
+async def test_first_ingest_invalidates_cached_answers(ingestion_service, tmp_path, mocker):
+    from app.services.answer_cache import SemanticAnswerCache
+    cache = SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.95)
+    cache.store("openai", None, [1.0, 0.0], "No specific context found.", [])
+    cache.store("openai", "late.txt", [1.0, 0.0], "No specific context found.", [])
+    mocker.patch("app.services.ingestion_service.get_answer_cache", return_value=cache)
+    doc = tmp_path / "late.txt"
+    doc.write_text("Uploaded after the question was asked. " * 50)
+
+    result = await ingestion_service.ingest_document(str(doc), "late.txt")
+
+    assert result["status"] == "success"
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_extraction_does_not_block_the_event_loop(ingestion_service, tmp_path, mocker):
+    import time
+    import asyncio
+
+    def slow_extract(file_path):
+        time.sleep(0.3)
+        return "Scanned page text. " * 50
+    mocker.patch.object(ingestion_service.document_processor, "extract_text", side_effect=slow_extract)
+    doc = tmp_path / "scan.txt"
+    doc.write_text("placeholder")
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.create_task(tick())
+    result = await ingestion_service.ingest_document(str(doc), "scan.txt", stream=False)
+    ticker.cancel()
+
+    assert result["status"] == "success"
+    assert ticks >= 10
+
+
+@pytest.mark.asyncio
+async def test_switching_embedding_model_reingests_into_the_new_collection(tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "INGEST_MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    doc = tmp_path / "guide.txt"
+    doc.write_text("Switching embedding models needs every document again. " * 40)
+
+    first = with_fakes(IngestionService())
+    assert (await first.ingest_document(str(doc), "guide.txt"))["status"] == "success"
+    assert (await first.ingest_document(str(doc), "guide.txt"))["status"] == "skipped"
+
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "ollama")
+    switched = with_fakes(IngestionService())
+    assert switched.manifest.path != first.manifest.path
+    result = await switched.ingest_document(str(doc), "guide.txt")
+
+    assert result["status"] == "success"
+    assert result["chunks_added"] == result["chunks_created"] > 0
+    assert switched.vector_db_client.add_documents.called
+
+
+def test_chroma_embedding_function_has_its_own_ollama_client(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "ollama")
+    service = IngestionService()
+    # The embedding function runs on the background loop, the scheduler on the main one
+    assert service.embedding_function._client.client is not service.embedding_client.client
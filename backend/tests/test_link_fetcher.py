@@ -0,0 +1,146 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import httpx
+import pytest
+from app.services.link_fetcher import LinkFetcher, LinkFetchError, html_to_text
+
+PAGE = b"""<html><head><title>Guide</title><style>body {color: red}</style>
+<script>var tracking = 1;</script></head>
+<body><h1>Style guide</h1><p>Use four spaces per indentation level.</p></body></html>"""
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Local stand-in for remote document hosts."""
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        StandInHandler.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/page.html":
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+        elif self.path == "/moved":
+            self.send_response(302)
+            self.send_header("Location", "/notes.txt")
+            self.end_headers()
+        elif self.path == "/notes.txt":
+            body = b"Plain notes " * 50
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/huge.txt":
+            # No Content-Length, so the cap has to be enforced while streaming
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.end_headers()
+            for _ in range(64):
+                self.wfile.write(b"x" * 1024)
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+
+@pytest.fixture
+def server():
+    StandInHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return LinkFetcher(
+        client=httpx.AsyncClient(),
+        download_dir=str(tmp_path / "links"),
+        state_path=str(tmp_path / "link_state.json"),
+        max_bytes=16 * 1024,
+        # The stand-in server listens on loopback
+        allow_private_hosts=True
+    )
+
+
+def test_html_to_text_drops_scripts_and_styles():
+    text = html_to_text(PAGE)
+    assert "Style guide\nUse four spaces per indentation level." in text
+    assert "tracking" not in text and "color" not in text
+
+
+@pytest.mark.asyncio
+async def test_fetch_follows_redirects_and_enforces_limits(server, fetcher, tmp_path):
+    fetched = await fetcher.fetch(f"{server}/moved")
+    assert fetched["status"] == "downloaded"
+    assert fetched["final_url"].endswith("/notes.txt")
+    with open(fetched["file_path"]) as f:
+        assert f.read().startswith("Plain notes")
+
+    with pytest.raises(LinkFetchError, match="download limit"):
+        await fetcher.fetch(f"{server}/huge.txt")
+    with pytest.raises(LinkFetchError, match="HTTP 404"):
+        await fetcher.fetch(f"{server}/missing.pdf")
+    with pytest.raises(LinkFetchError, match="http and https"):
+        await fetcher.fetch("file:///etc/passwd")
+    assert not any(p.name.endswith(".part") for p in (tmp_path / "links").iterdir())
+    await fetcher.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_internal_hosts_are_refused_before_and_after_redirects(server, tmp_path):
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/meta-data/"})
+
+    fetcher = LinkFetcher(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+                          download_dir=str(tmp_path / "links"), state_path=str(tmp_path / "link_state.json"))
+    for url in (f"{server}/notes.txt", "http://10.0.0.5/doc.pdf", "http://[::ffff:127.0.0.1]/doc.pdf"):
+        with pytest.raises(LinkFetchError, match="non-public address"):
+            await fetcher.fetch(url)
+    assert requested == []
+
+    # A public page that redirects to the metadata service is stopped at the redirect
+    with pytest.raises(LinkFetchError, match="non-public address"):
+        await fetcher.fetch("http://93.184.216.34/doc.pdf")
+    assert requested == ["http://93.184.216.34/doc.pdf"]
+    assert StandInHandler.requests == []
+    await fetcher.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_unchanged_link_is_not_downloaded_or_embedded_again(server, fetcher, ingestion_service):
+    ingestion_service.link_fetcher = fetcher
+    url = f"{server}/page.html"
+
+    first = await ingestion_service.ingest_link(url)
+    assert first["status"] == "success"
+    assert first["file_name"] == url
+    embedded = len(ingestion_service.embedding_client.batches)
+    assert embedded > 0
+
+    second = await ingestion_service.ingest_link(url)
+    assert second["status"] == "skipped"
+    assert second["not_modified"] is True
+    assert len(ingestion_service.embedding_client.batches) == embedded
+    assert StandInHandler.requests == [("/page.html", None), ("/page.html", '"v1"')]
+
+    # Validators survive a restart
+    reloaded = LinkFetcher(client=fetcher.client, download_dir=str(fetcher.download_dir), state_path=fetcher.state_path,
+                           allow_private_hosts=True)
+    assert (await reloaded.fetch(url))["status"] == "not_modified"
+    await fetcher.client.aclose()
@@ -0,0 +1,53 @@
+import logging
+import pytest
+from app.core.metrics import MetricsRegistry, cache_collector
+from app.core.debug_log import SampledLogger
+
+
+def test_counters_and_histograms_render_in_prometheus_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    requests.inc(route="/chat")
+    requests.inc(2, route="/chat")
+    for seconds in (0.05, 0.5, 5.0):
+        latency.observe(seconds, route="/chat")
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{route="/chat"} 3' in text
+    assert 'latency_seconds_bucket{route="/chat",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/chat",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/chat",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{route="/chat"} 5.55' in text
+    assert 'latency_seconds_count{route="/chat"} 3' in text
+    assert latency.count(route="/chat") == 3
+
+    with pytest.raises(ValueError):
+        requests.inc(path="/chat")
+    # Registering the same metric again returns the existing one
+    assert registry.counter("requests_total", "Requests.", ("route",)) is requests
+
+
+def test_label_values_are_escaped_and_collectors_run_at_scrape_time():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors.", ("message",)).inc(message='bad "value"\n')
+    stats = {"hits": 1, "misses": 2, "entries": 3}
+    registry.add_collector(cache_collector("demo_cache", "Demo cache", lambda: stats))
+    stats["hits"] = 5
+
+    text = registry.render()
+    assert 'errors_total{message="bad \\"value\\"\\n"} 1' in text
+    assert "demo_cache_hits_total 5" in text
+    assert "# TYPE demo_cache_entries gauge" in text
+
+
+def test_sampled_logger_is_level_gated(caplog):
+    log = SampledLogger("tests.sampled", sample_rate=1.0)
+    with caplog.at_level(logging.INFO, logger="tests.sampled"):
+        log.debug("payload %s", "hidden")
+    assert not caplog.records
+    with caplog.at_level(logging.DEBUG, logger="tests.sampled"):
+        log.debug("payload %s", "shown")
+        SampledLogger("tests.sampled", sample_rate=0.0).debug("never")
+    assert [record.getMessage() for record in caplog.records] == ["payload shown"]
@@ -0,0 +1,282 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from app.services.rag_service import RAGService
+
+
+@pytest.fixture
+def rag_service():
+    service = RAGService(provider="openai")
+    service.answer_cache = None
+    service.embedding_client = MagicMock()
+    service.embedding_client.create_embedding = AsyncMock(return_value=[0.1, 0.2, 0.3])
+    service.llm_client = MagicMock()
+    service.llm_client.generate_response = AsyncMock(return_value="mocked answer")
+    service.vector_db_client = MagicMock()
+    service.vector_db_client.query_documents.return_value = {
+        "documents": [["Retrieved chunk."]],
+        "metadatas": [[{"source": "guide.pdf", "chunk": 1}]],
+        "ids": [["guide.pdf_chunk_1"]]
+    }
+    return service
+
+
+@pytest.mark.asyncio
+async def test_answer_query_embeds_query_once(rag_service):
+    answer = await rag_service.answer_query("What is RAG?", file_name="guide.pdf")
+
+    assert answer == "mocked answer"
+    rag_service.embedding_client.create_embedding.assert_awaited_once_with("What is RAG?")
+    kwargs = rag_service.vector_db_client.query_documents.call_args.kwargs
+    assert kwargs["query_embeddings"] == [[0.1, 0.2, 0.3]]
+    assert kwargs["where"] == {"source": "guide.pdf"}
+    assert "query_texts" not in kwargs
+    assert "Retrieved chunk." in rag_service.llm_client.generate_response.call_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_answer_query_reports_stage_timings(rag_service):
+    timings = {}
+    await rag_service.answer_query("What is RAG?", timings=timings)
+    assert set(timings) == {"embed", "retrieve", "context", "generate"}
+    assert all(seconds >= 0 for seconds in timings.values())
+
+
+@pytest.mark.asyncio
+async def test_answer_cache_serves_similar_queries_until_source_reingested(rag_service):
+    from app.services.answer_cache import SemanticAnswerCache
+    rag_service.answer_cache = SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.95)
+
+    assert await rag_service.answer_query("What is RAG?", file_name="guide.pdf") == "mocked answer"
+    rag_service.embedding_client.create_embedding.return_value = [0.1, 0.2, 0.31]
+    assert await rag_service.answer_query("what is rag", file_name="guide.pdf") == "mocked answer"
+    assert rag_service.llm_client.generate_response.await_count == 1
+
+    # A different file filter or a dissimilar query misses
+    await rag_service.answer_query("What is RAG?", file_name="other.pdf")
+    rag_service.embedding_client.create_embedding.return_value = [0.9, -0.2, 0.0]
+    await rag_service.answer_query("Something else", file_name="guide.pdf")
+    assert rag_service.llm_client.generate_response.await_count == 3
+
+    assert rag_service.answer_cache.invalidate_sources(["guide.pdf"]) == 3
+    rag_service.embedding_client.create_embedding.return_value = [0.1, 0.2, 0.3]
+    await rag_service.answer_query("What is RAG?", file_name="guide.pdf")
+    assert rag_service.llm_client.generate_response.await_count == 4
+
+
+@pytest.mark.asyncio
+async def test_answers_without_context_are_not_cached_and_ingest_invalidates(rag_service):
+    from app.services.answer_cache import SemanticAnswerCache
+    cache = rag_service.answer_cache = SemanticAnswerCache(max_entries=10, ttl_seconds=60, similarity_threshold=0.95)
+
+    # Asked before the document is ingested (or with retrieval failing): nothing to cache
+    rag_service.vector_db_client.query_documents.return_value = {"documents": [[]], "metadatas": [[]], "ids": [[]]}
+    await rag_service.answer_query("What is new?", file_name="new.pdf")
+    rag_service.vector_db_client.query_documents.return_value = None
+    await rag_service.answer_query("What is new?")
+    assert cache.stats()["entries"] == 0
+
+    # A first ingest of new.pdf drops its own bucket and the unfiltered one, not other files' answers
+    cache.store("openai", None, [1.0, 0.0], "unfiltered", ["old.pdf"])
+    cache.store("openai", "new.pdf", [1.0, 0.0], "filtered", [])
+    cache.store("openai", "old.pdf", [1.0, 0.0], "other file", ["old.pdf"])
+    assert cache.invalidate_document("new.pdf") == 2
+    assert cache.lookup("openai", "old.pdf", [1.0, 0.0]) == "other file"
+
+
+def test_answer_cache_ttl_and_lru():
+    from app.services.answer_cache import SemanticAnswerCache
+    cache = SemanticAnswerCache(max_entries=2, ttl_seconds=60, similarity_threshold=0.99)
+    cache.store("openai", None, [1.0, 0.0], "a", ["x.pdf"])
+    cache.store("openai", None, [0.0, 1.0], "b", ["y.pdf"])
+    assert cache.lookup("openai", None, [1.0, 0.0]) == "a"
+    cache.store("openai", None, [-1.0, 0.0], "c", ["z.pdf"])
+    # "b" was the least recently used entry
+    assert cache.lookup("openai", None, [0.0, 1.0]) is None
+    assert cache.lookup("openai", None, [1.0, 0.0]) == "a"
+
+    cache.ttl_seconds = 0
+    assert cache.lookup("openai", None, [1.0, 0.0]) is None
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_answer_query_records_metrics(rag_service):
+    from app.core.metrics import RAG_RETRIEVED_CHUNKS, RAG_STAGE_SECONDS, RAG_PROMPT_TOKENS
+    generated = RAG_STAGE_SECONDS.count(provider="openai", stage="generate")
+    queries = RAG_RETRIEVED_CHUNKS.count(provider="openai")
+    prompt_tokens = RAG_PROMPT_TOKENS.value(provider="openai")
+    await rag_service.answer_query("What is RAG?")
+    assert RAG_STAGE_SECONDS.count(provider="openai", stage="generate") == generated + 1
+    assert RAG_RETRIEVED_CHUNKS.count(provider="openai") == queries + 1
+    assert RAG_RETRIEVED_CHUNKS.sum(provider="openai") >= 1
+    assert RAG_PROMPT_TOKENS.value(provider="openai") > prompt_tokens
+
+
+@pytest.mark.asyncio
+async def test_hybrid_retrieval_fuses_lexical_and_vector_results(rag_service):
+    from app.services.bm25_index import BM25Index
+    from app.services.rag_service import reciprocal_rank_fusion
+    index = BM25Index()
+    index.add_chunks(["codes_chunk_1"], ["Error code E1042 means the pump lost pressure."], [{"source": "codes.pdf"}])
+    rag_service.lexical_index = index
+    rag_service.retrieval_mode = "hybrid"
+    rag_service.top_k = 2
+    rag_service.vector_db_client.get_documents.return_value = {
+        "ids": ["codes_chunk_1"],
+        "documents": ["Error code E1042 means the pump lost pressure."],
+        "metadatas": [{"source": "codes.pdf"}]
+    }
+
+    await rag_service.answer_query("What is E1042?")
+
+    # Vector search asks for more candidates than it keeps; the BM25-only hit is fetched by id
+    assert rag_service.vector_db_client.query_documents.call_args.kwargs["n_results"] > 2
+    rag_service.vector_db_client.get_documents.assert_called_once_with(["codes_chunk_1"])
+    prompt = rag_service.llm_client.generate_response.call_args.args[0]
+    assert "E1042" in prompt and "Retrieved chunk." in prompt
+    assert [item for item, _ in reciprocal_rank_fusion([["a", "b"], ["b", "c"]])] == ["b", "a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_complete_vector_mirror_replaces_chroma_queries(rag_service, tmp_path):
+    from app.services.vector_mirror import VectorMirror
+    mirror = VectorMirror(str(tmp_path / "mirror"))
+    mirror.add_chunks(["guide.pdf_chunk_7"], ["Mirrored chunk."], [{"source": "guide.pdf"}], [[0.1, 0.2, 0.3]])
+    rag_service.vector_mirror = mirror
+
+    # An incomplete mirror leaves retrieval to ChromaDB
+    await rag_service.answer_query("What is RAG?", file_name="guide.pdf")
+    assert rag_service.vector_db_client.query_documents.call_count == 1
+
+    mirror.mark_complete()
+    await rag_service.answer_query("What is RAG?", file_name="guide.pdf")
+    assert rag_service.vector_db_client.query_documents.call_count == 1
+    assert "Mirrored chunk." in rag_service.llm_client.generate_response.call_args.args[0]
+    mirror.close()
+
+
+@pytest.mark.asyncio
+async def test_reranker_reorders_a_wider_candidate_set(rag_service):
+    rag_service.reranker = MagicMock()
+    rag_service.reranker.rerank = AsyncMock(return_value=[0.1, 0.9, 0.5, 0.3])
+    rag_service.vector_db_client.query_documents.return_value = {
+        "ids": [["c0", "c1", "c2", "c3"]],
+        "documents": [["zero", "one", "two", "three"]],
+        "metadatas": [[{"source": "guide.pdf"}] * 4],
+        "distances": [[0.1, 0.2, 0.3, 0.4]]
+    }
+    rag_service.top_k = 2
+    timings = {}
+
+    await rag_service.answer_query("Which one?", timings=timings)
+
+    assert rag_service.vector_db_client.query_documents.call_args.kwargs["n_results"] > 2
+    rag_service.reranker.rerank.assert_awaited_once()
+    prompt = rag_service.llm_client.generate_response.call_args.args[0]
+    assert "one\n\ntwo" in prompt and "zero" not in prompt
+    assert "rerank" in timings
+
+    # Out of budget: the first top_k candidates in retrieval order
+    rag_service.reranker.rerank.return_value = None
+    await rag_service.answer_query("Which one?")
+    assert "zero\n\none" in rag_service.llm_client.generate_response.call_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_queries_share_one_generation(rag_service):
+    import asyncio
+    from app.services.single_flight import SingleFlight
+    rag_service.single_flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def slow_answer(prompt):
+        await release.wait()
+        return "shared answer"
+    rag_service.llm_client.generate_response = AsyncMock(side_effect=slow_answer)
+
+    timings = [{} for _ in range(3)]
+    queries = ["What is RAG?", "  what is   RAG? ", "What is RAG?"]
+    calls = [asyncio.ensure_future(rag_service.answer_query(query, timings=t)) for query, t in zip(queries, timings)]
+    other_file = asyncio.ensure_future(rag_service.answer_query("What is RAG?", file_name="guide.pdf"))
+    await asyncio.sleep(0.05)
+    release.set()
+
+    assert await asyncio.gather(*calls) == ["shared answer"] * 3
+    await other_file
+    assert rag_service.llm_client.generate_response.await_count == 2
+    assert rag_service.embedding_client.create_embedding.await_count == 2
+    assert "generate" in timings[0] and set(timings[1]) == {"coalesced"}
+
+
+@pytest.mark.asyncio
+async def test_answer_batch_embeds_and_retrieves_together(rag_service):
+    import asyncio
+    rag_service.embedding_client.embed_documents = AsyncMock(return_value=[[0.1, 0.2, 0.3], [0.3, 0.2, 0.1], [0.2, 0.2, 0.2]])
+    rag_service.vector_db_client.query_documents.side_effect = lambda query_embeddings, n_results, where: {
+        "ids": [[f"chunk_{i}"] for i in range(len(query_embeddings))],
+        "documents": [[f"Context {where} {i}."] for i in range(len(query_embeddings))],
+        "metadatas": [[{"source": "guide.pdf"}] for _ in query_embeddings],
+        "included": ["documents", "metadatas"]
+    }
+    running = 0
+    peak = 0
+
+    async def generate(prompt):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        if "Broken" in prompt:
+            raise RuntimeError("LLM failed")
+        return prompt.split("Question: ")[1]
+    rag_service.llm_client.generate_response = AsyncMock(side_effect=generate)
+
+    from app.core.metrics import metrics
+    def observed(stage):
+        line = next((line for line in metrics.render().splitlines()
+                     if line.startswith("rag_stage_seconds_count") and f'stage="{stage}"' in line and 'provider="openai"' in line), None)
+        return float(line.rsplit(" ", 1)[1]) if line else 0.0
+    embeds, retrieves = observed("embed"), observed("retrieve")
+
+    items = [("First?", None), ("Second?", "guide.pdf"), ("Broken?", None)]
+    results = dict([pair async for pair in rag_service.answer_batch(items, concurrency=2)])
+
+    # Whole-batch durations stay out of the per-query stage latencies
+    assert (observed("embed"), observed("retrieve")) == (embeds, retrieves)
+    assert observed("batch_embed") >= 1 and observed("batch_retrieve") >= 1
+
+    rag_service.embedding_client.embed_documents.assert_awaited_once_with(["First?", "Second?", "Broken?"])
+    rag_service.embedding_client.create_embedding.assert_not_awaited()
+    # One multi-query call per file filter
+    assert rag_service.vector_db_client.query_documents.call_count == 2
+    assert results[0] == "First?" and results[1] == "Second?"
+    assert isinstance(results[2], RuntimeError)
+    assert peak == 2
+    prompts = [call.args[0] for call in rag_service.llm_client.generate_response.call_args_list]
+    assert any("Context None 0." in prompt and "First?" in prompt for prompt in prompts)
+    assert any("Context {'source': 'guide.pdf'} 0." in prompt for prompt in prompts)
+
+
+@pytest.mark.asyncio
+async def test_stream_generate_timing_excludes_the_consumer(rag_service):
+    import asyncio
+    from app.core.interfaces import AbstractStreamingLLMClient
+
+    class StreamingLLM(AbstractStreamingLLMClient):
+        async def generate_response(self, prompt, context=None):
+            return ""
+
+        async def stream_response(self, prompt, context=None):
+            for token in ["slow ", "reader"]:
+                yield token
+
+    rag_service.llm_client = StreamingLLM()
+    timings = {}
+    tokens = []
+    async for token in rag_service.stream_answer("What is RAG?", timings=timings):
+        tokens.append(token)
+        await asyncio.sleep(0.1)
+
+    assert "".join(tokens) == "slow reader"
+    assert timings["generate"] < 0.1
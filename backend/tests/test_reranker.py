@@ -0,0 +1,44 @@
+import time
+import pytest
+from app.services.reranker import CrossEncoderReranker
+
+
+class KeywordModel:
+    """Stand-in cross-encoder: scores a pair by how often the document repeats the query's last word."""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        self.calls.append((len(pairs), batch_size))
+        time.sleep(self.delay)
+        return [document.count(query.split()[-1]) for query, document in pairs]
+
+
+@pytest.mark.asyncio
+async def test_rerank_scores_all_candidates_in_one_batch():
+    model = KeywordModel()
+    reranker = CrossEncoderReranker("test", model=model)
+    scores = await reranker.rerank("about pumps", ["nothing", "pumps pumps", "pumps"], budget_seconds=5)
+    assert scores == [0, 2, 1]
+    assert model.calls == [(3, 3)]
+    assert await reranker.rerank("about pumps", [], budget_seconds=5) == []
+
+
+@pytest.mark.asyncio
+async def test_rerank_gives_up_after_its_budget_and_skips_stale_work():
+    model = KeywordModel(delay=0.2)
+    reranker = CrossEncoderReranker("test", model=model)
+    assert await reranker.rerank("pumps", ["pumps"], budget_seconds=0.05) is None
+    # Queued behind the slow call, this one's budget has passed before a worker is free
+    assert await reranker.rerank("pumps", ["pumps"], budget_seconds=0.05) is None
+    time.sleep(0.3)
+    assert len(model.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_unloadable_model_keeps_retrieval_order():
+    reranker = CrossEncoderReranker("no/such-model")
+    reranker._load_failed = True
+    assert await reranker.rerank("pumps", ["pumps"], budget_seconds=1) is None
+    assert reranker.score("pumps", ["pumps"]) == []
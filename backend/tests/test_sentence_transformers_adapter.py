@@ -0,0 +1,51 @@
+import threading
+import numpy as np
+import pytest
+from app.adapters.sentence_transformers_adapter import SentenceTransformerAdapter
+from app.db.chroma_client import collection_name_for
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size, normalize_embeddings, convert_to_numpy, show_progress_bar):
+        self.calls.append((list(texts), batch_size, threading.current_thread().name))
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+
+@pytest.mark.asyncio
+async def test_embeddings_are_computed_off_the_event_loop_in_batches():
+    model = FakeModel()
+    adapter = SentenceTransformerAdapter("test-model", batch_size=8, model=model)
+    assert await adapter.embed_documents(["a", "bbb"]) == [[1.0, 1.0], [3.0, 1.0]]
+    assert await adapter.create_embedding("cc") == [2.0, 1.0]
+    assert await adapter.embed_documents([]) == []
+    texts, batch_size, thread = model.calls[0]
+    assert texts == ["a", "bbb"] and batch_size == 8
+    assert thread.startswith("local-embed")
+    await adapter.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cached_texts_skip_the_model(tmp_path):
+    from app.services.embedding_cache import EmbeddingCache
+    model = FakeModel()
+    adapter = SentenceTransformerAdapter("test-model", model=model,
+                                         cache=EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=100))
+    await adapter.embed_documents(["a", "bbb"])
+    assert await adapter.embed_documents(["bbb", "dddd"]) == [[3.0, 1.0], [4.0, 1.0]]
+    assert [texts for texts, _, _ in model.calls] == [["a", "bbb"], ["dddd"]]
+
+
+def test_each_embedding_model_gets_its_own_collection(monkeypatch):
+    from app.core.config import settings
+    from app.services.llm_provider_factory import LLMFactory
+    assert collection_name_for("text-embedding-ada-002") == "rag_documents"
+    assert collection_name_for(None) == "rag_documents"
+    assert collection_name_for("sentence-transformers/all-MiniLM-L6-v2") == "rag_documents__sentence-transformers-all-MiniLM-L6-v2"
+
+    monkeypatch.setattr(settings, "EMBEDDING_PROVIDER", "local")
+    client = LLMFactory.get_embedding_client()
+    assert isinstance(client, SentenceTransformerAdapter)
+    assert client.embedding_model == settings.LOCAL_EMBEDDING_MODEL
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from app.services.single_flight import SingleFlight
+
+
+async def settle():
+    """Let cancellations and done callbacks run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class Computation:
+    def __init__(self, result="answer", error=None):
+        self.result, self.error = result, error
+        self.started = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.started += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error:
+            raise self.error
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_computation():
+    flight, computation = SingleFlight(), Computation()
+    callers = [asyncio.ensure_future(flight.do("key", computation)) for _ in range(5)]
+    other = asyncio.ensure_future(flight.do("other", Computation("other")))
+    await asyncio.sleep(0)
+    computation.release.set()
+    results = await asyncio.gather(*callers)
+    assert computation.started == 1
+    assert results == [("answer", False)] + [("answer", True)] * 4
+    other.cancel()
+    await settle()
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_remembered():
+    flight, failing = SingleFlight(), Computation(error=RuntimeError("LLM down"))
+    callers = [asyncio.ensure_future(flight.do("key", failing)) for _ in range(2)]
+    await asyncio.sleep(0)
+    failing.release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    await asyncio.sleep(0)
+    retry = Computation("recovered")
+    retry.release.set()
+    assert await flight.do("key", retry) == ("recovered", False)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_others():
+    flight, computation = SingleFlight(), Computation()
+    first = asyncio.ensure_future(flight.do("key", computation))
+    second = asyncio.ensure_future(flight.do("key", computation))
+    await asyncio.sleep(0)
+    # The caller that started the computation disconnects
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not computation.cancelled
+    computation.release.set()
+    assert await second == ("answer", True)
+    assert first.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_computation_is_cancelled_when_every_caller_is_gone():
+    flight, computation = SingleFlight(), Computation()
+    callers = [asyncio.ensure_future(flight.do("key", computation)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for caller in callers:
+        caller.cancel()
+    await settle()
+    assert computation.cancelled
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_caller_arriving_during_cancellation_starts_a_new_computation():
+    flight, computation = SingleFlight(), Computation()
+    caller = asyncio.ensure_future(flight.do("key", computation))
+    await asyncio.sleep(0)
+    caller.cancel()
+    # The caller handles its cancellation; the computation has not finished cancelling yet
+    await asyncio.sleep(0)
+    fresh = Computation("fresh answer")
+    late = asyncio.ensure_future(flight.do("key", fresh))
+    await asyncio.sleep(0)
+    fresh.release.set()
+    assert await late == ("fresh answer", False)
+    await settle()
+    assert computation.cancelled
+    assert len(flight) == 0
@@ -0,0 +1,41 @@
+import pytest
+from app.services.token_chunker import TokenChunker
+from app.services.embedding_scheduler import estimate_tokens
+
+TEXT = "\n\n".join(
+    f"Section {i}. " + " ".join(f"Sentence {j} of section {i} explains a detail." for j in range(12))
+    for i in range(20)
+)
+
+
+def test_chunks_fit_the_token_budget_and_keep_every_word():
+    chunker = TokenChunker(chunk_size=64)
+    chunks = chunker.split_text(TEXT)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 64 + 1 for chunk in chunks)
+    # Without overlap every word appears exactly once, in order
+    assert " ".join(chunks).split() == TEXT.split()
+    # Chunks end at sentence boundaries
+    assert all(chunk.endswith(".") for chunk in chunks)
+
+
+def test_oversized_sentences_and_words_are_split():
+    chunker = TokenChunker(chunk_size=16)
+    text = "word " * 200 + "x" * 1000
+    chunks = chunker.split_text(text)
+    assert all(estimate_tokens(chunk) <= 17 for chunk in chunks)
+    assert "".join(chunks).replace(" ", "") == text.replace(" ", "")
+
+
+def test_overlap_repeats_trailing_sentences():
+    chunks = TokenChunker(chunk_size=64, chunk_overlap=16).split_text(TEXT)
+    first_sentences = chunks[0].split(". ")
+    assert chunks[1].startswith(first_sentences[-1].rstrip("."))
+    with pytest.raises(ValueError):
+        TokenChunker(chunk_size=16, chunk_overlap=16)
+
+
+def test_stream_matches_split_text():
+    chunker = TokenChunker(chunk_size=64)
+    paragraphs = TEXT.split("\n\n")
+    assert list(chunker.split_stream(paragraphs)) == chunker.split_text("\n".join(paragraphs))
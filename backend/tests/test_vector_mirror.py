@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+from app.core.config import settings
+from app.services.vector_mirror import VectorMirror
+
+DIM = 16
+
+
+def _vectors(count, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+
+
+@pytest.fixture
+def vectors():
+    return _vectors(6)
+
+
+@pytest.fixture
+def mirror(tmp_path, vectors):
+    mirror = VectorMirror(str(tmp_path / "mirror"))
+    mirror.add_chunks([f"chunk_{i}" for i in range(6)], [f"text {i}" for i in range(6)],
+                      [{"source": "a.pdf" if i < 3 else "b.pdf", "chunk": i} for i in range(6)], vectors.tolist())
+    mirror.mark_complete()
+    yield mirror
+    mirror.close()
+
+
+def test_incomplete_mirror_does_not_answer(tmp_path):
+    mirror = VectorMirror(str(tmp_path / "mirror"))
+    mirror.add_chunks(["a"], ["text"], [{"source": "a.pdf"}], _vectors(1).tolist())
+    assert not mirror.ready
+    assert mirror.query(_vectors(1)[0].tolist()) is None
+
+
+def test_query_returns_nearest_chunks_in_chroma_shape(mirror, vectors):
+    result = mirror.query((vectors[4] * 3).tolist(), n_results=2)
+    assert result["ids"][0][0] == "chunk_4"
+    assert result["documents"][0][0] == "text 4"
+    assert result["metadatas"][0][0] == {"source": "b.pdf", "chunk": 4}
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+    assert len(result["ids"][0]) == 2
+
+    filtered = mirror.query(vectors[4].tolist(), n_results=5, where={"source": "a.pdf"})
+    assert set(filtered["ids"][0]) == {"chunk_0", "chunk_1", "chunk_2"}
+    assert mirror.query(vectors[4].tolist(), where={"source": "missing.pdf"})["ids"] == [[]]
+    assert mirror.query(vectors[4].tolist(), where={"page": 1}) is None
+
+
+def test_remove_and_replace_chunks(mirror, vectors):
+    mirror.remove_chunks(["chunk_4"])
+    assert "chunk_4" not in mirror.query(vectors[4].tolist(), n_results=6)["ids"][0]
+    mirror.add_chunks(["chunk_0"], ["new text"], [{"source": "b.pdf"}], [vectors[4].tolist()])
+    result = mirror.query(vectors[4].tolist(), n_results=1)
+    assert result["ids"][0] == ["chunk_0"] and result["documents"][0] == ["new text"]
+    assert mirror.live_rows == 5
+    assert mirror.get_documents(["chunk_0", "chunk_4"])["documents"] == ["new text"]
+
+
+def test_second_instance_sees_committed_rows(mirror, vectors, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_MIRROR_RELOAD_CHECK_SECONDS", 0.0)
+    reader = VectorMirror(mirror.directory)
+    assert reader.query(vectors[1].tolist(), n_results=1)["ids"][0] == ["chunk_1"]
+    more = _vectors(2000, seed=1)
+    mirror.add_chunks([f"more_{i}" for i in range(2000)], ["more"] * 2000, [{"source": "c.pdf"}] * 2000, more.tolist())
+    assert reader.query(more[1500].tolist(), n_results=1)["ids"][0] == ["more_1500"]
+    reader.close()
+
+
+def test_float16_mirror(tmp_path, vectors):
+    mirror = VectorMirror(str(tmp_path / "mirror"), dtype="float16")
+    mirror.add_chunks(["a", "b"], ["a", "b"], [{"source": "x"}] * 2, vectors[:2].tolist())
+    mirror.mark_complete()
+    assert mirror._maps["vectors"].dtype == np.float16
+    assert mirror.query(vectors[1].tolist(), n_results=1)["ids"][0] == ["b"]
+    mirror.close()
+
+
+def test_ivf_index_finds_the_same_nearest_chunks(tmp_path):
+    mirror = VectorMirror(str(tmp_path / "mirror"))
+    data = _vectors(3000, seed=2)
+    mirror.add_chunks([str(i) for i in range(3000)], ["text"] * 3000, [{"source": "x"}] * 3000, data.tolist())
+    mirror.mark_complete()
+    queries = data[:20] + 0.05 * _vectors(20, seed=3)
+    exact = [mirror.query(query.tolist(), n_results=1)["ids"][0] for query in queries]
+    mirror.train_ivf()
+    assert mirror._centroids is not None
+    assert [mirror.query(query.tolist(), n_results=1)["ids"][0] for query in queries] == exact
+    # Rows added after training are assigned to a list too
+    mirror.add_chunks(["new"], ["text"], [{"source": "x"}], [(data[0] * -1).tolist()])
+    assert mirror.query((data[0] * -1).tolist(), n_results=1)["ids"][0] == ["new"]
+    mirror.close()
+
+
+def test_queries_and_writes_proceed_while_ivf_trains(tmp_path, monkeypatch):
+    import time
+    import threading
+    from app.services import vector_mirror as module
+    mirror = VectorMirror(str(tmp_path / "mirror"))
+    data = _vectors(3000, seed=4)
+    mirror.add_chunks([str(i) for i in range(3000)], ["text"] * 3000, [{"source": "x"}] * 3000, data.tolist())
+    mirror.mark_complete()
+    training, release = threading.Event(), threading.Event()
+    nearest = module._nearest
+
+    def slow_nearest(vectors, centroids, block=4096):
+        if not training.is_set():
+            training.set()
+            release.wait(5)
+        return nearest(vectors, centroids, block)
+    monkeypatch.setattr(module, "_nearest", slow_nearest)
+    trainer = threading.Thread(target=mirror.train_ivf)
+    trainer.start()
+    assert training.wait(5)
+
+    # Neither waits for k-means (which is held up until release, or 5 seconds)
+    start = time.monotonic()
+    assert mirror.query(data[5].tolist(), n_results=1)["ids"][0] == ["5"]
+    mirror.add_chunks(["late"], ["text"], [{"source": "x"}], [(data[0] * -1).tolist()])
+    assert time.monotonic() - start < 2
+    release.set()
+    trainer.join(5)
+
+    assert mirror._centroids is not None
+    assert mirror._state["ivf_rows"] == 3001
+    assert mirror.query((data[0] * -1).tolist(), n_results=1)["ids"][0] == ["late"]
+    mirror.close()
+
+
+def test_rebuild_copies_a_collection(tmp_path, vectors):
+    class Collection:
+        def get(self, include, limit, offset):
+            ids = [f"c{i}" for i in range(6)][offset:offset + limit]
+            rows = range(offset, offset + len(ids))
+            return {"ids": ids, "documents": [f"doc {i}" for i in rows],
+                    "metadatas": [{"source": "a.pdf"} for _ in rows], "embeddings": vectors[offset:offset + len(ids)]}
+
+    mirror = VectorMirror(str(tmp_path / "mirror"))
+    mirror.add_chunks(["stale"], ["stale"], [{"source": "a.pdf"}], [vectors[0].tolist()])
+    assert mirror.rebuild(Collection(), batch_size=4) == 6
+    assert mirror.ready and mirror.live_rows == 6
+    assert mirror.query(vectors[5].tolist(), n_results=1)["ids"][0] == ["c5"]
+    mirror.close()
+
+
+def test_queries_score_without_holding_the_lock(mirror, vectors):
+    import threading
+    lock_free = []
+
+    class Probe:
+        """Wraps the vector map and checks, on every read, that another thread can take the lock."""
+        def __init__(self, array):
+            self.array = array
+
+        def __getitem__(self, key):
+            def try_lock():
+                acquired = mirror._lock.acquire(timeout=1)
+                lock_free.append(acquired)
+                if acquired:
+                    mirror._lock.release()
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            return self.array[key]
+
+    mirror._maps["vectors"] = Probe(mirror._maps["vectors"])
+    result = mirror.query(vectors[2].tolist(), n_results=1)
+    mirror._maps["vectors"] = mirror._maps["vectors"].array
+    assert result["ids"][0] == ["chunk_2"]
+    assert lock_free and all(lock_free)
+
+
+def test_rebuild_holds_the_write_lock_throughout(tmp_path, vectors, monkeypatch):
+    mirror = VectorMirror(str(tmp_path / "mirror"))
+    acquired = []
+    write_lock = mirror._write_lock
+    monkeypatch.setattr(mirror, "_write_lock", lambda: acquired.append(1) or write_lock())
+
+    class Collection:
+        def get(self, include, limit, offset):
+            ids = [f"c{i}" for i in range(6)][offset:offset + limit]
+            return {"ids": ids, "documents": ids, "metadatas": [{"source": "a.pdf"} for _ in ids],
+                    "embeddings": vectors[offset:offset + len(ids)]}
+
+    assert mirror.rebuild(Collection(), batch_size=2) == 6
+    assert len(acquired) == 1
+    assert mirror.ready and mirror.live_rows == 6
+    mirror.close()
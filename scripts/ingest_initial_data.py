@@ -4,7 +4,22 @@ import os
 
 FASTAPI_URL = "http://localhost:8001"
 INGEST_ENDPOINT = f"{FASTAPI_URL}/api/ingest/upload"
+JOBS_ENDPOINT = f"{FASTAPI_URL}/api/ingest/jobs"
 DATA_DIR = "./data/raw_docs"
+POLL_INTERVAL = 2
+
+async def wait_for_job(client, job_id):
+    # Uploads are ingested in the background; poll until the job finishes
+    while True:
+        response = await client.get(f"{JOBS_ENDPOINT}/{job_id}")
+        response.raise_for_status()
+        job = response.json()
+        if job["status"] in ("succeeded", "failed"):
+            return job
+        progress = job.get("progress") or {}
+        if progress:
+            print(f"  {job['status']}: {progress.get('chunks_embedded', 0)}/{progress.get('chunks_total') or '?'} chunks embedded")
+        await asyncio.sleep(POLL_INTERVAL)
 
 async def ingest_all_documents():
     success, fail = 0, 0
@@ -18,29 +33,42 @@ async def ingest_all_documents():
         ".png": "image/png",
         ".txt": "text/plain",
     }
-    for filename in os.listdir(DATA_DIR):
-        ext = os.path.splitext(filename)[1].lower()
-        if ext not in content_types:
-            print(f"Skipping unsupported file: {filename}")
-            continue
-        file_path = os.path.join(DATA_DIR, filename)
-        if os.path.isfile(file_path):
-            print(f"Ingesting {filename}...")
-            try:
-                async with httpx.AsyncClient() as client:
+    jobs = {}
+    async with httpx.AsyncClient(timeout=60) as client:
+        for filename in os.listdir(DATA_DIR):
+            ext = os.path.splitext(filename)[1].lower()
+            if ext not in content_types:
+                print(f"Skipping unsupported file: {filename}")
+                continue
+            file_path = os.path.join(DATA_DIR, filename)
+            if os.path.isfile(file_path):
+                print(f"Uploading {filename}...")
+                try:
                     with open(file_path, "rb") as f:
                         files = {"file": (filename, f, content_types[ext])}
-                        response = await client.post(INGEST_ENDPOINT, files=files, timeout=300)
-                        try:
-                            response.raise_for_status()
-                            print(f"Successfully ingested {filename}: {response.json()}")
-                            success += 1
-                        except httpx.HTTPStatusError as http_err:
-                            print(f"Failed to ingest {filename}: {http_err}\nResponse body: {response.text}")
-                            fail += 1
+                        response = await client.post(INGEST_ENDPOINT, files=files)
+                    try:
+                        response.raise_for_status()
+                        jobs[filename] = response.json()["job_id"]
+                    except httpx.HTTPStatusError as http_err:
+                        print(f"Failed to ingest {filename}: {http_err}\nResponse body: {response.text}")
+                        fail += 1
+                except Exception as e:
+                    print(f"Failed to ingest {filename}: {e}")
+                    fail += 1
+        for filename, job_id in jobs.items():
+            try:
+                job = await wait_for_job(client, job_id)
             except Exception as e:
                 print(f"Failed to ingest {filename}: {e}")
                 fail += 1
+                continue
+            if job["status"] == "succeeded":
+                print(f"Successfully ingested {filename}: {job['result']}")
+                success += 1
+            else:
+                print(f"Failed to ingest {filename}: {job['error']}")
+                fail += 1
     print(f"Ingestion process completed. Success: {success}, Failed: {fail}")
 
 if __name__ == "__main__":